@@ -0,0 +1,171 @@
+"""Bounded TTL + LRU cache with single-flight loading for Mac Flix upstream lookups."""
+
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, NamedTuple, Tuple, Type
+
+UPSTREAM_CACHE_SIZE = int(os.getenv("MACFLIX_UPSTREAM_CACHE_SIZE", "5000"))
+UPSTREAM_CACHE_TTL = float(os.getenv("MACFLIX_UPSTREAM_CACHE_TTL", "3600"))  # seconds
+UPSTREAM_CACHE_STALE_TTL = float(os.getenv("MACFLIX_UPSTREAM_CACHE_STALE_TTL", "86400"))  # kept for outages
+
+_MISSING = object()
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a search query for use in cache keys (case and whitespace)."""
+    return " ".join(query.split()).casefold()
+
+
+class CacheStats(NamedTuple):
+    """Counters for one cache since it was created."""
+    hits: int
+    misses: int  # lookups that went upstream
+    coalesced: int  # misses that joined an in-flight load instead
+    evictions: int  # entries dropped to stay within maxsize
+    expirations: int  # entries dropped because their TTL (and stale window) passed
+    size: int
+    stale_hits: int = 0  # expired values served because upstream was unavailable
+
+
+class TTLCache:
+    """In-process cache with a per-entry TTL and least-recently-used eviction.
+
+    get_or_load (threads) and aget_or_load (asyncio) coalesce concurrent
+    misses for the same key, so N identical requests make one upstream call.
+    Failed loads are not cached; every caller waiting on them gets the error,
+    unless it is one of `stale_on` and an expired value is still within
+    `stale_ttl`, in which case that value is served instead.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = UPSTREAM_CACHE_SIZE,
+        ttl: float = UPSTREAM_CACHE_TTL,
+        clock: Callable[[], float] = time.monotonic,
+        stale_ttl: float = 0.0,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()  # (expires, value)
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, Future] = {}
+        self._async_flights: Dict[Hashable, asyncio.Future] = {}
+        self._hits = self._misses = self._coalesced = self._evictions = self._expirations = 0
+        self._stale_hits = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default=None):
+        """Get a fresh cached value (marking it recently used), or default."""
+        value, fresh = self._lookup(key)
+        return value if fresh else default
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """Store a value, evicting the least recently used entries past maxsize."""
+        expires = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            self._hits, self._misses, self._coalesced, self._evictions, self._expirations, len(self._entries),
+            self._stale_hits,
+        )
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], stale_on: Tuple[Type[BaseException], ...] = ()):
+        """Get a cached value, or call loader once for all threads missing on key."""
+        stale, fresh = self._lookup(key, count=True)
+        if fresh:
+            return stale
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Future()
+                self._misses += 1
+            else:
+                self._coalesced += 1
+        if leader:
+            try:
+                value = loader()
+                self.set(key, value)
+                flight.set_result(value)
+            except BaseException as e:
+                flight.set_exception(e)
+            finally:
+                with self._lock:
+                    del self._flights[key]
+        try:
+            return flight.result()
+        except stale_on:
+            return self._serve_stale(stale)
+
+    async def aget_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        stale_on: Tuple[Type[BaseException], ...] = (),
+    ):
+        """Get a cached value, or await loader once for all tasks missing on key."""
+        stale, fresh = self._lookup(key, count=True)
+        if fresh:
+            return stale
+        flight = self._async_flights.get(key)
+        if flight is None:
+            self._misses += 1
+            flight = self._async_flights[key] = asyncio.ensure_future(self._fill(key, loader))
+        else:
+            self._coalesced += 1
+        try:
+            # Shielded, so one cancelled caller does not cancel the load the others wait on.
+            return await asyncio.shield(flight)
+        except stale_on:
+            return self._serve_stale(stale)
+
+    async def _fill(self, key: Hashable, loader: Callable[[], Awaitable[Any]]):
+        try:
+            value = await loader()
+            self.set(key, value)
+            return value
+        finally:
+            del self._async_flights[key]
+
+    def _serve_stale(self, stale):
+        if stale is _MISSING:
+            raise
+        with self._lock:
+            self._stale_hits += 1
+        return stale
+
+    def _lookup(self, key: Hashable, count: bool = False) -> Tuple[Any, bool]:
+        """(value, fresh), where an expired value is kept through its stale window."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING, False
+            now = self._clock()
+            if entry[0] + self.stale_ttl <= now:
+                del self._entries[key]
+                self._expirations += 1
+                return _MISSING, False
+            self._entries.move_to_end(key)
+            if entry[0] <= now:
+                return entry[1], False
+            if count:
+                self._hits += 1
+            return entry[1], True
@@ -0,0 +1,459 @@
+"""In-memory catalog store with id and secondary indexes for Mac Flix."""
+
+import base64
+import binascii
+import hashlib
+import threading
+import weakref
+from bisect import bisect_left, bisect_right, insort
+from functools import cached_property
+from typing import Dict, FrozenSet, Iterable, Iterator, KeysView, List, Mapping, MutableMapping, NamedTuple, Optional, Protocol, Sequence, Tuple
+from app.compact import CompactItems
+from app.models import ContentItem
+from app.search import SearchIndex
+from app.similar import SimilarIndex
+from app.suggest import SuggestIndex
+
+INDEXED_FIELDS = ("type", "genre", "year", "language", "rating")
+RANGE_FIELDS = ("year", "rating")
+_INDEX_BUILD_LOCK = threading.RLock()  # full index builds run one at a time (cached_property has no lock since 3.12)
+
+
+def bits_from_ordinals(ordinals: Iterable[int], size: int) -> int:
+    """Build a bitset (Python int) with the given ordinals set."""
+    buf = bytearray((size + 7) // 8)
+    for ordinal in ordinals:
+        buf[ordinal >> 3] |= 1 << (ordinal & 7)
+    return int.from_bytes(buf, "little")
+
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """Yield the ordinals set in a bitset, in ascending order."""
+    digits = bin(bits)[:1:-1]
+    pos = digits.find("1")
+    while pos != -1:
+        yield pos
+        pos = digits.find("1", pos + 1)
+
+
+def encode_cursor(item_id: str) -> str:
+    """Encode the last id of a page as an opaque pagination cursor."""
+    return base64.urlsafe_b64encode(item_id.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    """Decode a pagination cursor back to an id; raises ValueError if malformed."""
+    try:
+        raw = base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True)
+        return raw.decode("utf-8")
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def index_keys(item: ContentItem) -> Iterator[Tuple[str, object]]:
+    """Yield the (field, key) pairs an item is indexed under."""
+    yield "type", item.type
+    for genre in item.genres:
+        yield "genre", genre
+    yield "year", item.year
+    if item.language:
+        yield "language", item.language
+    if item.rating is not None:
+        yield "rating", item.rating
+
+
+class RangeIndex:
+    """Sorted keys with cumulative bitsets, for range and threshold scans.
+
+    ``_upto[i]`` holds every ordinal whose key sorts before ``keys[i]``, so any
+    key range resolves to two bisects and one AND-NOT, whatever its width.
+    """
+
+    def __init__(self, postings: Dict[object, int]):
+        self.keys = sorted(postings)
+        self._postings = postings
+        self._upto = [0]
+        acc = 0
+        for key in self.keys:
+            acc |= postings[key]
+            self._upto.append(acc)
+
+    def between(self, lo=None, hi=None) -> int:
+        """Bitset of ordinals with lo <= key <= hi (either bound optional)."""
+        start = 0 if lo is None else bisect_left(self.keys, lo)
+        end = len(self.keys) if hi is None else bisect_right(self.keys, hi)
+        if end <= start:
+            return 0
+        return self._upto[end] & ~self._upto[start]
+
+    def above(self, value) -> int:
+        """Bitset of ordinals with key strictly greater than value."""
+        return self._upto[-1] & ~self._upto[bisect_right(self.keys, value)]
+
+    def iter_desc(self, bits: int) -> Iterator[int]:
+        """Yield the ordinals in bits ordered by key, highest key first."""
+        for key in reversed(self.keys):
+            matched = bits & self._postings[key]
+            if matched:
+                yield from iter_bits(matched)
+
+
+class ItemSequence(Protocol):
+    """Ordinal-addressed item storage: a plain list, or a lazy snapshot view."""
+
+    def __len__(self) -> int: ...
+    def __getitem__(self, ordinal: int) -> Optional[ContentItem]: ...
+    def __setitem__(self, ordinal: int, item: Optional[ContentItem]) -> None: ...
+    def __iter__(self) -> Iterator[Optional[ContentItem]]: ...
+    def append(self, item: ContentItem) -> None: ...
+    def copy(self) -> "ItemSequence": ...
+
+
+class CatalogDiff(NamedTuple):
+    """Summary of an incremental catalog update."""
+    added: int
+    updated: int
+    removed: int
+    swapped: bool = False  # True when a whole new snapshot replaced the store
+
+
+class CatalogStore:
+    """Content catalog indexed by id, type, genre, year, language and rating.
+
+    Items are addressed by ordinal (their position in load order). Secondary
+    indexes map each key to a bitset of ordinals, so lookups never scan the
+    whole catalog. A store is never mutated once built: apply_changes derives
+    a new store, so readers holding a reference always see a complete snapshot.
+    """
+
+    # (the store this one was derived from, the ordinals apply_changes touched)
+    _derived_from: Optional[Tuple["weakref.ref[CatalogStore]", FrozenSet[int]]] = None
+    # the previous store's similar index, patched, served until this store builds its own
+    _similar_interim: Optional[SimilarIndex] = None
+
+    def __init__(
+        self,
+        items: Iterable[ContentItem],
+        version: Optional[str] = None,
+        fingerprints: Optional[MutableMapping[str, bytes]] = None,
+        compact: bool = False,
+    ):
+        if version is not None:
+            self.version = version
+        self.fingerprints: MutableMapping[str, bytes] = {} if fingerprints is None else fingerprints
+        self._items: ItemSequence = CompactItems() if compact else []
+        self._by_id: MutableMapping[str, int] = {}
+        postings: Dict[str, Dict[object, List[int]]] = {field: {} for field in INDEXED_FIELDS}
+        for item in items:
+            if item.id in self._by_id:
+                raise ValueError(f"Duplicate content id: {item.id}")
+            ordinal = len(self._items)
+            self._by_id[item.id] = ordinal
+            self._items.append(item)
+            for field, key in index_keys(item):
+                postings[field].setdefault(key, []).append(ordinal)
+        size = len(self._items)
+        self.indexes: Dict[str, Dict[object, int]] = {
+            field: {key: bits_from_ordinals(ords, size) for key, ords in keys.items()}
+            for field, keys in postings.items()
+        }
+        self.ranges: Dict[str, RangeIndex] = {field: RangeIndex(self.indexes[field]) for field in RANGE_FIELDS}
+        self.all_bits = (1 << size) - 1
+
+    @classmethod
+    def from_parts(
+        cls,
+        items: "ItemSequence",
+        by_id: MutableMapping[str, int],
+        indexes: Dict[str, Dict[object, int]],
+        all_bits: int,
+        version: str,
+        fingerprints: MutableMapping[str, bytes],
+    ) -> "CatalogStore":
+        """Assemble a store from prebuilt parts (used by reloads and snapshots)."""
+        store = cls.__new__(cls)
+        store.version = version
+        store.fingerprints = fingerprints
+        store._items = items
+        store._by_id = by_id
+        store.indexes = indexes
+        store.ranges = {field: RangeIndex(indexes[field]) for field in RANGE_FIELDS}
+        store.all_bits = all_bits
+        return store
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    @property
+    def compact(self) -> bool:
+        """Whether items live outside plain ContentItem lists (compact columns or a snapshot)."""
+        return not isinstance(self._items, list)
+
+    def __iter__(self) -> Iterator[ContentItem]:
+        return (item for item in self._items if item is not None)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._by_id
+
+    def ids(self) -> KeysView[str]:
+        """The ids of every item in the catalog."""
+        return self._by_id.keys()
+
+    def ordered_ids(self) -> List[str]:
+        """The ids of every item, in catalog (ordinal) order."""
+        slots: List[Optional[str]] = [None] * len(self._items)
+        for item_id, ordinal in self._by_id.items():
+            slots[ordinal] = item_id
+        return [item_id for item_id in slots if item_id is not None]
+
+    def compacted(self) -> "CatalogStore":
+        """This store, or an equivalent one rebuilt without tombstoned ordinals."""
+        if len(self._by_id) == len(self._items):
+            return self
+        return CatalogStore(iter(self), version=self.version, fingerprints=self.fingerprints, compact=self.compact)
+
+    def get(self, item_id: str) -> Optional[ContentItem]:
+        """Get a content item by ID, or None if it is not in the catalog."""
+        ordinal = self._by_id.get(item_id)
+        if ordinal is None:
+            return None
+        return self._items[ordinal]
+
+    def ordinal(self, item_id: str) -> Optional[int]:
+        """Get an item's ordinal by ID, or None if it is not in the catalog."""
+        return self._by_id.get(item_id)
+
+    def item_json(self, item_id: str) -> Optional[bytes]:
+        """Get an item encoded as JSON, reusing pre-encoded bytes when the store has them."""
+        ordinal = self._by_id.get(item_id)
+        if ordinal is None:
+            return None
+        return self._encode(ordinal)
+
+    def iter_json(self) -> Iterator[bytes]:
+        """Yield every item encoded as JSON, in catalog order."""
+        for ordinal in iter_bits(self.all_bits):
+            yield self._encode(ordinal)
+
+    def json_array(self, ordinals: Iterable[int]) -> bytes:
+        """Encode items as a JSON array, keeping the order of ordinals, without building models."""
+        return b"[" + b",".join(self._encode(ordinal) for ordinal in ordinals) + b"]"
+
+    def _encode(self, ordinal: int) -> bytes:
+        encoded = self._items.json(ordinal) if hasattr(self._items, "json") else None
+        if encoded is None:
+            encoded = self._items[ordinal].model_dump_json().encode("utf-8")
+        return encoded
+
+    @cached_property
+    def version(self) -> str:
+        """Hash identifying this catalog snapshot (content digest unless given)."""
+        digest = hashlib.blake2b(digest_size=16)
+        for item in self:
+            digest.update(item.model_dump_json().encode("utf-8"))
+            digest.update(b"\n")
+        return digest.hexdigest()
+
+    @cached_property
+    def sorted_ids(self) -> Sequence[str]:
+        """All item ids in sorted order; the stable order used for paging."""
+        sorted_keys = getattr(self._by_id, "sorted_keys", None)
+        return sorted_keys() if sorted_keys else sorted(self._by_id)
+
+    @cached_property
+    def search_index(self) -> SearchIndex:
+        """Full-text index over the live items, built on first use and patched by apply_changes."""
+        return self._build_once("search_index", lambda: SearchIndex.build(
+            (ordinal, self._fields(ordinal)) for ordinal in iter_bits(self.all_bits)
+        ))
+
+    @cached_property
+    def suggest_index(self) -> SuggestIndex:
+        """Autocomplete index over titles and people, built on first use."""
+        return self._build_once("suggest_index", lambda: SuggestIndex.build(
+            self._fields(ordinal) for ordinal in iter_bits(self.all_bits)
+        ))
+
+    @cached_property
+    def similar_index(self) -> SimilarIndex:
+        """Precomputed "More Like This" neighbours, built on first use; apply_changes marks edits stale.
+
+        A reload that adds items leaves this unbuilt, so the new items become candidates too.
+        """
+        return self._build_once("similar_index", lambda: SimilarIndex.build(
+            (ordinal, self._fields(ordinal)) for ordinal in iter_bits(self.all_bits)
+        ))
+
+    def _build_once(self, name: str, build):
+        """Build an index under a lock, so a request and the background warm-up never both build it."""
+        with _INDEX_BUILD_LOCK:
+            built = self.__dict__.get(name)
+            return built if built is not None else build()
+
+    def similar(self, item_id: str, limit: int) -> Optional[List[ContentItem]]:
+        """The items most like item_id, best first; None if there is no such item.
+
+        Items added or changed since the index was built are scored on demand.
+        """
+        ordinals = self.similar_ordinals(item_id, limit)
+        return None if ordinals is None else self.materialize(ordinals)
+
+    def similar_ordinals(self, item_id: str, limit: int) -> Optional[List[int]]:
+        """Ordinals of the items most like item_id, as for similar()."""
+        ordinal = self._by_id.get(item_id)
+        if ordinal is None:
+            return None
+        index = self.__dict__.get("similar_index", self._similar_interim)
+        if index is None:
+            index = self.similar_index
+        ranked = index.neighbors(ordinal)
+        if ranked is None:
+            ranked = index.query(self._fields(ordinal), exclude=ordinal)
+        return [o for o, _ in ranked if self._items[o] is not None][:limit]
+
+    def _fields(self, ordinal: int) -> Mapping[str, object]:
+        # Compact and snapshot storage hand out plain fields without building a ContentItem.
+        fields = self._items.fields(ordinal) if hasattr(self._items, "fields") else None
+        return vars(self._items[ordinal]) if fields is None else fields
+
+    def page_after(self, after: Optional[str], limit: int) -> Tuple[List[ContentItem], bool]:
+        """Get up to limit items with ids sorted after `after`, and whether more remain."""
+        ordinals, next_after = self.page_ordinals_after(after, limit)
+        return self.materialize(ordinals), next_after is not None
+
+    def page_ordinals_after(self, after: Optional[str], limit: int) -> Tuple[List[int], Optional[str]]:
+        """Ordinals of the page_after() items, and the id to continue after (None on the last page)."""
+        ids = self.sorted_ids
+        start = 0 if after is None else bisect_right(ids, after)
+        page_ids = ids[start:start + limit]
+        next_after = page_ids[-1] if page_ids and start + limit < len(ids) else None
+        return [self._by_id[i] for i in page_ids], next_after
+
+    def bits(self, field: str, key: object) -> int:
+        """Get the bitset of ordinals indexed under field=key."""
+        if field not in self.indexes:
+            raise KeyError(f"Unknown index: {field}")
+        return self.indexes[field].get(key, 0)
+
+    def select(self, bits: int) -> List[ContentItem]:
+        """Materialize the items in a bitset, in catalog order."""
+        return self.materialize(iter_bits(bits))
+
+    def materialize(self, ordinals: Iterable[int]) -> List[ContentItem]:
+        """Materialize items from a sequence of ordinals, keeping its order."""
+        return [self._items[ordinal] for ordinal in ordinals]
+
+    def lookup(self, field: str, key: object) -> List[ContentItem]:
+        """Get all items indexed under field=key (e.g. genre="Drama")."""
+        return self.select(self.bits(field, key))
+
+    def keys(self, field: str) -> List[object]:
+        """List the distinct keys of a secondary index."""
+        return sorted(self.indexes[field])
+
+    def changed_since(self, other: "CatalogStore") -> Optional[FrozenSet[int]]:
+        """Ordinals added, replaced or removed since `other`, or None if unknown.
+
+        Known only for `other` itself and for the store other.apply_changes
+        derived without a rebuild; anything else may differ everywhere.
+        """
+        if other is self:
+            return frozenset()
+        if self._derived_from is None or self._derived_from[0]() is not other:
+            return None
+        return self._derived_from[1]
+
+    def apply_changes(
+        self,
+        upserts: Iterable[ContentItem],
+        removed: Iterable[str],
+        version: str,
+        fingerprints: Optional[Dict[str, bytes]] = None,
+    ) -> Tuple["CatalogStore", CatalogDiff]:
+        """Derive a new store with items added, replaced or removed.
+
+        Unchanged items keep their ordinals and objects. Index bitsets are
+        patched once per affected key, and removed ordinals are left as
+        tombstones until they make up a quarter of the slots, at which point
+        the store is rebuilt compactly.
+        """
+        items = self._items.copy()
+        by_id = self._by_id.copy()
+        clear: Dict[Tuple[str, object], List[int]] = {}
+        mark: Dict[Tuple[str, object], List[int]] = {}
+        updated = 0
+        replaced: List[int] = []
+        dropped: List[int] = []
+        new_ids: List[str] = []
+        gone_ids: List[str] = []
+        for item in upserts:
+            ordinal = by_id.get(item.id)
+            if ordinal is None:
+                ordinal = by_id[item.id] = len(items)
+                items.append(item)
+                new_ids.append(item.id)
+            else:
+                for field_key in index_keys(items[ordinal]):
+                    clear.setdefault(field_key, []).append(ordinal)
+                items[ordinal] = item
+                replaced.append(ordinal)
+                updated += 1
+            for field_key in index_keys(item):
+                mark.setdefault(field_key, []).append(ordinal)
+        for item_id in removed:
+            ordinal = by_id.pop(item_id, None)
+            if ordinal is None:
+                continue
+            for field_key in index_keys(items[ordinal]):
+                clear.setdefault(field_key, []).append(ordinal)
+            items[ordinal] = None
+            dropped.append(ordinal)
+            gone_ids.append(item_id)
+        diff = CatalogDiff(len(new_ids), updated, len(dropped))
+
+        new_fingerprints = self.fingerprints.copy()
+        new_fingerprints.update(fingerprints or {})
+        for item_id in gone_ids:
+            new_fingerprints.pop(item_id, None)
+        if len(items) - len(by_id) > len(items) // 4:
+            live = (item for item in items if item is not None)
+            return CatalogStore(live, version=version, fingerprints=new_fingerprints, compact=self.compact), diff
+
+        size = len(items)
+        indexes = {field: dict(keys) for field, keys in self.indexes.items()}
+        for (field, key) in clear.keys() | mark.keys():
+            bits = indexes[field].get(key, 0)
+            if (field, key) in clear:
+                bits &= ~bits_from_ordinals(clear[(field, key)], size)
+            if (field, key) in mark:
+                bits |= bits_from_ordinals(mark[(field, key)], size)
+            if bits:
+                indexes[field][key] = bits
+            else:
+                indexes[field].pop(key, None)
+        appended = ((1 << size) - 1) ^ ((1 << len(self._items)) - 1)
+        all_bits = (self.all_bits | appended) & ~bits_from_ordinals(dropped, size)
+        store = CatalogStore.from_parts(items, by_id, indexes, all_bits, version, new_fingerprints)
+        store._derived_from = weakref.ref(self), frozenset(replaced + dropped + [by_id[i] for i in new_ids])
+        if "sorted_ids" in self.__dict__:
+            sorted_ids = list(self.sorted_ids)
+            for item_id in new_ids:
+                insort(sorted_ids, item_id)
+            for item_id in gone_ids:
+                del sorted_ids[bisect_left(sorted_ids, item_id)]
+            store.sorted_ids = sorted_ids
+        if "search_index" in self.__dict__:
+            store.search_index = self.search_index.updated(
+                ((ordinal, self._fields(ordinal)) for ordinal in replaced + dropped),
+                ((ordinal, store._fields(ordinal)) for ordinal in replaced + [by_id[i] for i in new_ids]),
+            )
+        previous = self.__dict__.get("similar_index", self._similar_interim)
+        if previous is not None:
+            patched = previous.updated(replaced)
+            if new_ids or "similar_index" not in self.__dict__:
+                # Added items have no precomputed features, so they would never be anyone's
+                # neighbour: serve the patched index only until warm_indexes rebuilds it.
+                store._similar_interim = patched
+            else:
+                store.similar_index = patched
+        return store, diff
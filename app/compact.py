@@ -0,0 +1,232 @@
+"""Compact, column-oriented item storage for large Mac Flix catalogs.
+
+A ContentItem costs well over a kilobyte (a per-instance dict, HttpUrl
+objects, lists of strings). CompactItems keeps the same data as columns:
+interned strings for ids, titles and descriptions, integer codes for
+types, genres, languages, directors and cast, typed arrays for year,
+rating and duration, and URLs as the plain strings they normalized to when
+the record was validated at load. ContentItem objects are only built at the
+API boundary, from those trusted fields without validating them again, and
+a bounded LRU keeps the hot ones.
+"""
+
+import math
+import os
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional
+from pydantic import HttpUrl
+from pydantic_core import Url
+from app.fast_json import dumps
+from app.models import ContentItem
+
+ITEM_CACHE_SIZE = int(os.getenv("MACFLIX_ITEM_CACHE_SIZE", "10000"))
+TYPES = ("movie", "tv")
+URL_FIELDS = ("poster_url", "trailer_url", "video_url", "download_url")
+NO_DURATION = -1
+
+
+def trusted_url(value: Optional[str]) -> Optional[HttpUrl]:
+    """An HttpUrl for a string that passed HttpUrl validation at load; parsed, not validated again."""
+    if value is None:
+        return None
+    url = HttpUrl.__new__(HttpUrl)
+    url._url = Url(value)
+    return url
+
+
+def construct(fields: dict) -> ContentItem:
+    """Build a ContentItem from already validated column fields, skipping validation."""
+    for field in URL_FIELDS:
+        fields[field] = trusted_url(fields[field])
+    return ContentItem.model_construct(**fields)
+
+
+class ItemMemo:
+    """Bounded, thread-safe LRU of materialized items, keyed by ordinal.
+
+    Shared by copies of an item sequence, whose base items never change.
+    """
+
+    def __init__(self, size: int = ITEM_CACHE_SIZE):
+        self.size = size
+        self._items: "OrderedDict[int, ContentItem]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, ordinal: int) -> Optional[ContentItem]:
+        with self._lock:
+            item = self._items.get(ordinal)
+            if item is not None:
+                self._items.move_to_end(ordinal)
+            return item
+
+    def put(self, ordinal: int, item: ContentItem) -> ContentItem:
+        with self._lock:
+            # Keep the first object built, so repeated lookups return the same one.
+            item = self._items.setdefault(ordinal, item)
+            if len(self._items) > self.size:
+                self._items.popitem(last=False)
+        return item
+
+
+class Vocabulary:
+    """Interned strings addressed by integer code; code 0 stands for None."""
+
+    def __init__(self):
+        self.values: List[Optional[str]] = [None]
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        return code
+
+
+class Columns:
+    """Append-only columns holding the fields of validated items."""
+
+    def __init__(self):
+        self.words = Vocabulary()  # genres, languages, directors and cast names
+        self.ids: List[str] = []
+        self.titles: List[str] = []
+        self.descriptions: List[str] = []
+        self.types = bytearray()
+        self.years = array("i")
+        self.ratings = array("d")  # NaN when unrated
+        self.durations = array("i")
+        self.languages = array("I")
+        self.directors = array("I")
+        self.genre_offsets = array("I", [0])
+        self.genres = array("I")
+        self.cast_offsets = array("I", [0])
+        self.cast = array("I")
+        self.has_cast = bytearray()
+        self.urls: Dict[str, List[Optional[str]]] = {field: [] for field in URL_FIELDS}
+        self.video_files: List[Optional[str]] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, item: ContentItem) -> None:
+        code = self.words.code
+        self.ids.append(sys.intern(item.id))
+        self.titles.append(item.title)
+        self.descriptions.append(item.description)
+        self.types.append(TYPES.index(item.type))
+        self.years.append(item.year)
+        self.ratings.append(math.nan if item.rating is None else item.rating)
+        self.durations.append(NO_DURATION if item.duration is None else item.duration)
+        self.languages.append(code(item.language))
+        self.directors.append(code(item.director))
+        self.genres.extend(code(genre) for genre in item.genres)
+        self.genre_offsets.append(len(self.genres))
+        self.cast.extend(code(name) for name in item.cast or ())
+        self.cast_offsets.append(len(self.cast))
+        self.has_cast.append(item.cast is not None)
+        for field in URL_FIELDS:
+            url = getattr(item, field)
+            self.urls[field].append(None if url is None else str(url))
+        self.video_files.append(item.video_file)
+
+    def fields(self, ordinal: int) -> dict:
+        """The item at ordinal as a dict in ContentItem field order."""
+        words = self.words.values
+        rating = self.ratings[ordinal]
+        duration = self.durations[ordinal]
+        cast = None
+        if self.has_cast[ordinal]:
+            cast = [words[c] for c in self.cast[self.cast_offsets[ordinal]:self.cast_offsets[ordinal + 1]]]
+        return {
+            "id": self.ids[ordinal],
+            "title": self.titles[ordinal],
+            "type": TYPES[self.types[ordinal]],
+            "year": self.years[ordinal],
+            "genres": [words[c] for c in self.genres[self.genre_offsets[ordinal]:self.genre_offsets[ordinal + 1]]],
+            "description": self.descriptions[ordinal],
+            "rating": None if math.isnan(rating) else rating,
+            "poster_url": self.urls["poster_url"][ordinal],
+            "trailer_url": self.urls["trailer_url"][ordinal],
+            "cast": cast,
+            "director": words[self.directors[ordinal]],
+            "duration": None if duration == NO_DURATION else duration,
+            "language": words[self.languages[ordinal]],
+            "video_url": self.urls["video_url"][ordinal],
+            "download_url": self.urls["download_url"][ordinal],
+            "video_file": self.video_files[ordinal],
+        }
+
+
+class CompactItems:
+    """Copy-on-write item sequence backed by shared, append-only Columns.
+
+    Items appended before the first copy() go into the columns; after that
+    the columns are frozen and reloads record replaced, removed (None) and
+    appended items on the copy, as SnapshotItems does.
+    """
+
+    def __init__(self, columns: Optional[Columns] = None, memo: Optional[ItemMemo] = None):
+        self._columns = Columns() if columns is None else columns
+        self._base = len(self._columns)
+        self._memo = ItemMemo() if memo is None else memo
+        self._frozen = columns is not None
+        self._overrides: Dict[int, Optional[ContentItem]] = {}
+        self._extra: List[Optional[ContentItem]] = []
+
+    def __len__(self) -> int:
+        return self._base + len(self._extra)
+
+    def __getitem__(self, ordinal: int) -> Optional[ContentItem]:
+        if ordinal >= self._base:
+            return self._extra[ordinal - self._base]
+        if ordinal in self._overrides:
+            return self._overrides[ordinal]
+        item = self._memo.get(ordinal)
+        if item is None:
+            item = self._memo.put(ordinal, construct(self._columns.fields(ordinal)))
+        return item
+
+    def __setitem__(self, ordinal: int, item: Optional[ContentItem]) -> None:
+        if ordinal >= self._base:
+            self._extra[ordinal - self._base] = item
+        else:
+            self._overrides[ordinal] = item
+
+    def __iter__(self) -> Iterator[Optional[ContentItem]]:
+        for ordinal in range(len(self)):
+            yield self[ordinal]
+
+    def append(self, item: ContentItem) -> None:
+        if self._frozen:
+            self._extra.append(item)
+        else:
+            self._columns.add(item)
+            self._base += 1
+
+    def copy(self) -> "CompactItems":
+        self._frozen = True
+        items = CompactItems(self._columns, self._memo)
+        items._base = self._base
+        items._overrides = dict(self._overrides)
+        items._extra = list(self._extra)
+        return items
+
+    def fields(self, ordinal: int) -> Optional[dict]:
+        """An unmodified item's fields straight from the columns, or None if it was replaced."""
+        if ordinal >= self._base or ordinal in self._overrides:
+            return None
+        return self._columns.fields(ordinal)
+
+    def json(self, ordinal: int) -> Optional[bytes]:
+        """Encode an unmodified item straight from the columns, or None if it was replaced."""
+        if ordinal >= self._base or ordinal in self._overrides:
+            return None
+        return dumps(self._columns.fields(ordinal))
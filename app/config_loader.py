@@ -1,22 +1,136 @@
 """YAML config loader and validator for Mac Flix."""
 
+import fcntl
+import hashlib
+import json
+import os
 import yaml
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Tuple
 from app.models import ContentItem, CategoryConfig, SecretsConfig
+from app.catalog import CatalogDiff, CatalogStore
+from app.snapshot import SnapshotError, load_snapshot, read_snapshot_version, write_snapshot
 
-CONFIG_DIR = Path(__file__).parent / "config"
+try:
+    from yaml import CSafeLoader as SafeLoader  # libyaml-backed, much faster on big files
+except ImportError:
+    from yaml import SafeLoader
+
+CONFIG_DIR = Path(os.getenv("MACFLIX_CONFIG_DIR") or Path(__file__).parent / "config")
 
 def load_yaml(path: Path) -> dict:
     """Load a YAML file and return as dict."""
     with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=SafeLoader)
+
+def file_digest(path: Path) -> str:
+    """Hash a config file's bytes, used as the catalog version."""
+    with open(path, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+def load_content_records(path: Path) -> Tuple[str, List[dict]]:
+    """Load raw catalog records along with the digest of the file they came from."""
+    raw = path.read_bytes()
+    data = yaml.load(raw, Loader=SafeLoader) or {}
+    return hashlib.blake2b(raw, digest_size=16).hexdigest(), data.get("movies", [])
+
+def record_fingerprint(record: dict) -> bytes:
+    """Hash a raw catalog record, to detect which items changed between loads."""
+    encoded = json.dumps(record, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=12).digest()
 
 def load_content_config() -> List[ContentItem]:
     """Load and validate content catalog."""
-    path = CONFIG_DIR / "content.yaml"
-    data = load_yaml(path)
-    return [ContentItem(**item) for item in data.get("movies", [])]
+    _, records = load_content_records(CONFIG_DIR / "content.yaml")
+    return [ContentItem(**record) for record in records]
+
+def snapshot_is_fresh(snapshot_path: Path, content_path: Path) -> bool:
+    """Whether a snapshot exists and was compiled from the current content.yaml."""
+    try:
+        return read_snapshot_version(snapshot_path) == file_digest(content_path)
+    except (SnapshotError, OSError):
+        return False
+
+def build_shared_snapshot() -> Path:
+    """Compile content.yaml into the shared snapshot unless it is already fresh.
+
+    Workers starting together take an exclusive file lock, so the catalog is
+    parsed and validated once per node; the rest wait and then map the result.
+    """
+    content_path = CONFIG_DIR / "content.yaml"
+    snapshot_path = CONFIG_DIR / "content.snapshot"
+    with open(CONFIG_DIR / "content.snapshot.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not snapshot_is_fresh(snapshot_path, content_path):
+            write_snapshot(parse_catalog(content_path), snapshot_path)
+    return snapshot_path
+
+def parse_catalog(content_path: Path) -> CatalogStore:
+    """Parse and validate a catalog YAML file into a compact store."""
+    version, records = load_content_records(content_path)
+    fingerprints: Dict[str, bytes] = {}
+
+    def validated():
+        # Each record is validated once, then decomposed into compact columns.
+        for record in records:
+            item = ContentItem(**record)
+            fingerprints[item.id] = record_fingerprint(record)
+            yield item
+
+    return CatalogStore(validated(), version=version, fingerprints=fingerprints, compact=True)
+
+def load_catalog(use_snapshot: bool = True, shared: bool = False) -> CatalogStore:
+    """Load the content catalog and build its lookup indexes.
+
+    A compiled snapshot (see app.snapshot) is used instead of parsing YAML when
+    it was built from the current content.yaml, or when content.yaml is absent.
+    With shared=True the snapshot is built first if needed, so every worker
+    maps the same segment instead of holding its own copy of the catalog.
+    """
+    content_path = CONFIG_DIR / "content.yaml"
+    snapshot_path = CONFIG_DIR / "content.snapshot"
+    if shared:
+        return load_snapshot(build_shared_snapshot())
+    if use_snapshot and snapshot_path.exists():
+        try:
+            if not content_path.exists() or read_snapshot_version(snapshot_path) == file_digest(content_path):
+                return load_snapshot(snapshot_path)
+            print(f"Catalog snapshot {snapshot_path} is stale; parsing {content_path}")
+        except SnapshotError as e:
+            print(f"Ignoring catalog snapshot: {e}")
+    return parse_catalog(content_path)
+
+def reload_catalog(store: CatalogStore, shared: bool = False) -> Tuple[CatalogStore, CatalogDiff]:
+    """Re-read content.yaml and apply only the items that changed since `store`.
+
+    Unchanged records are not re-validated; the returned store is new unless
+    the file is byte-for-byte identical, in which case `store` is returned.
+    With shared=True the shared snapshot is rebuilt (once per node) and the
+    new segment replaces the store wholesale.
+    """
+    content_path = CONFIG_DIR / "content.yaml"
+    if shared:
+        if file_digest(content_path) == store.version:
+            return store, CatalogDiff(0, 0, 0)
+        new_store = load_snapshot(build_shared_snapshot())
+        return new_store, CatalogDiff(0, 0, 0, swapped=True)
+    version, records = load_content_records(content_path)
+    if version == store.version:
+        return store, CatalogDiff(0, 0, 0)
+    seen = set()
+    upserts: List[ContentItem] = []
+    fingerprints: Dict[str, bytes] = {}
+    for record in records:
+        fingerprint = record_fingerprint(record)
+        item_id = record.get("id")
+        if item_id in seen:
+            raise ValueError(f"Duplicate content id: {item_id}")
+        seen.add(item_id)
+        if store.fingerprints.get(item_id) != fingerprint:
+            upserts.append(ContentItem(**record))
+            fingerprints[item_id] = fingerprint
+    removed = [item_id for item_id in store.ids() if item_id not in seen]
+    return store.apply_changes(upserts, removed, version, fingerprints)
 
 def load_categories_config() -> CategoryConfig:
     """Load and validate categories and filters."""
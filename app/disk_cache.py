@@ -0,0 +1,253 @@
+"""Persistent SQLite cache of raw TMDB/OMDB payloads, shared by Mac Flix workers.
+
+Sits below the in-process TTLCache (app.cache): a memory miss checks here
+before calling upstream, so restarted or newly forked workers start warm.
+The database runs in WAL mode, so any number of worker processes can read
+while one writes. Entries are fresh for a per-source TTL and may then be
+served stale for a further window while a background refresh replaces them
+(stale-while-revalidate). The least recently used entries are evicted once
+the payloads exceed a size budget.
+"""
+
+import asyncio
+import anyio
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Hashable, NamedTuple, Optional, Set
+
+METADATA_CACHE_PATH = os.getenv("MACFLIX_METADATA_CACHE", "")  # empty disables the disk cache
+METADATA_CACHE_MAX_MB = float(os.getenv("MACFLIX_METADATA_CACHE_MAX_MB", "256"))
+SOURCE_TTLS = {  # seconds an entry is fresh, per upstream source
+    "tmdb": float(os.getenv("MACFLIX_TMDB_CACHE_TTL", str(24 * 3600))),
+    "omdb": float(os.getenv("MACFLIX_OMDB_CACHE_TTL", str(7 * 24 * 3600))),
+}
+STALE_TTL = float(os.getenv("MACFLIX_METADATA_STALE_TTL", str(7 * 24 * 3600)))  # served stale this much longer
+TOUCH_INTERVAL = 60.0  # seconds between access-time updates for one entry
+EVICT_EVERY = 100  # writes between size checks
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    fresh_until REAL NOT NULL,
+    stale_until REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+"""
+
+
+class DiskEntry(NamedTuple):
+    """A cached payload and whether it is still within its TTL."""
+    value: Any
+    fresh: bool
+
+
+class DiskStats(NamedTuple):
+    """Counters for this process, plus the shared entry count and size."""
+    hits: int
+    stale_hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+
+
+class DiskCache:
+    """SQLite-backed key/value store with per-source TTLs and LRU eviction by size."""
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: int = int(METADATA_CACHE_MAX_MB * 1024 * 1024),
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._refreshing: Set[str] = set()
+        self._writes = 0
+        self._hits = self._stale_hits = self._misses = self._evictions = 0
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections are per thread; each worker process opens its own.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def encode_key(key: Hashable) -> str:
+        return json.dumps(key, separators=(",", ":"))
+
+    def get(self, key: Hashable) -> Optional[DiskEntry]:
+        """Get a cached payload, or None if absent or too stale to serve."""
+        now = self._clock()
+        conn = self._conn()
+        db_key = self.encode_key(key)
+        row = conn.execute(
+            "SELECT payload, fresh_until, stale_until, accessed_at FROM entries WHERE key = ?", (db_key,)
+        ).fetchone()
+        if row is None or row[2] <= now:
+            self._misses += 1
+            return None
+        payload, fresh_until, _, accessed_at = row
+        if now - accessed_at > TOUCH_INTERVAL:
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, db_key))
+        fresh = now < fresh_until
+        if fresh:
+            self._hits += 1
+        else:
+            self._stale_hits += 1
+        return DiskEntry(json.loads(payload), fresh)
+
+    def set(self, key: Hashable, source: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a payload, fresh for ttl (default: the source's TTL) and then stale for STALE_TTL."""
+        now = self._clock()
+        fresh_until = now + (SOURCE_TTLS.get(source, 3600.0) if ttl is None else ttl)
+        payload = json.dumps(value, separators=(",", ":"))
+        self._conn().execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.encode_key(key), source, payload, len(payload), fresh_until, fresh_until + STALE_TTL, now),
+        )
+        with self._lock:
+            self._writes += 1
+            check = self._writes % EVICT_EVERY == 0
+        if check:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            removed = conn.execute("DELETE FROM entries WHERE stale_until <= ?", (self._clock(),)).rowcount
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total > self.max_bytes:
+                # Free down to 90% of the budget, so eviction does not run on every write.
+                excess, victims = total - int(self.max_bytes * 0.9), []
+                for db_key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at"):
+                    if excess <= 0:
+                        break
+                    victims.append((db_key,))
+                    excess -= size
+                conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+                removed += len(victims)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._evictions += removed
+        return removed
+
+    def stats(self) -> DiskStats:
+        entries, size = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return DiskStats(self._hits, self._stale_hits, self._misses, self._evictions, entries, size)
+
+    def claim_refresh(self, key: Hashable) -> bool:
+        """Mark key as being revalidated; False if this process already is."""
+        db_key = self.encode_key(key)
+        with self._lock:
+            if db_key in self._refreshing:
+                return False
+            self._refreshing.add(db_key)
+            return True
+
+    def release_refresh(self, key: Hashable) -> None:
+        with self._lock:
+            self._refreshing.discard(self.encode_key(key))
+
+
+def open_metadata_cache() -> Optional[DiskCache]:
+    """Open the configured disk cache, or None if MACFLIX_METADATA_CACHE is unset."""
+    if not METADATA_CACHE_PATH:
+        return None
+    try:
+        return DiskCache(Path(METADATA_CACHE_PATH))
+    except sqlite3.Error as e:
+        print(f"Metadata cache disabled: {e}")
+        return None
+
+
+def load_through(
+    disk: Optional[DiskCache],
+    key: Hashable,
+    source: str,
+    fetch: Callable[[], Any],
+    on_refresh: Callable[[Any], None],
+):
+    """Read key from disk, or fetch and store it; stale hits refresh on a thread."""
+    if disk is None:
+        return fetch()
+    entry = disk.get(key)
+    if entry is not None:
+        if not entry.fresh and disk.claim_refresh(key):
+            threading.Thread(target=_refresh, args=(disk, key, source, fetch, on_refresh), daemon=True).start()
+        return entry.value
+    value = fetch()
+    disk.set(key, source, value)
+    return value
+
+
+async def aload_through(
+    disk: Optional[DiskCache],
+    key: Hashable,
+    source: str,
+    fetch: Callable[[], Awaitable[Any]],
+    on_refresh: Callable[[Any], None],
+):
+    """Async load_through; stale hits refresh on a background task.
+
+    SQLite calls block (on a busy database, or an eviction scan every
+    EVICT_EVERY writes), so they run on worker threads, not the event loop.
+    """
+    if disk is None:
+        return await fetch()
+    entry = await anyio.to_thread.run_sync(disk.get, key)
+    if entry is not None:
+        if not entry.fresh and disk.claim_refresh(key):
+            task = asyncio.create_task(_arefresh(disk, key, source, fetch, on_refresh))
+            _background.add(task)
+            task.add_done_callback(_background.discard)
+        return entry.value
+    value = await fetch()
+    await anyio.to_thread.run_sync(disk.set, key, source, value)
+    return value
+
+
+_background: Set[asyncio.Task] = set()  # keeps refresh tasks referenced until done
+
+
+def _refresh(disk, key, source, fetch, on_refresh):
+    try:
+        value = fetch()
+        disk.set(key, source, value)
+        on_refresh(value)
+    except Exception as e:
+        print(f"Metadata refresh failed for {key}: {e}")
+    finally:
+        disk.release_refresh(key)
+
+
+async def _arefresh(disk, key, source, fetch, on_refresh):
+    try:
+        value = await fetch()
+        await anyio.to_thread.run_sync(disk.set, key, source, value)
+        on_refresh(value)
+    except Exception as e:
+        print(f"Metadata refresh failed for {key}: {e}")
+    finally:
+        disk.release_refresh(key)
@@ -0,0 +1,260 @@
+"""Bulk catalog enrichment from OMDB (and optionally TMDB) details.
+
+Looks up every catalog item by its IMDb id and fills in posters, ratings,
+runtime, director, cast and language from OMDB, plus trailers (and posters
+OMDB lacks) from TMDB. Requests fan out over a bounded pool of async workers
+sharing a token-bucket rate limit. Each finished item is appended to a
+checkpoint file, so an interrupted run resumes where it stopped, and items
+fetched within --max-age days are not fetched again. The merged catalog is
+written as YAML and, optionally, compiled into a snapshot:
+
+    python -m app.enrich [--concurrency 16] [--rate 10] [--tmdb] [--snapshot PATH]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+import yaml
+from app.config_loader import CONFIG_DIR, load_content_records, parse_catalog
+from app.disk_cache import open_metadata_cache
+from app.http_client import make_async_client
+from app.models import ContentItem
+from app.omdb_client import AsyncOMDBClient
+from app.ratelimit import TokenBucket
+from app.resilience import Upstream
+from app.snapshot import write_snapshot
+from app.tmdb_client import AsyncTMDBClient
+
+try:
+    from yaml import CSafeDumper as Dumper
+except ImportError:
+    from yaml import SafeDumper as Dumper
+
+CHECKPOINT_PATH = CONFIG_DIR / "enrichment.checkpoint.jsonl"
+OUTPUT_PATH = CONFIG_DIR / "content.enriched.yaml"
+
+
+class EnrichStats(NamedTuple):
+    """Outcome counts of one enrichment run."""
+    fetched: int
+    skipped: int  # fresh in the checkpoint
+    failed: int
+
+
+def _known(value) -> Optional[str]:
+    """OMDB marks missing values as "N/A"."""
+    if value is None or value == "N/A" or value == "":
+        return None
+    return value
+
+
+def omdb_fields(details: dict) -> dict:
+    """Catalog fields from an OMDB details payload."""
+    fields = {}
+    if _known(details.get("Poster")):
+        fields["poster_url"] = details["Poster"]
+    rating = _known(details.get("imdbRating"))
+    if rating:
+        fields["rating"] = float(rating)
+    runtime = _known(details.get("Runtime"))
+    if runtime and runtime.split()[0].isdigit():
+        fields["duration"] = int(runtime.split()[0])
+    if _known(details.get("Director")):
+        fields["director"] = details["Director"]
+    if _known(details.get("Actors")):
+        fields["cast"] = [name.strip() for name in details["Actors"].split(",")]
+    if _known(details.get("Language")):
+        fields["language"] = details["Language"].split(",")[0].strip()
+    return fields
+
+
+async def tmdb_fields(tmdb: AsyncTMDBClient, imdb_id: str) -> dict:
+    """Catalog fields from TMDB, found by IMDb id (trailer and poster)."""
+    found = await tmdb.find_by_imdb_id(imdb_id)
+    if found is None:
+        return {}
+    details = await tmdb.get_details(found["id"], found["media_type"])
+    fields = {}
+    trailer = tmdb.get_trailer_url(details)
+    if trailer:
+        fields["trailer_url"] = trailer
+    poster = tmdb.get_poster_url(details.get("poster_path"))
+    if poster:
+        fields["poster_url"] = poster
+    if details.get("vote_average"):
+        fields["rating"] = round(float(details["vote_average"]), 1)
+    return fields
+
+
+async def enrich_one(item_id: str, omdb: AsyncOMDBClient, tmdb: Optional[AsyncTMDBClient]) -> dict:
+    """Fetch the enrichment fields for one item; OMDB values win over TMDB's."""
+    fields = {}
+    if tmdb is not None:
+        fields.update(await tmdb_fields(tmdb, item_id))
+    fields.update(omdb_fields(await omdb.get_details(item_id)))
+    return fields
+
+
+class Checkpoint:
+    """Append-only JSONL log of enriched items: {"id", "fetched_at", "fields"} per line."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # a line cut short by an interrupted run
+                    self.entries[entry["id"]] = entry
+        self._file = None
+
+    def is_fresh(self, item_id: str, max_age: float, now: float) -> bool:
+        entry = self.entries.get(item_id)
+        return entry is not None and now - entry["fetched_at"] < max_age
+
+    def record(self, item_id: str, fields: dict, now: float) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        entry = {"id": item_id, "fetched_at": now, "fields": fields}
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        self.entries[item_id] = entry
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+async def run_enrichment(
+    item_ids: Iterable[str],
+    omdb: AsyncOMDBClient,
+    tmdb: Optional[AsyncTMDBClient],
+    checkpoint: Checkpoint,
+    concurrency: int = 16,
+    max_age: float = 30 * 24 * 3600,
+    clock: Callable[[], float] = time.time,
+    progress_every: int = 1000,
+) -> EnrichStats:
+    """Enrich every id not fresh in the checkpoint, with `concurrency` workers."""
+    queue: "asyncio.Queue[str]" = asyncio.Queue()
+    skipped = 0
+    for item_id in item_ids:
+        if checkpoint.is_fresh(item_id, max_age, clock()):
+            skipped += 1
+        else:
+            queue.put_nowait(item_id)
+    total = queue.qsize()
+    done = {"fetched": 0, "failed": 0}
+
+    async def worker():
+        while True:
+            try:
+                item_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                fields = await enrich_one(item_id, omdb, tmdb)
+                checkpoint.record(item_id, fields, clock())
+                done["fetched"] += 1
+            except Exception as e:
+                print(f"Enrichment failed for {item_id}: {e}")
+                done["failed"] += 1
+            finished = done["fetched"] + done["failed"]
+            if progress_every and finished % progress_every == 0:
+                print(f"Enriched {finished}/{total}")
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return EnrichStats(done["fetched"], skipped, done["failed"])
+
+
+def merge_record(record: dict, fields: dict, overwrite: bool = False) -> dict:
+    """Apply enrichment fields to a raw record; by default only fills missing values."""
+    merged = dict(record)
+    for name, value in fields.items():
+        if overwrite or merged.get(name) in (None, "", []):
+            merged[name] = value
+    return merged
+
+
+def merge_catalog(records: List[dict], checkpoint: Checkpoint, overwrite: bool = False) -> List[dict]:
+    """Merge checkpointed fields into the catalog, keeping records that would fail validation."""
+    merged = []
+    for record in records:
+        entry = checkpoint.entries.get(record.get("id"))
+        if entry is None:
+            merged.append(record)
+            continue
+        candidate = merge_record(record, entry["fields"], overwrite)
+        try:
+            ContentItem(**candidate)
+        except Exception as e:
+            print(f"Keeping {record.get('id')} unenriched, merged record is invalid: {e}")
+            candidate = record
+        merged.append(candidate)
+    return merged
+
+
+async def _enrich(args) -> EnrichStats:
+    _, records = load_content_records(Path(args.input))
+    ids = [record["id"] for record in records]
+    if args.limit:
+        ids = ids[:args.limit]  # the rest are still merged and written, just not fetched
+    checkpoint = Checkpoint(Path(args.checkpoint))
+    bucket = TokenBucket(args.rate, args.burst)
+    disk = open_metadata_cache()
+    try:
+        async with make_async_client() as http:
+            # Both upstreams draw on one request budget; retries and breakers stay per upstream.
+            omdb = AsyncOMDBClient(http, disk=disk, upstream=Upstream.from_env(
+                "omdb", limiter=bucket, max_concurrency=args.concurrency, queue_timeout=None))
+            tmdb = AsyncTMDBClient(http, disk=disk, upstream=Upstream.from_env(
+                "tmdb", limiter=bucket, max_concurrency=args.concurrency, queue_timeout=None)) if args.tmdb else None
+            stats = await run_enrichment(
+                ids, omdb, tmdb, checkpoint,
+                concurrency=args.concurrency, max_age=args.max_age * 24 * 3600,
+            )
+    finally:
+        checkpoint.close()
+    merged = merge_catalog(records, checkpoint, args.overwrite)
+    output = Path(args.output)
+    with open(output, "w", encoding="utf-8") as f:
+        yaml.dump({"movies": merged}, f, Dumper=Dumper, allow_unicode=True, sort_keys=False)
+    print(f"Wrote {len(merged)} items to {output}")
+    if args.snapshot:
+        write_snapshot(parse_catalog(output), Path(args.snapshot))
+        print(f"Wrote snapshot to {args.snapshot}")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", default=str(CONFIG_DIR / "content.yaml"))
+    parser.add_argument("--output", default=str(OUTPUT_PATH), help="enriched catalog YAML")
+    parser.add_argument("--snapshot", default="", help="also compile the enriched catalog to this snapshot")
+    parser.add_argument("--checkpoint", default=str(CHECKPOINT_PATH))
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent workers")
+    parser.add_argument("--rate", type=float, default=10.0, help="upstream requests per second")
+    parser.add_argument("--burst", type=float, default=None, help="token bucket size (default: rate)")
+    parser.add_argument("--max-age", type=float, default=30.0, help="days before an item is fetched again")
+    parser.add_argument("--tmdb", action="store_true", help="also fetch trailers and posters from TMDB")
+    parser.add_argument("--overwrite", action="store_true", help="replace hand-maintained values")
+    parser.add_argument("--limit", type=int, default=0, help="only enrich the first N items")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    stats = asyncio.run(_enrich(args))
+    print(
+        f"Fetched {stats.fetched}, skipped {stats.skipped} fresh, {stats.failed} failed"
+        f" in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
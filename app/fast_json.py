@@ -0,0 +1,50 @@
+"""Fast JSON responses for Mac Flix catalog endpoints (opt in with MACFLIX_FAST_JSON=1).
+
+Catalog items are validated once, when the catalog loads. By default every
+response still goes through FastAPI's response_model handling, which
+dumps, re-validates and re-encodes each item with the stdlib encoder. In
+fast mode the list endpoints instead join each item's stored JSON (straight
+from the compact columns or the snapshot, see CatalogStore.json_array) into
+a prebuilt envelope and return the bytes as they are. The remaining small
+values are encoded with orjson when it is installed, or the stdlib json
+module otherwise. The endpoints keep their response_model, so the OpenAPI
+schema is unchanged.
+"""
+
+import json
+import os
+from typing import Any, Dict, Optional
+from starlette.responses import Response
+
+FAST_JSON = os.getenv("MACFLIX_FAST_JSON", "") == "1"
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder gives the same output, slower
+    orjson = None
+
+
+def orjson_available() -> bool:
+    return orjson is not None
+
+
+def dumps(value: Any) -> bytes:
+    """Compact UTF-8 JSON, with orjson in fast mode when installed."""
+    if FAST_JSON and orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def query_result(total: int, offset: int, limit: int, items: bytes,
+                 facets: Optional[Dict[str, Dict[str, int]]] = None) -> bytes:
+    """A ContentQueryResult body around an already encoded items array, keys in model order."""
+    return (
+        b'{"total":%d,"offset":%d,"limit":%d,"items":' % (total, offset, limit)
+        + items
+        + b',"facets":' + dumps(facets) + b"}"
+    )
+
+
+class RawJSONResponse(Response):
+    """A response whose body is already encoded JSON."""
+    media_type = "application/json"
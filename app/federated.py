@@ -0,0 +1,187 @@
+"""Federated search for Mac Flix: the local catalog, TMDB and OMDB at once.
+
+All three sources are queried concurrently and the answer waits at most
+MACFLIX_FEDERATED_TIMEOUT seconds in total: sources still running by then
+are left out (reported as "timeout") but keep going in the background,
+so their results land in the upstream caches for the next search.
+
+Results are merged by identity: the same IMDb id, TMDB id, or title and
+year. TMDB search results carry no IMDb id, so the title and year is what
+joins them to catalog and OMDB entries. Each source's ranking adds a
+weighted reciprocal-rank score (reciprocal rank fusion), so titles several
+sources agree on rise, and catalog items, which can be played, weigh most.
+"""
+
+import asyncio
+import os
+import re
+from typing import Awaitable, Dict, Iterable, List, Optional, Tuple
+import anyio
+from app.catalog import CatalogStore
+from app.models import FederatedHit, FederatedSearchResult
+from app.resilience import UpstreamUnavailable
+from app.tmdb_client import TMDB_IMAGE_BASE
+
+FEDERATED_TIMEOUT = float(os.getenv("MACFLIX_FEDERATED_TIMEOUT", "2.0"))  # seconds, for all sources together
+RRF_K = 60  # damps the weight of top ranks, as in the original reciprocal rank fusion paper
+SOURCE_WEIGHTS = {"local": 2.0, "omdb": 1.0, "tmdb": 1.0}  # also the merge order: catalog entries absorb the rest
+IMDB_ID = re.compile(r"tt\d+")
+
+_background = set()  # timed-out source calls, kept referenced until they finish
+
+
+def _year(value) -> Optional[int]:
+    digits = str(value or "")[:4]
+    return int(digits) if digits.isdigit() else None
+
+
+def local_hits(store: CatalogStore, query: str, limit: int) -> List[FederatedHit]:
+    """Best catalog matches for query, from the full-text index."""
+    ranked = store.search_index.search(query, limit).ranked
+    return [
+        FederatedHit(
+            id=item.id,
+            title=item.title,
+            year=item.year,
+            type=item.type,
+            imdb_id=item.id if IMDB_ID.fullmatch(item.id) else None,
+            poster_url=str(item.poster_url),
+            rating=item.rating,
+            in_catalog=True,
+        )
+        for item in store.materialize(ordinal for ordinal, _ in ranked)
+    ]
+
+
+def tmdb_hits(results: Iterable[dict], media_type: str) -> List[FederatedHit]:
+    """Hits from a TMDB /search/{media_type} result list."""
+    hits = []
+    for result in results:
+        if result.get("id") is None or not (result.get("title") or result.get("name")):
+            continue
+        poster_path = result.get("poster_path")
+        hits.append(FederatedHit(
+            id=f"tmdb:{media_type}:{result['id']}",
+            title=result.get("title") or result.get("name"),
+            year=_year(result.get("release_date") or result.get("first_air_date")),
+            type=media_type,
+            tmdb_id=result["id"],
+            poster_url=f"{TMDB_IMAGE_BASE}{poster_path}" if poster_path else None,
+            rating=result.get("vote_average") or None,
+        ))
+    return hits
+
+
+def omdb_hits(results: Iterable[dict]) -> List[FederatedHit]:
+    """Hits from an OMDB ?s= result list."""
+    hits = []
+    for result in results:
+        imdb_id, title = result.get("imdbID"), result.get("Title")
+        if not imdb_id or not title:
+            continue
+        kind = result.get("Type")
+        poster = result.get("Poster")
+        hits.append(FederatedHit(
+            id=imdb_id,
+            title=title,
+            year=_year(result.get("Year")),
+            type="tv" if kind == "series" else kind,
+            imdb_id=imdb_id,
+            poster_url=poster if poster and poster != "N/A" else None,
+        ))
+    return hits
+
+
+def identity_keys(hit: FederatedHit) -> List[Tuple]:
+    keys = []
+    if hit.imdb_id:
+        keys.append(("imdb", hit.imdb_id))
+    if hit.tmdb_id is not None:
+        keys.append(("tmdb", hit.type, hit.tmdb_id))
+    if hit.year is not None:
+        keys.append(("title", " ".join(hit.title.split()).casefold(), hit.year))
+    return keys
+
+
+def merge(ranked: Dict[str, List[FederatedHit]], limit: int) -> List[FederatedHit]:
+    """Merge each source's ranked hits into one list, best first."""
+    merged: List[FederatedHit] = []
+    by_key: Dict[Tuple, FederatedHit] = {}
+    for source, weight in SOURCE_WEIGHTS.items():
+        for rank, hit in enumerate(ranked.get(source, ())):
+            target = next((by_key[key] for key in identity_keys(hit) if key in by_key), None)
+            if target is None:
+                target = hit
+                merged.append(target)
+            elif source in target.sources:
+                continue  # a source listing the same title twice counts once
+            else:
+                for field in ("year", "type", "imdb_id", "tmdb_id", "poster_url", "rating"):
+                    if getattr(target, field) is None:
+                        setattr(target, field, getattr(hit, field))
+            target.sources.append(source)
+            target.score += weight / (RRF_K + rank + 1)
+            for key in identity_keys(target):
+                by_key.setdefault(key, target)
+    merged.sort(key=lambda hit: hit.score, reverse=True)
+    for hit in merged:
+        hit.score = round(hit.score, 6)
+    return merged[:limit]
+
+
+async def within(calls: Dict[str, Awaitable], timeout: float) -> Tuple[Dict[str, object], Dict[str, str]]:
+    """Run calls concurrently for at most timeout seconds; their results and a status per call."""
+    tasks = {name: asyncio.ensure_future(call) for name, call in calls.items()}
+    if tasks:
+        await asyncio.wait(tasks.values(), timeout=timeout)
+    results, status = {}, {}
+    for name, task in tasks.items():
+        if not task.done():
+            status[name] = "timeout"
+            _background.add(task)
+            task.add_done_callback(_finished_late)
+        elif task.exception() is not None:
+            error = task.exception()
+            status[name] = "unavailable" if isinstance(error, UpstreamUnavailable) else "error"
+            print(f"Federated search: {name} failed: {error!r}")
+        else:
+            results[name] = task.result()
+            status[name] = "ok"
+    return results, status
+
+
+def _finished_late(task: asyncio.Task) -> None:
+    _background.discard(task)
+    if not task.cancelled():
+        task.exception()  # retrieved, so a late failure is not reported as never awaited
+
+
+async def federated_search(store: CatalogStore, tmdb, omdb, query: str, media_type: str = "movie",
+                           limit: int = 20, timeout: float = FEDERATED_TIMEOUT) -> FederatedSearchResult:
+    """Search the catalog and both upstreams concurrently, merging whatever answers within timeout.
+
+    An upstream client without an API key is skipped and reported as "disabled".
+    """
+    calls, status = {}, {}
+    for name, client, call in (
+        ("tmdb", tmdb, lambda: tmdb.search(query, media_type)),
+        ("omdb", omdb, lambda: omdb.search(query, media_type)),
+    ):
+        if client is None or not client.api_key:
+            status[name] = "disabled"
+        else:
+            calls[name] = call()
+    calls["local"] = anyio.to_thread.run_sync(local_hits, store, query, limit)
+    results, answered = await within(calls, timeout)
+    status.update(answered)
+    ranked = {"local": results.get("local", [])}
+    if "tmdb" in results:
+        ranked["tmdb"] = tmdb_hits(results["tmdb"], media_type)
+    if "omdb" in results:
+        ranked["omdb"] = omdb_hits(results["omdb"])
+    return FederatedSearchResult(
+        query=query,
+        results=merge(ranked, limit),
+        sources={name: status[name] for name in ("local", "tmdb", "omdb")},
+        partial=any(state in ("timeout", "unavailable", "error") for state in status.values()),
+    )
@@ -0,0 +1,121 @@
+"""Server-side filter engine for Mac Flix categories and content queries.
+
+Filters resolve to bitsets from the CatalogStore indexes and are combined
+with bitwise AND/OR, so no request ever loops over the catalog items.
+"""
+
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from app.catalog import CatalogStore, iter_bits
+from app.models import ContentItem, Filter
+
+SORT_ORDERS = ("catalog", "rating", "year")
+FACET_FIELDS = ("type", "genre", "language")
+
+
+def year_bounds(value: Union[str, int, float]) -> Tuple[int, int]:
+    """Resolve a year filter value to an inclusive (start, end) range.
+
+    Numbers name the first year of a decade (2020 -> 2020-2029, as used in
+    categories.yaml); strings may give an explicit range such as "1990-1994".
+    """
+    if isinstance(value, str) and "-" in value:
+        start, end = value.split("-", 1)
+        return int(start), int(end)
+    start = int(value)
+    return start, start + 9
+
+
+def filter_bits(store: CatalogStore, flt: Filter) -> int:
+    """Resolve a single category filter to a bitset of matching items."""
+    if flt.type == "genre":
+        return store.bits("genre", str(flt.value))
+    if flt.type == "year":
+        return store.ranges["year"].between(*year_bounds(flt.value))
+    if flt.type == "rating":
+        return store.ranges["rating"].above(float(flt.value))
+    raise ValueError(f"Unsupported filter type: {flt.type}")
+
+
+def evaluate_filters(store: CatalogStore, filters: Optional[Iterable[Filter]]) -> int:
+    """Combine filters: OR within the same filter type, AND across types."""
+    by_type: Dict[str, int] = {}
+    for flt in filters or []:
+        by_type[flt.type] = by_type.get(flt.type, 0) | filter_bits(store, flt)
+    bits = store.all_bits
+    for matched in by_type.values():
+        bits &= matched
+    return bits
+
+
+def query_bits(
+    store: CatalogStore,
+    genres: Optional[List[str]] = None,
+    match_all_genres: bool = False,
+    type: Optional[str] = None,
+    language: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    min_rating: Optional[float] = None,
+) -> int:
+    """Resolve ad-hoc query parameters to a bitset of matching items."""
+    bits = store.all_bits
+    if genres:
+        if match_all_genres:
+            for genre in genres:
+                bits &= store.bits("genre", genre)
+        else:
+            any_genre = 0
+            for genre in genres:
+                any_genre |= store.bits("genre", genre)
+            bits &= any_genre
+    if type:
+        bits &= store.bits("type", type)
+    if language:
+        bits &= store.bits("language", language)
+    if year_from is not None or year_to is not None:
+        bits &= store.ranges["year"].between(year_from, year_to)
+    if min_rating is not None:
+        bits &= store.ranges["rating"].between(min_rating, None)
+    return bits
+
+
+def ordered(store: CatalogStore, bits: int, sort: str = "catalog") -> Iterator[int]:
+    """Iterate the ordinals of a bitset in the requested sort order."""
+    if sort == "catalog":
+        return iter_bits(bits)
+    if sort in store.ranges:
+        index = store.ranges[sort]
+        # Items without a key (unrated titles) are in no posting; they follow, in catalog order.
+        return chain(index.iter_desc(bits), iter_bits(bits & ~index.between()))
+    raise ValueError(f"Unsupported sort order: {sort}")
+
+
+def page(store: CatalogStore, bits: int, offset: int = 0, limit: int = 50, sort: str = "catalog") -> List[ContentItem]:
+    """Materialize one page of matching items."""
+    return store.materialize(page_ordinals(store, bits, offset, limit, sort))
+
+
+def page_ordinals(store: CatalogStore, bits: int, offset: int = 0, limit: int = 50, sort: str = "catalog") -> List[int]:
+    """Ordinals of one page of matching items."""
+    return list(islice(ordered(store, bits, sort), offset, offset + limit))
+
+
+def facet_counts(store: CatalogStore, bits: int) -> Dict[str, Dict[str, int]]:
+    """Count matches per type, genre, language and decade via popcounts."""
+    facets: Dict[str, Dict[str, int]] = {}
+    for field in FACET_FIELDS:
+        counts = {}
+        for key, key_bits in store.indexes[field].items():
+            count = (bits & key_bits).bit_count()
+            if count:
+                counts[str(key)] = count
+        facets[field] = counts
+    decades: Dict[str, int] = {}
+    for year, year_bits in store.indexes["year"].items():
+        count = (bits & year_bits).bit_count()
+        if count:
+            decade = f"{year - year % 10}s"
+            decades[decade] = decades.get(decade, 0) + count
+    facets["decade"] = decades
+    return facets
@@ -1,158 +1,297 @@
+"""Streamlit frontend for Mac Flix, reading the catalog from the FastAPI backend.
+
+Run with `streamlit run app/frontend.py` while the API is up (MACFLIX_API_URL,
+default http://localhost:8000). Every Streamlit interaction reruns this
+script, so the work per rerun is kept small:
+
+- API calls share one pooled requests.Session (st.cache_resource), and
+  responses are cached with st.cache_data for MACFLIX_FRONTEND_CACHE_TTL
+  seconds. After that they are revalidated with If-None-Match, so an
+  unchanged response costs the API a 304 rather than a fresh body.
+- The home page shows one row per category filter. All rows come from one
+  /home request, which carries the first cards of every row; paging past
+  them fetches only the page shown. It renders a few rows at a time, and
+  rows are fragments, so paging one row reruns only that row.
+- Posters come from the API's /images proxy at the size the card needs.
+  The links are versioned, so browsers cache them as immutable instead of
+  reloading every poster on each rerun.
+- On the details page, the sections that need more requests load when
+  they are opened.
+"""
+
+import hashlib
+import html
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from urllib.parse import quote, urlencode
+import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_URL = os.getenv("MACFLIX_API_URL", "http://localhost:8000").rstrip("/")
+PUBLIC_API_URL = (os.getenv("MACFLIX_PUBLIC_API_URL") or API_URL).rstrip("/")  # as browsers reach it, for images and video
+API_TIMEOUT = float(os.getenv("MACFLIX_FRONTEND_TIMEOUT", "5"))  # seconds
+CACHE_TTL = float(os.getenv("MACFLIX_FRONTEND_CACHE_TTL", "60"))  # seconds before a response is revalidated
+VALIDATOR_LIMIT = 2048  # responses kept for If-None-Match revalidation
+ROW_SIZE = 5  # cards per row page
+ROWS_PER_PAGE = 4  # category rows rendered before "More rows"
+SIMILAR_LIMIT = 8
+
+CARD_CSS = """
+<style>
+.movie-card {
+    width: 200px;
+    margin-left: auto;
+    margin-right: auto;
+}
+.movie-poster {
+    width: 100%;
+    height: 300px;
+    object-fit: cover;
+    display: block;
+}
+.center-text {
+    text-align: center;
+}
+.movie-blurb {
+    text-align: center;
+    overflow: hidden;
+    text-overflow: ellipsis;
+    display: -webkit-box;
+    -webkit-line-clamp: 3;
+    -webkit-box-orient: vertical;
+    font-size: 0.85em;
+    margin-top: 5px;
+    min-height: 60px;
+}
+.movie-links {
+    text-align: center;
+    margin-top: 8px;
+}
+.movie-links a {
+    margin: 0 5px;
+    font-size: 1.5em;
+    text-decoration: none;
+}
+</style>
+"""
+
+
+class APIError(Exception):
+    """The backend could not be reached or answered with an error."""
+
+
+@st.cache_resource
+def api_session() -> requests.Session:
+    """One keep-alive connection pool for every session of this Streamlit server."""
+    session = requests.Session()
+    retry = Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class Validators:
+    """ETag and decoded body of recent responses, keyed by URL, for conditional requests.
+
+    One instance serves every session's script thread, so access is locked.
+    """
+
+    def __init__(self, limit: int = VALIDATOR_LIMIT):
+        self.limit = limit
+        self._entries: "OrderedDict[str, Tuple[str, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[str, object]]:
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key: str, etag: str, body: object) -> None:
+        with self._lock:
+            self._entries[key] = (etag, body)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.limit:
+                self._entries.popitem(last=False)
+
+
+@st.cache_resource
+def validators() -> Validators:
+    return Validators()
+
+
+def api_get(path: str, **params) -> object:
+    """GET a JSON document from the API, revalidating a known copy with its ETag."""
+    url = f"{API_URL}{path}"
+    key = f"{url}?{urlencode(sorted(params.items()))}"
+    known = validators().get(key)
+    headers = {"If-None-Match": known[0]} if known else {}
+    try:
+        response = api_session().get(url, params=params, headers=headers, timeout=API_TIMEOUT)
+    except requests.RequestException as e:
+        raise APIError(f"Could not reach the Mac Flix API: {e}") from e
+    if response.status_code == 304 and known:
+        return known[1]
+    if response.status_code != 200:
+        raise APIError(f"{path}: HTTP {response.status_code}")
+    body = response.json()
+    etag = response.headers.get("ETag")
+    if etag:
+        validators().put(key, etag, body)
+    return body
+
+
+# st.cache_data does not cache raised exceptions, so a failed call is retried on the next rerun.
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_home() -> dict:
+    return api_get("/home")
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_row(category: str, filter_name: Optional[str], offset: int, limit: int) -> dict:
+    params = {"offset": offset, "limit": limit, "sort": "rating"}
+    if filter_name is not None:
+        params["filter"] = filter_name
+    return api_get(f"/categories/{quote(category, safe='')}/items", **params)
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_item(item_id: str) -> dict:
+    return api_get(f"/content/{quote(item_id, safe='')}")
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_similar(item_id: str, limit: int) -> List[dict]:
+    return api_get(f"/content/{quote(item_id, safe='')}/similar", limit=limit)
+
+
+def rows(home: dict) -> List[Tuple[str, dict]]:
+    """(label, row) for each /home row: one per filter, or the whole category."""
+    return [
+        (row["category"] if row["filter"] is None else f"{row['category']} · {row['filter']}", row)
+        for row in home["rows"]
+    ]
+
+
+def poster_src(item: dict, size: str) -> str:
+    """The item's poster through the API's image proxy; ?v= lets browsers cache it as immutable."""
+    version = hashlib.sha256(item["poster_url"].encode()).hexdigest()[:12]  # as app.images.image_version
+    return f"{PUBLIC_API_URL}/images/{quote(item['id'], safe='')}/{size}?v={version}"
+
+
+def media_link(kind: str, item: dict) -> str:
+    return f"{PUBLIC_API_URL}/{kind}/{quote(item['id'], safe='')}"
+
+
+def rating_text(item: dict) -> str:
+    return "Unrated" if item.get("rating") is None else f"⭐ {item['rating']:.1f}"
+
+
+def card_html(item: dict) -> str:
+    """A poster card; all catalog text is escaped."""
+    e = html.escape
+    trailer = item.get("trailer_url")
+    trailer_link = f'<a href="{e(trailer)}" title="Play Trailer" target="_blank">▶️</a>' if trailer else ""
+    return f"""
+    <div class="movie-card">
+        <img src="{e(poster_src(item, 'w342'))}" class="movie-poster" loading="lazy"/>
+        <div class="center-text"><small>{item["year"]} | {e(", ".join(item["genres"]))}</small></div>
+        <div class="center-text"><strong>{e(item["title"])}</strong></div>
+        <div class="center-text">{rating_text(item)}</div>
+        <div class="movie-blurb">{e(item["description"])}</div>
+        <div class="movie-links">
+            <a href="{e(media_link('stream', item))}" title="Watch" target="_blank">🎬</a>
+            {trailer_link}
+            <a href="{e(media_link('download', item))}" title="Download">⬇️</a>
+        </div>
+    </div>
+    """
+
+
+def set_state(key: str, value) -> None:
+    st.session_state[key] = value
+
+
+def open_details(item_id: str) -> None:
+    st.session_state.history.append((st.session_state.page, st.session_state.selected_item))
+    st.session_state.selected_item = item_id
+    st.session_state.page = "details"
+    st.rerun()  # a full rerun, also from inside a fragment
+
+
+def show_cards(items: List[dict], key: str) -> None:
+    cols = st.columns(ROW_SIZE)
+    for idx, item in enumerate(items):
+        with cols[idx % ROW_SIZE]:
+            st.markdown(card_html(item), unsafe_allow_html=True)
+            if st.button("Details", key=f"{key}_{item['id']}"):
+                open_details(item["id"])
+
+
+@st.fragment
+def category_row(label: str, row: dict, preview_size: int) -> None:
+    """One home row, paged ROW_SIZE items at a time; paging reruns only this fragment.
+
+    Pages within the row's /home cards (or all of them, when the row had
+    fewer than preview_size) need no request.
+    """
+    category, filter_name = row["category"], row["filter"]
+    offset_key = f"offset:{category}:{filter_name}"
+    offset = st.session_state.get(offset_key, 0)
+    if offset + ROW_SIZE <= len(row["items"]) or len(row["items"]) < preview_size:
+        result = {"total": row["total"], "items": row["items"][offset:offset + ROW_SIZE]}
+    else:
+        try:
+            result = fetch_row(category, filter_name, offset, ROW_SIZE)
+        except APIError as e:
+            st.warning(f"{label}: {e}")
+            return
+    if not result["total"]:
+        return
+    title, back, forward = st.columns([8, 1, 1])
+    title.subheader(label)
+    # Callbacks run before the fragment reruns, so the new page is fetched on that rerun.
+    back.button("‹", key=f"back_{offset_key}", disabled=offset == 0,
+                on_click=set_state, args=(offset_key, max(0, offset - ROW_SIZE)))
+    forward.button("›", key=f"next_{offset_key}", disabled=offset + ROW_SIZE >= result["total"],
+                   on_click=set_state, args=(offset_key, offset + ROW_SIZE))
+    show_cards(result["items"], key=f"row_{offset_key}")
 
-st.set_page_config(page_title="My Flix", layout="wide")
-st.title("🎬 My Flix")
-
-# Initialize navigation state
-if "page" not in st.session_state:
-    st.session_state.page = "home"
-if "history" not in st.session_state:
-    st.session_state.history = []
-if "selected_item" not in st.session_state:
-    st.session_state.selected_item = None
-
-# Mock data: 5 sample movies
-mock_movies = [
-    {
-        "id": 1,
-        "title": "The Great Adventure",
-        "poster_url": "https://image.tmdb.org/t/p/w500/8UlWHLMpgZm9bx6QYh0NFoq67TZ.jpg",  # Wonder Woman 1984
-        "genres": ["Adventure", "Action"],
-        "description": "An epic journey across uncharted lands.",
-        "year": 2021,
-        "rating": 88,
-        "cast": ["Alice Smith", "Bob Johnson"],
-        "director": "Jane Doe",
-        "duration": 120,
-        "language": "English",
-        "trailer_url": ""
-    },
-    {
-        "id": 2,
-        "title": "Mystery of the Night",
-        "poster_url": "https://image.tmdb.org/t/p/w500/6MKr3KgOLmzOP6MSuZERO41Lpkt.jpg",  # Cruella
-        "genres": ["Mystery", "Thriller"],
-        "description": "A detective unravels a dark secret.",
-        "year": 2020,
-        "rating": 75,
-        "cast": ["Charlie Brown", "Diana Prince"],
-        "director": "John Smith",
-        "duration": 110,
-        "language": "English",
-        "trailer_url": ""
-    },
-    {
-        "id": 3,
-        "title": "Romance in Paris",
-        "poster_url": "https://image.tmdb.org/t/p/w500/9O1Iy9od7uGZ3m9M4f2R3G9C0bM.jpg",  # La La Land
-        "genres": ["Romance", "Drama"],
-        "description": "A love story set in the heart of Paris.",
-        "year": 2019,
-        "rating": 92,
-        "cast": ["Eve Adams", "Frank Miller"],
-        "director": "Sophie Lee",
-        "duration": 95,
-        "language": "French",
-        "trailer_url": ""
-    },
-    {
-        "id": 4,
-        "title": "Sci-Fi Odyssey",
-        "poster_url": "https://image.tmdb.org/t/p/w500/2mtQwJKVKQrZgTz49Dizb25eOQQ.jpg",  # The Martian
-        "genres": ["Science Fiction"],
-        "description": "Exploring the far reaches of the galaxy.",
-        "year": 2022,
-        "rating": 80,
-        "cast": ["George Lucas", "Hannah White"],
-        "director": "Mark Green",
-        "duration": 130,
-        "language": "English",
-        "trailer_url": ""
-    },
-    {
-        "id": 5,
-        "title": "Comedy Hour",
-        "poster_url": "https://image.tmdb.org/t/p/w500/5YUYg5q7QfC4IoNwNUtiwdiYKPr.jpg",  # The Hangover
-        "genres": ["Comedy"],
-        "description": "A hilarious collection of sketches.",
-        "year": 2018,
-        "rating": 70,
-        "cast": ["Ian Black", "Judy Blue"],
-        "director": "Tom Orange",
-        "duration": 85,
-        "language": "English",
-        "trailer_url": ""
-    }
-]
 
 def show_home():
     st.subheader("Welcome to My Flix!")
+    st.markdown(CARD_CSS, unsafe_allow_html=True)
+    try:
+        home = fetch_home()
+    except APIError as e:
+        st.error(str(e))
+        return
+    home_rows = rows(home)
+    shown = st.session_state.get("home_rows", ROWS_PER_PAGE)
+    for label, row in home_rows[:shown]:
+        category_row(label, row, home["row_size"])
+    if shown < len(home_rows):
+        st.button("More rows", on_click=set_state, args=("home_rows", shown + ROWS_PER_PAGE))
+
+
+@st.fragment
+def lazy_section(title: str, key: str, render) -> None:
+    """A details section that fetches and renders only once opened; opening it reruns just the section."""
+    st.markdown("---")
+    st.subheader(title)
+    flag = f"open:{key}"
+    if not st.session_state.get(flag):
+        st.button(f"Show {title.lower()}", key=f"show_{key}", on_click=set_state, args=(flag, True))
+        return
+    render()
 
-    # Inject CSS for uniform poster size and center alignment
-    st.markdown(
-        """
-        <style>
-        .movie-card {
-            width: 200px;
-            margin-left: auto;
-            margin-right: auto;
-        }
-        .movie-poster {
-            width: 100%;
-            height: 350px;
-            object-fit: cover;
-            display: block;
-        }
-        .center-text {
-            text-align: center;
-        }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
-
-    cols = st.columns(5)
-    for idx, movie in enumerate(mock_movies):
-        with cols[idx % 5]:
-            st.markdown(
-                f'''
-                <div class="movie-card">
-                    <img src="{movie["poster_url"]}" class="movie-poster"/>
-                    <div class="center-text"><small>{movie["year"]} | {", ".join(movie["genres"])}</small></div>
-                    <div class="center-text"><strong>{movie["title"]}</strong></div>
-                    <div class="center-text">Rotten Tomatoes: {movie["rating"]}%</div>
-                    <div style="
-                        text-align: center;
-                        overflow: hidden;
-                        text-overflow: ellipsis;
-                        display: -webkit-box;
-                        -webkit-line-clamp: 3;
-                        -webkit-box-orient: vertical;
-                        font-size: 0.85em;
-                        margin-top: 5px;
-                        min-height: 60px;
-                    ">
-                        {movie["description"]}
-                    </div>
-                    <div style="text-align: center; margin-top: 8px;">
-                        <a href="#" title="Watch Movie" style="margin: 0 5px; font-size: 1.5em; text-decoration: none;">🎬</a>
-                        <a href="#" title="Play Trailer" style="margin: 0 5px; font-size: 1.5em; text-decoration: none;">▶️</a>
-                        <a href="#" title="Download" style="margin: 0 5px; font-size: 1.5em; text-decoration: none;">⬇️</a>
-                    </div>
-                </div>
-                ''',
-                unsafe_allow_html=True,
-            )
-            # Add Streamlit button below emojis
-            if st.button("Details", key=f"details_{movie['id']}"):
-                st.session_state.history.append("home")
-                st.session_state.selected_item = movie
-                st.session_state.page = "details"
-                st.rerun()
 
 def show_details():
-    movie = st.session_state.selected_item
-    if not movie:
+    item_id = st.session_state.selected_item
+    if not item_id:
         st.write("No movie selected.")
         return
 
@@ -163,45 +302,56 @@ def show_details():
         st.session_state.history.clear()
         st.rerun()
 
+    try:
+        movie = fetch_item(item_id)
+    except APIError as e:
+        st.error(str(e))
+        return
+
     # Top section: poster + info + trailer
     col1, col2 = st.columns([1, 2])
     with col1:
-        st.image(movie["poster_url"], width=200)
+        st.image(poster_src(movie, "w342"), width=200)
     with col2:
         st.header(f"{movie['title']} ({movie['year']})")
-        st.caption(f"{', '.join(movie['genres'])} | {movie['duration']} min | {movie['language']}")
-        st.write(f"**Rotten Tomatoes:** {movie['rating']}%")
+        facts = [", ".join(movie["genres"])]
+        if movie.get("duration"):
+            facts.append(f"{movie['duration']} min")
+        if movie.get("language"):
+            facts.append(movie["language"])
+        st.caption(" | ".join(facts))
+        st.write(f"**Rating:** {rating_text(movie)}")
         st.write(movie["description"])
-        st.write(f"**Director:** {movie['director']}")
-        st.write(f"**Cast:** {', '.join(movie['cast'])}")
-        # Placeholder trailer
-        st.video("https://www.w3schools.com/html/mov_bbb.mp4")
+        if movie.get("director"):
+            st.write(f"**Director:** {movie['director']}")
+        if movie.get("cast"):
+            st.write(f"**Cast:** {', '.join(movie['cast'])}")
+        st.markdown(f"[🎬 Watch]({media_link('stream', movie)}) · [⬇️ Download]({media_link('download', movie)})")
 
-    st.markdown("---")
-    st.subheader("Videos")
-    cols = st.columns(4)
-    for col in cols:
-        col.image("https://via.placeholder.com/200x120?text=Video", use_column_width=True)
+    def videos():
+        if movie.get("trailer_url"):
+            st.video(movie["trailer_url"])
+        else:
+            st.write("No trailer available.")
 
-    st.markdown("---")
-    st.subheader("Photos")
-    cols = st.columns(5)
-    for col in cols:
-        col.image("https://via.placeholder.com/150x100?text=Photo", use_column_width=True)
+    def photos():
+        st.image(poster_src(movie, "original"), width=400)
 
-    st.markdown("---")
-    st.subheader("Cast")
-    cols = st.columns(5)
-    for idx, actor in enumerate(movie.get("cast", [])):
-        with cols[idx % 5]:
-            st.image("https://via.placeholder.com/100x100?text=Actor", use_column_width=True)
-            st.caption(actor)
+    def more_like_this():
+        try:
+            similar = fetch_similar(movie["id"], SIMILAR_LIMIT)
+        except APIError as e:
+            st.warning(str(e))
+            return
+        if not similar:
+            st.write("Nothing similar yet.")
+            return
+        st.markdown(CARD_CSS, unsafe_allow_html=True)
+        show_cards(similar, key=f"similar_{movie['id']}")
 
-    st.markdown("---")
-    st.subheader("More Like This")
-    cols = st.columns(4)
-    for col in cols:
-        col.image("https://via.placeholder.com/150x225?text=Movie", use_column_width=True)
+    lazy_section("Videos", f"videos:{item_id}", videos)
+    lazy_section("Photos", f"photos:{item_id}", photos)
+    lazy_section("More Like This", f"similar:{item_id}", more_like_this)
 
     st.markdown("---")
     st.subheader("Storyline")
@@ -218,28 +368,42 @@ def show_details():
     st.markdown("---")
     st.subheader("FAQ")
     st.write("**Q:** When was this movie released?\n\n**A:** " + str(movie["year"]))
-    st.write("**Q:** Who directed the movie?\n\n**A:** " + movie["director"])
+    if movie.get("director"):
+        st.write("**Q:** Who directed the movie?\n\n**A:** " + movie["director"])
 
     st.markdown("---")
     st.subheader("Details")
-    st.write(f"Duration: {movie['duration']} min")
-    st.write(f"Language: {movie['language']}")
-    st.write("Box Office: $100M (mock data)")
-    st.write("Technical Specs: Color, 4K, Dolby Atmos")
-
-    st.markdown("---")
-    st.subheader("Related News")
-    st.write("No news available. Replace with real news later.")
+    if movie.get("duration"):
+        st.write(f"Duration: {movie['duration']} min")
+    if movie.get("language"):
+        st.write(f"Language: {movie['language']}")
 
     # Optional: Previous button at bottom
     if st.button("⬅️ Previous"):
         if st.session_state.history:
-            st.session_state.page = st.session_state.history.pop()
+            st.session_state.page, st.session_state.selected_item = st.session_state.history.pop()
             st.rerun()
 
-if st.session_state.page == "home":
-    show_home()
-elif st.session_state.page == "details":
-    show_details()
-else:
-    st.write("Invalid page state.")
+
+def main():
+    st.set_page_config(page_title="My Flix", layout="wide")
+    st.title("🎬 My Flix")
+
+    # Initialize navigation state
+    if "page" not in st.session_state:
+        st.session_state.page = "home"
+    if "history" not in st.session_state:
+        st.session_state.history = []
+    if "selected_item" not in st.session_state:
+        st.session_state.selected_item = None
+
+    if st.session_state.page == "home":
+        show_home()
+    elif st.session_state.page == "details":
+        show_details()
+    else:
+        st.write("Invalid page state.")
+
+
+if __name__ == "__main__":
+    main()
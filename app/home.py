@@ -0,0 +1,157 @@
+"""Materialized home-page rows for Mac Flix, kept up to date incrementally.
+
+Each filter in categories.yaml becomes a row (a category without filters is
+one row of its own). A row is its best MACFLIX_HOME_ROW_SIZE items by rating,
+ordered as /categories/{name}/items?sort=rating would list them, and is
+ranked and encoded when the catalog loads. /home serves every row in one
+pre-encoded document of card fields.
+
+Reloads do not rank the rows again from scratch. A row keeps the rank keys
+of a few more items than it shows, so when the new store was derived from
+the old one by apply_changes, only the changed items are taken out of each
+row and merged back in where they now match. A row is ranked again from the
+indexes only when too few of its kept items are certain to still be the
+best (say its top titles were all removed). Rows whose items did not change
+keep their encoded JSON, and a categories.yaml change ranks only the rows it
+adds or alters.
+"""
+
+import os
+from itertools import islice
+from typing import Dict, FrozenSet, Iterator, List, NamedTuple, Optional, Tuple
+from app.catalog import CatalogStore, bits_from_ordinals, iter_bits
+from app.fast_json import dumps
+from app.filters import evaluate_filters, ordered
+from app.models import CategoryConfig, ContentItem, Filter, HomeCard
+from app.response_cache import Encoded, make_etag
+
+HOME_ROW_SIZE = int(os.getenv("MACFLIX_HOME_ROW_SIZE", "20"))  # items shown per row
+ROW_DEPTH = 2 * HOME_ROW_SIZE  # rank keys kept per row, so a few changes never force a re-rank
+PATCH_LIMIT = 256  # changed items past which rows are ranked again instead of patched
+CARD_FIELDS = list(HomeCard.model_fields)
+
+RankKey = Tuple[bool, float, int]  # the rating sort order: unrated last, then -rating, then catalog order
+RowKey = Tuple[str, Optional[Tuple[str, str, object]]]
+
+
+class Row(NamedTuple):
+    """One materialized row."""
+    category: str
+    filter: Optional[str]
+    total: int  # matching items, as /categories/{name}/items reports
+    ranked: List[RankKey]  # best first: every match, or the best ROW_DEPTH of them
+    items: bytes  # encoded cards of the first HOME_ROW_SIZE ranked items
+    body: bytes  # the encoded row
+
+
+def row_specs(categories: Optional[CategoryConfig]) -> Iterator[Tuple[str, Optional[Filter]]]:
+    """(category, filter) for each home row, in categories.yaml order."""
+    for category in categories.categories if categories else []:
+        if not category.filters:
+            yield category.name, None
+        for flt in category.filters or []:
+            yield category.name, flt
+
+
+def row_key(category: str, flt: Optional[Filter]) -> RowKey:
+    return category, None if flt is None else (flt.name, flt.type, flt.value)
+
+
+def rank_key(item: ContentItem, ordinal: int) -> RankKey:
+    return item.rating is None, -(item.rating or 0.0), ordinal
+
+
+def card_json(item: ContentItem) -> bytes:
+    """An item's HomeCard fields as JSON, without building the model."""
+    card = {field: getattr(item, field) for field in CARD_FIELDS}
+    card["poster_url"] = str(item.poster_url)
+    if item.trailer_url is not None:
+        card["trailer_url"] = str(item.trailer_url)
+    return dumps(card)
+
+
+class HomeRows:
+    """The home rows for one catalog snapshot and categories document.
+
+    With `previous`, rows are patched from its rows where possible instead
+    of being ranked again; `reranked` counts the rows that were not.
+    """
+
+    def __init__(
+        self,
+        store: CatalogStore,
+        categories: Optional[CategoryConfig],
+        previous: Optional["HomeRows"] = None,
+    ):
+        self.store = store
+        self.categories = categories
+        self.reranked = 0
+        changed = store.changed_since(previous.store) if previous is not None else None
+        if changed is not None and len(changed) > PATCH_LIMIT:
+            changed = None  # ranking again from the indexes is cheaper than merging this many
+        carried = previous._by_key if changed is not None else {}
+        changed_bits = bits_from_ordinals(changed, max(changed) + 1) if changed else 0
+        self._by_key: Dict[RowKey, Row] = {}
+        rows = []
+        for category, flt in row_specs(categories):
+            key = row_key(category, flt)
+            row = self._by_key.get(key)
+            if row is None:
+                bits = evaluate_filters(store, [flt] if flt is not None else [])
+                previous_row = carried.get(key)
+                if previous_row is not None:
+                    row = self._patched(previous_row, bits, changed, changed_bits)
+                if row is None:
+                    row = self._ranked(category, flt, bits)
+                    self.reranked += 1
+                self._by_key[key] = row
+            rows.append(row.body)
+        body = b'{"row_size":%d,"rows":[' % HOME_ROW_SIZE + b",".join(rows) + b"]}"
+        self.encoded = Encoded(body, make_etag(body))
+
+    def _ranked(self, category: str, flt: Optional[Filter], bits: int) -> Row:
+        """Rank a row from the indexes."""
+        ordinals = list(islice(ordered(self.store, bits, "rating"), ROW_DEPTH))
+        items = self.store.materialize(ordinals)
+        ranked = [rank_key(item, ordinal) for ordinal, item in zip(ordinals, items)]
+        name = None if flt is None else flt.name
+        return self._row(category, name, bits.bit_count(), ranked, self._cards(items[:HOME_ROW_SIZE]))
+
+    def _patched(self, row: Row, bits: int, changed: FrozenSet[int], changed_bits: int) -> Optional[Row]:
+        """Patch a row with the changed ordinals, or None if it has to be ranked again."""
+        if not changed:
+            return row
+        total = bits.bit_count()
+        kept = [key for key in row.ranked if key[-1] not in changed]
+        fresh = list(iter_bits(bits & changed_bits))
+        if not fresh and len(kept) == len(row.ranked) and total == row.total:
+            return row  # no changed item was or is in this row
+        kept.extend(rank_key(item, ordinal) for ordinal, item in zip(fresh, self.store.materialize(fresh)))
+        kept.sort()
+        if len(row.ranked) < row.total:
+            # Items past the old cut-off are unknown, so only keys ahead of it are certain.
+            cutoff = row.ranked[-1]
+            kept = [key for key in kept if key <= cutoff]
+        if len(kept) < min(HOME_ROW_SIZE, total):
+            return None
+        ranked = kept[:ROW_DEPTH]
+        shown = [key[-1] for key in ranked[:HOME_ROW_SIZE]]
+        if shown == [key[-1] for key in row.ranked[:HOME_ROW_SIZE]] and changed.isdisjoint(shown):
+            items = row.items
+        else:
+            items = self._cards(self.store.materialize(shown))
+        if items is row.items and total == row.total:
+            return row._replace(ranked=ranked)
+        return self._row(row.category, row.filter, total, ranked, items)
+
+    @staticmethod
+    def _cards(items: List[ContentItem]) -> bytes:
+        return b"[" + b",".join(card_json(item) for item in items) + b"]"
+
+    @staticmethod
+    def _row(category: str, name: Optional[str], total: int, ranked: List[RankKey], items: bytes) -> Row:
+        body = (
+            b'{"category":' + dumps(category) + b',"filter":' + dumps(name)
+            + b',"total":%d,"items":' % total + items + b"}"
+        )
+        return Row(category, name, total, ranked, items, body)
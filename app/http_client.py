@@ -0,0 +1,34 @@
+"""Shared, connection-pooled HTTP client for Mac Flix upstream APIs."""
+
+import os
+import httpx
+
+HTTP_TIMEOUT = float(os.getenv("MACFLIX_HTTP_TIMEOUT", "10"))  # seconds, per read/write/pool wait
+HTTP_CONNECT_TIMEOUT = float(os.getenv("MACFLIX_HTTP_CONNECT_TIMEOUT", "3"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("MACFLIX_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("MACFLIX_HTTP_MAX_KEEPALIVE", "20"))
+
+
+def http2_available() -> bool:
+    """Whether the optional h2 package is installed (httpx needs it for HTTP/2)."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def make_async_client(**kwargs) -> httpx.AsyncClient:
+    """Build the pooled client shared by all upstream API calls.
+
+    Connections are kept alive between requests, and HTTP/2 is negotiated
+    when h2 is installed, so concurrent searches reuse a few connections
+    instead of paying a TCP and TLS handshake each.
+    """
+    kwargs.setdefault("timeout", httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT))
+    kwargs.setdefault(
+        "limits",
+        httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE),
+    )
+    kwargs.setdefault("http2", http2_available())
+    return httpx.AsyncClient(**kwargs)
@@ -0,0 +1,287 @@
+"""Poster proxy for Mac Flix: fetched once, stored on disk, served in resized variants.
+
+Originals are content-addressed: stored under the SHA-256 of their bytes,
+with a small pointer file per source URL, so posters shared by several
+items are kept once. Resized JPEG variants sit beside their original and
+are made in a thread pool (Pillow releases the GIL while resizing); the
+common sizes are generated in the background as soon as an original
+arrives. Concurrent requests for the same image share one fetch or resize.
+Least recently used files (by mtime, refreshed on access) are deleted once
+the cache exceeds its size budget, as in app.disk_cache; URL pointers are
+cached files too, and one whose original was evicted is deleted when it is
+next looked up. File and byte counts are kept as running totals, set by
+each eviction scan (the first runs in the background when the cache opens),
+which also picks up other workers' writes.
+"""
+
+import asyncio
+import anyio
+import hashlib
+import itertools
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import httpx
+from PIL import Image, UnidentifiedImageError
+
+IMAGE_CACHE_DIR = os.getenv("MACFLIX_IMAGE_CACHE", "")  # empty disables the proxy (clients get redirected)
+IMAGE_CACHE_MAX_MB = float(os.getenv("MACFLIX_IMAGE_CACHE_MAX_MB", "1024"))
+IMAGE_WORKERS = int(os.getenv("MACFLIX_IMAGE_WORKERS", str(os.cpu_count() or 2)))
+SIZES = {"w92": 92, "w185": 185, "w342": 342, "w500": 500, "original": None}  # name -> width, as TMDB names them
+PREWARM_SIZES = ("w185", "w342")  # made in the background when an original is fetched
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+JPEG_QUALITY = 85
+TOUCH_INTERVAL = 60.0  # seconds between access-time updates for one file
+EVICT_EVERY = 50  # writes between size checks
+
+
+class ImageUnavailable(Exception):
+    """The origin could not supply a usable image."""
+
+
+class ImageStats(NamedTuple):
+    hits: int
+    misses: int
+    fetches: int
+    resizes: int
+    evictions: int
+    files: int
+    bytes: int
+
+
+def image_version(url: str) -> str:
+    """Short fingerprint of a source URL; image links carry it so they can be cached as immutable."""
+    return hashlib.sha256(url.encode()).hexdigest()[:12]
+
+
+def media_type(path: Path) -> str:
+    """MIME type of a cached file: variants are JPEG, originals whatever the origin sent."""
+    if path.suffix == ".jpg":
+        return "image/jpeg"
+    try:
+        with Image.open(path) as image:
+            return image.get_format_mimetype() or "application/octet-stream"
+    except (OSError, UnidentifiedImageError):
+        return "application/octet-stream"
+
+
+def resize(source: Path, target: Path, width: int) -> int:
+    """Write a JPEG of source scaled down to width (never up); return its size in bytes."""
+    with Image.open(source) as image:
+        image.draft("RGB", (width, width * 4))  # lets JPEG decoding skip detail we would throw away
+        image = image.convert("RGB")
+        if image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        return _write_atomic(target, lambda out: image.save(out, "JPEG", quality=JPEG_QUALITY, optimize=True,
+                                                            progressive=True))
+
+
+def _write_atomic(target: Path, write) -> int:
+    # Other workers may be serving target; they see the old file or the new one, never half of one.
+    fd, temp = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            write(out)
+        os.replace(temp, target)
+    except BaseException:
+        os.unlink(temp)
+        raise
+    return target.stat().st_size
+
+
+class ImageCache:
+    """Disk cache of source images and their resized variants."""
+
+    def __init__(self, root: Path, http: httpx.AsyncClient, max_bytes: int = int(IMAGE_CACHE_MAX_MB * 1024 * 1024),
+                 workers: int = IMAGE_WORKERS):
+        self.root = Path(root)
+        (self.root / "urls").mkdir(parents=True, exist_ok=True)
+        (self.root / "blobs").mkdir(exist_ok=True)
+        self.http = http
+        self.max_bytes = max_bytes
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="image")
+        self._fetching: Dict[str, asyncio.Future] = {}
+        self._resizing: Dict[Path, Future] = {}
+        self._writes = 0
+        self._hits = self._misses = self._fetches = self._resizes = self._evictions = 0
+        self._lock = threading.Lock()
+        self._file_count = self._byte_count = 0
+        self._pool.submit(self.evict)  # counts what earlier runs left, off the startup path
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    async def get(self, url: str, size: str) -> Path:
+        """Path of url's image at a SIZES size, fetching and resizing as needed."""
+        digest = await self._original(url)
+        source = self._blob(digest)
+        width = SIZES[size]
+        if width is None:
+            return source
+        target = source.with_name(f"{digest}.{size}.jpg")
+        if await anyio.to_thread.run_sync(self._touch, target):
+            self._hits += 1
+            return target
+        self._misses += 1
+        await asyncio.wrap_future(self._resize(source, target, width))
+        return target
+
+    async def _original(self, url: str) -> str:
+        pointer = self.root / "urls" / hashlib.sha256(url.encode()).hexdigest()
+        digest = await anyio.to_thread.run_sync(self._lookup, pointer)
+        if digest is not None:
+            return digest
+        pending = self._fetching.get(url)
+        if pending is None:
+            pending = self._fetching[url] = asyncio.ensure_future(self._fetch(url, pointer))
+            pending.add_done_callback(lambda _: self._fetching.pop(url, None))
+        return await asyncio.shield(pending)
+
+    def _lookup(self, pointer: Path) -> Optional[str]:
+        """Digest of the original a URL's pointer names, if that original is still cached."""
+        try:
+            digest = pointer.read_text()
+            if self._touch(self._blob(digest)):
+                self._touch(pointer)
+                return digest
+            size = pointer.stat().st_size
+            pointer.unlink()  # its original was evicted; the fetch writes a new one
+        except FileNotFoundError:
+            return None
+        self._forgot(size)
+        return None
+
+    async def _fetch(self, url: str, pointer: Path) -> str:
+        try:
+            body = await self._download(url)
+        except httpx.HTTPError as e:
+            raise ImageUnavailable(f"{url}: {e}") from e
+        self._fetches += 1
+        digest, written = await asyncio.get_running_loop().run_in_executor(self._pool, self._store, body, pointer)
+        self._wrote(*written)
+        blob = self._blob(digest)
+        for size in PREWARM_SIZES:
+            self._resize(blob, blob.with_name(f"{digest}.{size}.jpg"), SIZES[size])
+        return digest
+
+    async def _download(self, url: str) -> bytes:
+        """The image's bytes, reading no more than MAX_IMAGE_BYTES of the body."""
+        async with self.http.stream("GET", url, follow_redirects=True) as response:
+            if response.status_code != 200:
+                raise ImageUnavailable(f"{url}: HTTP {response.status_code}")
+            chunks, received = [], 0
+            async for chunk in response.aiter_bytes():
+                received += len(chunk)
+                if received > MAX_IMAGE_BYTES:
+                    raise ImageUnavailable(f"{url}: larger than {MAX_IMAGE_BYTES} bytes")
+                chunks.append(chunk)
+        return b"".join(chunks)
+
+    def _store(self, body: bytes, pointer: Path) -> Tuple[str, List[int]]:
+        """Write an original under its digest and point its URL at it; return the digest and new files' sizes."""
+        digest = hashlib.sha256(body).hexdigest()
+        blob = self._blob(digest)
+        blob.parent.mkdir(exist_ok=True)
+        written = [] if blob.exists() else [_write_atomic(blob, lambda out: out.write(body))]
+        existed = pointer.exists()
+        size = _write_atomic(pointer, lambda out: out.write(digest.encode()))
+        return digest, written if existed else written + [size]
+
+    def _resize(self, source: Path, target: Path, width: int) -> Future:
+        pending = self._resizing.get(target)
+        if pending is None:
+            pending = self._resizing[target] = self._pool.submit(self._resize_job, source, target, width)
+            pending.add_done_callback(lambda _: self._resizing.pop(target, None))
+        return pending
+
+    def _resize_job(self, source: Path, target: Path, width: int) -> None:
+        if target.exists():
+            return  # a prewarmed variant another worker already made
+        try:
+            self._wrote(resize(source, target, width))
+            self._resizes += 1
+        except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as e:
+            print(f"Image resize failed for {source.name}: {e}")
+            raise ImageUnavailable(str(e)) from e
+
+    def _blob(self, digest: str) -> Path:
+        return self.root / "blobs" / digest[:2] / digest
+
+    def _touch(self, path: Path) -> bool:
+        """Whether path is cached, marking it recently used."""
+        try:
+            if time.time() - path.stat().st_mtime > TOUCH_INTERVAL:
+                os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _wrote(self, *sizes: int) -> None:
+        with self._lock:
+            self._file_count += len(sizes)
+            self._byte_count += sum(sizes)
+            self._writes += 1
+            check = self._writes % EVICT_EVERY == 0
+        if check:
+            self._pool.submit(self.evict)
+
+    def _count(self, files) -> None:
+        with self._lock:
+            self._file_count = len(files)
+            self._byte_count = sum(stat.st_size for _, stat in files)
+
+    def _forgot(self, size: int) -> None:
+        with self._lock:
+            self._file_count -= 1
+            self._byte_count -= size
+
+    def _files(self):
+        for path in itertools.chain((self.root / "blobs").glob("*/*"), (self.root / "urls").iterdir()):
+            if not path.name.startswith(".tmp-"):
+                try:
+                    yield path, path.stat()
+                except FileNotFoundError:
+                    pass
+
+    def evict(self) -> int:
+        """Delete least recently used files until the cache is under max_bytes."""
+        files = list(self._files())
+        total = sum(stat.st_size for _, stat in files)
+        if total <= self.max_bytes:
+            self._count(files)
+            return 0
+        # Free down to 90% of the budget, so eviction does not run on every write.
+        excess, kept, removed = total - int(self.max_bytes * 0.9), [], 0
+        for path, stat in sorted(files, key=lambda f: f[1].st_mtime):
+            if excess <= 0:
+                kept.append((path, stat))
+                continue
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            excess -= stat.st_size
+            removed += 1
+        self._count(kept)
+        self._evictions += removed
+        return removed
+
+    def stats(self) -> ImageStats:
+        """Counters for this process; files and bytes (originals, variants and URL pointers) are running totals."""
+        return ImageStats(self._hits, self._misses, self._fetches, self._resizes, self._evictions,
+                          self._file_count, self._byte_count)
+
+
+def open_image_cache(http: httpx.AsyncClient) -> Optional[ImageCache]:
+    """Open the configured image cache, or None if MACFLIX_IMAGE_CACHE is unset."""
+    if not IMAGE_CACHE_DIR:
+        return None
+    try:
+        return ImageCache(Path(IMAGE_CACHE_DIR), http)
+    except OSError as e:
+        print(f"Image cache disabled: {e}")
+        return None
@@ -4,12 +4,38 @@ import os
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import RedirectResponse
-from app.models import ContentItem, CategoryConfig, SecretsConfig
-from app.config_loader import load_content_config, load_categories_config
-from app.tmdb_client import TMDBClient
-from typing import List
+import threading
+import time
+import anyio
+import httpx
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
+from app.models import (
+    ContentItem, CategoryConfig, ContentQueryResult, FederatedSearchResult, HomePage, SecretsConfig, Suggestion,
+)
+from app.config_loader import CONFIG_DIR, file_digest, load_catalog, load_categories_config, reload_catalog
+from app.catalog import CatalogStore, decode_cursor, encode_cursor
+from app.suggest import SUGGEST_LIMIT
+from app.media import FileRangeResponse, media_path
+from app.metrics import (
+    CATALOG_CHANGES, CATALOG_ITEMS, CATALOG_LOAD, CATALOG_RELOADS, CONTENT_TYPE as METRICS_CONTENT_TYPE, INDEX_BUILD,
+    MetricsMiddleware, record_cache, render as render_metrics,
+)
+from app.profiler import ProfileMiddleware
+from app.images import SIZES as IMAGE_SIZES, ImageCache, ImageUnavailable, image_version, media_type, open_image_cache
+from app.similar import SIMILAR_K
+from app.fast_json import FAST_JSON, RawJSONResponse, dumps, query_result
+from app.federated import FEDERATED_TIMEOUT, federated_search
+from app.filters import evaluate_filters, facet_counts, page, page_ordinals, query_bits
+from app.home import HomeRows
+from app.reloader import ConfigWatcher
+from app.response_cache import Encoded, ResponseCache, etag_matches
+from app.disk_cache import open_metadata_cache
+from app.http_client import make_async_client
+from app.omdb_client import AsyncOMDBClient
+from app.resilience import UpstreamUnavailable
+from app.tmdb_client import AsyncTMDBClient
+from typing import Iterable, Iterator, List, Literal, Optional
 
 app = FastAPI(
     title="Mac Flix Backend API",
@@ -17,20 +43,230 @@ app = FastAPI(
     version="0.1.0"
 )
 
-# Load configs at startup
-content_items: List[ContentItem] = []
+NDJSON_BATCH_SIZE = 64
+RELOAD_INTERVAL = float(os.getenv("MACFLIX_RELOAD_INTERVAL", "0"))  # seconds; 0 disables the watcher
+ADMIN_TOKEN = os.getenv("MACFLIX_ADMIN_TOKEN", "")
+SHARED_CATALOG = os.getenv("MACFLIX_SHARED_CATALOG", "") == "1"  # map one snapshot across all workers
+WARM_INDEXES = os.getenv("MACFLIX_WARM_INDEXES", "1") == "1"  # build indexes in the background; 0 waits for first use
+INDEXES = ("search_index", "suggest_index", "similar_index")
+
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfileMiddleware, token=ADMIN_TOKEN)  # outermost, so profiles include the metrics
+
+# Load configs at startup. Reloads replace these references wholesale; handlers
+# read each global once so a request never mixes two snapshots of the same config.
+catalog = CatalogStore([])
 categories: CategoryConfig | None = None
+categories_version: str | None = None
 secrets: SecretsConfig | None = None
+_response_cache = ResponseCache(catalog, categories)
+_home = HomeRows(catalog, categories)
+_reload_lock = threading.Lock()
+_watcher: ConfigWatcher | None = None
+# Upstream API clients share one pooled connection set, opened at startup.
+http_client: httpx.AsyncClient | None = None
+tmdb: AsyncTMDBClient | None = None
+omdb: AsyncOMDBClient | None = None
+images: ImageCache | None = None
+IMAGE_MAX_AGE = 3600  # seconds, for image links without a matching ?v= version
 
 @app.on_event("startup")
 def startup_event():
-    global content_items, categories, secrets
-    content_items = load_content_config()
+    global catalog, categories, categories_version, secrets, _home, _watcher
+    start = time.perf_counter()
+    catalog = load_catalog(shared=SHARED_CATALOG)
+    CATALOG_LOAD.observe(time.perf_counter() - start, "startup")
+    warm_indexes(catalog)
+    categories_version = file_digest(CONFIG_DIR / "categories.yaml")
     categories = load_categories_config()
+    _home = HomeRows(catalog, categories)
     secrets = SecretsConfig(
         tmdb_api_key=os.getenv("TMDB_API_KEY", ""),
         other_api_keys=None
     )
+    if RELOAD_INTERVAL > 0:
+        _watcher = ConfigWatcher(
+            [CONFIG_DIR / "content.yaml", CONFIG_DIR / "categories.yaml"], reload_configs, RELOAD_INTERVAL
+        )
+        _watcher.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher = None
+
+@app.on_event("startup")
+async def open_http_clients():
+    global images
+    upstream_clients()
+    images = open_image_cache(http_client)
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    global http_client, tmdb, omdb, images
+    if images is not None:
+        images.close()
+    if http_client is not None:
+        await http_client.aclose()
+    http_client = tmdb = omdb = images = None
+
+def warm_indexes(store: CatalogStore) -> Optional[threading.Thread]:
+    """Build the store's indexes in a background thread, off the startup and reload path.
+
+    Each worker holds its own indexes; a request that needs one first waits for its build.
+    """
+    pending = [name for name in INDEXES if name not in store.__dict__]  # the rest were patched by apply_changes
+    if not WARM_INDEXES:
+        # Indexes wait for first use, except a similar index a reload left without its added items.
+        pending = [name for name in pending if name == "similar_index" and store._similar_interim is not None]
+    if not pending:
+        return None
+
+    def build():
+        for name in pending:
+            start = time.perf_counter()
+            getattr(store, name)
+            INDEX_BUILD.observe(time.perf_counter() - start, name.removesuffix("_index"))
+        store._similar_interim = None  # requests now use the rebuilt index
+
+    thread = threading.Thread(target=build, name="index-warmup", daemon=True)
+    thread.start()
+    return thread
+
+def upstream_clients():
+    """The shared TMDB and OMDB clients, opened on first use."""
+    global http_client, tmdb, omdb
+    if tmdb is None or omdb is None:
+        http_client = make_async_client()
+        disk = open_metadata_cache()
+        tmdb = AsyncTMDBClient(http_client, disk=disk)
+        omdb = AsyncOMDBClient(http_client, disk=disk)
+    return tmdb, omdb
+
+def reload_configs() -> dict:
+    """Re-read content.yaml and categories.yaml, swapping in whatever changed."""
+    global catalog, categories, categories_version, _home
+    with _reload_lock:
+        start = time.perf_counter()
+        try:
+            new_catalog, diff = reload_catalog(catalog, shared=SHARED_CATALOG)
+            new_version = file_digest(CONFIG_DIR / "categories.yaml")
+            categories_changed = new_version != categories_version
+            new_categories = load_categories_config() if categories_changed else categories
+            new_home = HomeRows(new_catalog, new_categories, previous=home_rows())
+        except Exception:
+            CATALOG_RELOADS.inc("failed")
+            raise
+        # Everything is parsed and validated above; publishing is plain reference swaps.
+        catalog = new_catalog
+        categories, categories_version = new_categories, new_version
+        _home = new_home
+    CATALOG_LOAD.observe(time.perf_counter() - start, "reload")
+    warm_indexes(new_catalog)  # indexes apply_changes patched are kept; a rebuilt store builds them anew
+    CATALOG_RELOADS.inc("ok")
+    for change in ("added", "updated", "removed"):
+        CATALOG_CHANGES.inc(change, amount=getattr(diff, change))
+    return {
+        "catalog_version": new_catalog.version,
+        "items": len(new_catalog),
+        "added": diff.added,
+        "updated": diff.updated,
+        "removed": diff.removed,
+        "swapped": diff.swapped,
+        "categories_reloaded": categories_changed,
+    }
+
+def response_cache() -> ResponseCache:
+    """Get the encoded-response cache for the live catalog and categories."""
+    global _response_cache
+    cache = _response_cache
+    if cache.store is not catalog or cache.categories is not categories:
+        cache = _response_cache = ResponseCache(catalog, categories, previous=cache)
+    return cache
+
+def home_rows() -> HomeRows:
+    """Get the home rows for the live catalog and categories."""
+    global _home
+    rows = _home
+    if rows.store is not catalog or rows.categories is not categories:
+        rows = _home = HomeRows(catalog, categories, previous=rows)
+    return rows
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """Return a 304 response if the client already has this ETag."""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    return None
+
+def json_response(request: Request, encoded: Encoded) -> Response:
+    """Serve pre-encoded JSON, or 304 if the client already has this ETag."""
+    cached = not_modified(request, encoded.etag)
+    if cached is not None:
+        return cached
+    headers = {"ETag": encoded.etag, "Cache-Control": "no-cache"}
+    return Response(content=encoded.body, media_type="application/json", headers=headers)
+
+def query_response(store: CatalogStore, bits: int, offset: int, limit: int, sort: str, facets: bool):
+    """One page of matching items with optional facets, as a ContentQueryResult or its encoded body."""
+    facet_doc = facet_counts(store, bits) if facets else None
+    if FAST_JSON:
+        items = store.json_array(page_ordinals(store, bits, offset, limit, sort))
+        return RawJSONResponse(query_result(bits.bit_count(), offset, limit, items, facet_doc))
+    return ContentQueryResult(
+        total=bits.bit_count(),
+        offset=offset,
+        limit=limit,
+        items=page(store, bits, offset, limit, sort),
+        facets=facet_doc,
+    )
+
+def require_admin(token: str) -> None:
+    """Reject admin requests without the configured X-Admin-Token; with none configured, reject all."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled: MACFLIX_ADMIN_TOKEN is not set")
+    if token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.post("/admin/reload")
+def admin_reload(x_admin_token: str = Header(default="")):
+    """Hot-reload the catalog and categories from disk."""
+    require_admin(x_admin_token)
+    try:
+        return reload_configs()
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Reload failed, keeping current catalog: {e}")
+
+@app.get("/admin/cache")
+def admin_cache_stats(x_admin_token: str = Header(default="")):
+    """Hit, miss and eviction counters of the upstream lookup caches, and breaker states."""
+    require_admin(x_admin_token)
+    tmdb_client, omdb_client = upstream_clients()
+    stats = {
+        name: {**client.cache.stats()._asdict(), "circuit": client.upstream.breaker.state}
+        for name, client in (("tmdb", tmdb_client), ("omdb", omdb_client))
+    }
+    if tmdb_client.disk is not None:
+        stats["disk"] = tmdb_client.disk.stats()._asdict()
+    return stats
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics: request and upstream latencies, cache hit ratios, catalog loads."""
+    CATALOG_ITEMS.set(len(catalog))
+    for name, client in (("tmdb", tmdb), ("omdb", omdb)):
+        if client is not None:
+            stats = client.cache.stats()
+            record_cache(name, stats.hits, stats.misses, stats.size)
+    disk = tmdb.disk if tmdb is not None else None
+    if disk is not None:
+        stats = disk.stats()
+        record_cache("metadata_disk", stats.hits + stats.stale_hits, stats.misses, stats.entries, stats.bytes)
+    if images is not None:
+        stats = images.stats()
+        record_cache("images", stats.hits, stats.misses, stats.files, stats.bytes)
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
 
 @app.get("/")
 def root():
@@ -38,63 +274,285 @@ def root():
     return {"message": "Welcome to Mac Flix Backend API"}
 
 @app.get("/content", response_model=List[ContentItem])
-def get_all_content():
-    """Get all content items."""
-    return content_items
+def get_all_content(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(default=None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+):
+    """Get all content items, or one page of them in id order when limit/cursor is set.
+
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    store = catalog
+    if limit is None and cursor is None:
+        cache = response_cache()
+        # The list ETag is the catalog version, so revalidation skips encoding entirely.
+        cached = not_modified(request, cache.all_items_etag)
+        if cached is not None:
+            return cached
+        if SHARED_CATALOG:
+            # Stream from the shared segment rather than keep a private copy of the full body.
+            headers = {"ETag": cache.all_items_etag, "Cache-Control": "no-cache"}
+            return StreamingResponse(iter_json_array(store.iter_json()), media_type="application/json", headers=headers)
+        return json_response(request, cache.all_items())
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    headers = {"X-Total-Count": str(len(store))}
+    if FAST_JSON:
+        ordinals, next_after = store.page_ordinals_after(after, limit or 100)
+        if next_after is not None:
+            headers["X-Next-Cursor"] = encode_cursor(next_after)
+        return RawJSONResponse(store.json_array(ordinals), headers=headers)
+    items, has_more = store.page_after(after, limit or 100)
+    if has_more and items:
+        headers["X-Next-Cursor"] = encode_cursor(items[-1].id)
+    response.headers.update(headers)
+    return items
+
+def iter_ndjson(lines: Iterable[bytes]) -> Iterator[bytes]:
+    """Join encoded items into NDJSON, a small batch of lines per chunk."""
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) == NDJSON_BATCH_SIZE:
+            yield b"\n".join(batch) + b"\n"
+            batch = []
+    if batch:
+        yield b"\n".join(batch) + b"\n"
+
+def iter_json_array(lines: Iterable[bytes]) -> Iterator[bytes]:
+    """Join encoded items into a JSON array, a small batch of items per chunk."""
+    yield b"["
+    first = True
+    for chunk in iter_ndjson(lines):
+        yield (b"" if first else b",") + chunk[:-1].replace(b"\n", b",")
+        first = False
+    yield b"]"
+
+@app.get("/content/export")
+def export_content():
+    """Stream the full catalog as NDJSON, one item per line."""
+    return StreamingResponse(iter_ndjson(catalog.iter_json()), media_type="application/x-ndjson")
+
+@app.get("/content/query", response_model=ContentQueryResult)
+def query_content(
+    genre: List[str] = Query(default=[]),
+    match: Literal["any", "all"] = "any",
+    type: Optional[Literal["movie", "tv"]] = None,
+    language: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    min_rating: Optional[float] = None,
+    sort: Literal["catalog", "rating", "year"] = "catalog",
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, ge=1, le=500),
+    facets: bool = True,
+):
+    """Filter content on the server, with optional facet counts."""
+    store = catalog
+    bits = query_bits(
+        store,
+        genres=genre,
+        match_all_genres=match == "all",
+        type=type,
+        language=language,
+        year_from=year_from,
+        year_to=year_to,
+        min_rating=min_rating,
+    )
+    return query_response(store, bits, offset, limit, sort, facets)
+
+@app.get("/search", response_model=ContentQueryResult)
+def search_content(
+    q: str = Query(min_length=1, max_length=200),
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=20, ge=1, le=100),
+):
+    """Full-text search over the local catalog, best matches first.
+
+    The last word also matches as a prefix, and misspelled words match
+    close terms. Total counts the ranked matches, so paging stops there.
+    """
+    store = catalog
+    hits = store.search_index.search(q, offset + limit)
+    if FAST_JSON:
+        items = store.json_array(ordinal for ordinal, _ in hits.ranked[offset:])
+        return RawJSONResponse(query_result(hits.total, offset, limit, items))
+    return ContentQueryResult(
+        total=hits.total,
+        offset=offset,
+        limit=limit,
+        items=store.materialize(ordinal for ordinal, _ in hits.ranked[offset:]),
+    )
+
+@app.get("/search/federated", response_model=FederatedSearchResult)
+async def search_federated(
+    q: str = Query(min_length=1, max_length=200),
+    media_type: Literal["movie", "tv"] = "movie",
+    limit: int = Query(default=20, ge=1, le=100),
+    timeout: float = Query(default=FEDERATED_TIMEOUT, gt=0, le=30),
+):
+    """Search the catalog, TMDB and OMDB concurrently and merge what answers within timeout seconds.
+
+    Results are de-duplicated by IMDb id, TMDB id or title and year, and
+    ranked by how highly each source placed them; `sources` tells which
+    ones answered.
+    """
+    tmdb_client, omdb_client = upstream_clients()
+    return await federated_search(catalog, tmdb_client, omdb_client, q, media_type, limit, timeout)
+
+@app.get("/suggest", response_model=List[Suggestion])
+def suggest(
+    prefix: str = Query(min_length=1, max_length=100),
+    limit: int = Query(default=10, ge=1, le=SUGGEST_LIMIT),
+):
+    """Autocomplete titles and cast/director names from any word start, best rated first."""
+    suggestions = catalog.suggest_index.complete(prefix, limit)
+    if FAST_JSON:
+        return RawJSONResponse(dumps([vars(s) for s in suggestions]))
+    return suggestions
+
+@app.get("/content/{item_id}/similar", response_model=List[ContentItem])
+def similar_content(item_id: str, limit: int = Query(default=10, ge=1, le=SIMILAR_K)):
+    """More Like This: the items sharing the most cast, director, genres and era with item_id."""
+    store = catalog
+    ordinals = store.similar_ordinals(item_id, limit)
+    if ordinals is None:
+        raise HTTPException(status_code=404, detail="Content item not found")
+    if FAST_JSON:
+        return RawJSONResponse(store.json_array(ordinals))
+    return store.materialize(ordinals)
 
 @app.get("/content/{item_id}", response_model=ContentItem)
-def get_content_item(item_id: str):
+def get_content_item(item_id: str, request: Request):
     """Get a content item by ID."""
-    for item in content_items:
-        if item.id == item_id:
-            return item
-    raise HTTPException(status_code=404, detail="Content item not found")
+    encoded = response_cache().item(item_id)
+    if encoded is None:
+        raise HTTPException(status_code=404, detail="Content item not found")
+    return json_response(request, encoded)
 
 @app.get("/categories", response_model=CategoryConfig)
-def get_categories():
-    """Get categories and filters."""
-    return categories
+def get_categories(request: Request):
+    """Get categories and filters; 503 until categories.yaml has been loaded."""
+    if categories is None:
+        raise HTTPException(status_code=503, detail="Categories not loaded")
+    return json_response(request, response_cache().categories_doc())
+
+
+@app.get("/home", response_model=HomePage)
+def get_home(request: Request):
+    """Get every home-page row (the best-rated items of each category filter) in one response."""
+    return json_response(request, home_rows().encoded)
+
+
+@app.get("/categories/{name}/items", response_model=ContentQueryResult)
+def get_category_items(
+    name: str,
+    filter: Optional[str] = None,
+    sort: Literal["catalog", "rating", "year"] = "catalog",
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, ge=1, le=500),
+    facets: bool = False,
+):
+    """Get the items of a category, optionally narrowed to one of its filters."""
+    store = catalog
+    category = next((c for c in categories.categories if c.name == name), None) if categories else None
+    if category is None:
+        raise HTTPException(status_code=404, detail="Category not found")
+    filters = category.filters or []
+    if filter is not None:
+        filters = [f for f in filters if f.name == filter]
+        if not filters:
+            raise HTTPException(status_code=404, detail="Filter not found")
+    bits = evaluate_filters(store, filters)
+    return query_response(store, bits, offset, limit, sort, facets)
 
 
-@app.get("/stream/{item_id}")
-def stream_content(item_id: str):
-    """Redirect to the streaming video URL for the content item."""
-    for item in content_items:
-        if item.id == item_id:
-            return RedirectResponse(item.video_url)
-    raise HTTPException(status_code=404, detail="Content item not found")
+@app.api_route("/stream/{item_id}", methods=["GET", "HEAD"])
+def stream_content(item_id: str, request: Request):
+    """Stream the item's local video file (with Range support), or redirect to its video URL."""
+    item = catalog.get(item_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Content item not found")
+    if item.video_file:
+        return local_media(item.video_file, request)
+    return RedirectResponse(item.video_url)
 
 
-@app.get("/download/{item_id}")
-def download_content(item_id: str):
-    """Redirect to the download URL or fallback to video URL."""
-    for item in content_items:
-        if item.id == item_id:
-            if item.download_url:
-                return RedirectResponse(item.download_url)
-            else:
-                return RedirectResponse(item.video_url)
-    raise HTTPException(status_code=404, detail="Content item not found")
+@app.api_route("/download/{item_id}", methods=["GET", "HEAD"])
+def download_content(item_id: str, request: Request):
+    """Send the local video file as an attachment, or redirect to the download URL or video URL."""
+    item = catalog.get(item_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Content item not found")
+    if item.video_file:
+        return local_media(item.video_file, request, attachment=True)
+    if item.download_url:
+        return RedirectResponse(item.download_url)
+    return RedirectResponse(item.video_url)
+
+
+def local_media(video_file: str, request: Request, attachment: bool = False) -> FileRangeResponse:
+    path = media_path(video_file)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Media file not found")
+    return FileRangeResponse(path, request.headers, filename=path.name if attachment else None)
+
+
+@app.get("/images/{item_id}/{size}")
+async def item_image(item_id: str, size: str, request: Request, v: Optional[str] = None):
+    """The item's poster at a TMDB-style size (w92, w185, w342, w500 or original), via the disk cache.
+
+    Links carrying ?v= with the poster's current version are cached by clients
+    as immutable. Without a cache configured, or if the origin fails, this
+    redirects to poster_url.
+    """
+    item = catalog.get(item_id)
+    if item is None or size not in IMAGE_SIZES:
+        raise HTTPException(status_code=404, detail="Image not found")
+    url = str(item.poster_url)
+    if images is None:
+        return RedirectResponse(url)
+    try:
+        path = await images.get(url, size)
+    except ImageUnavailable as e:
+        print(f"Image proxy falling back to origin: {e}")
+        return RedirectResponse(url)
+    immutable = v == image_version(url)
+    cache_control = "public, max-age=31536000, immutable" if immutable else f"public, max-age={IMAGE_MAX_AGE}"
+    etag = f'"{path.name}"'  # content-addressed, so the name changes whenever the bytes do
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    mime = await anyio.to_thread.run_sync(media_type, path)  # may open the file to sniff its format
+    return FileResponse(path, media_type=mime, headers={"ETag": etag, "Cache-Control": cache_control})
 
 
 @app.get("/tmdb/search")
-def tmdb_search(query: str, media_type: str = "movie"):
+async def tmdb_search(query: str, media_type: str = "movie"):
     """Search TMDB for movies or TV shows."""
-    client = TMDBClient()
+    client, _ = upstream_clients()
     try:
-        results = client.search(query, media_type)
+        results = await client.search(query, media_type)
         return {"results": results}
+    except UpstreamUnavailable as e:
+        retry_after = str(int(client.upstream.breaker.reset_timeout))
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": retry_after})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/omdb/search")
-def omdb_search(title: str):
+async def omdb_search(title: str):
     """Search OMDB for movies by title."""
-    from app.omdb_client import OMDBClient
-    client = OMDBClient()
+    _, client = upstream_clients()
     try:
-        results = client.search(title)
+        results = await client.search(title)
         return {"results": results}
+    except UpstreamUnavailable as e:
+        retry_after = str(int(client.upstream.breaker.reset_timeout))
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": retry_after})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
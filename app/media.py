@@ -0,0 +1,144 @@
+"""Local media files for Mac Flix, served with HTTP range support.
+
+Items with a video_file are streamed from MACFLIX_MEDIA_DIR instead of
+redirecting to video_url. Responses honour Range (one byte range per
+request; multi-range requests get the whole file), If-Range and
+If-None-Match, with a strong ETag from the file's mtime and size.
+
+Bodies never sit in Python memory whole: servers offering the ASGI
+zero-copy extension get the open file to sendfile() directly, and
+otherwise the file is memory-mapped and sent in CHUNK_SIZE slices, each
+read in a worker thread so a cold page fault never stalls the event loop.
+"""
+
+import mimetypes
+import mmap
+import os
+from email.utils import formatdate
+from pathlib import Path
+from typing import Mapping, Optional, Tuple
+import anyio
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+from app.response_cache import etag_matches
+
+MEDIA_DIR = os.getenv("MACFLIX_MEDIA_DIR", "")  # empty disables local files
+CHUNK_SIZE = int(os.getenv("MACFLIX_MEDIA_CHUNK_KB", "512")) * 1024
+
+
+class RangeNotSatisfiable(ValueError):
+    """A Range header none of whose bytes lie inside the file."""
+
+
+def media_path(relative: str) -> Optional[Path]:
+    """The file under MEDIA_DIR for an item's video_file, or None if missing or outside it."""
+    if not MEDIA_DIR:
+        return None
+    root = Path(MEDIA_DIR).resolve()
+    path = (root / relative).resolve()
+    if not path.is_relative_to(root) or not path.is_file():
+        return None
+    return path
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """The inclusive (first, last) byte of a single-range Range header.
+
+    None means serve the whole file: no header, a malformed one or several
+    ranges (which RFC 9110 lets a server ignore).
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash or not (first or last).isdigit() or (last and not last.isdigit()):
+        return None
+    if not first:  # suffix range: the last N bytes
+        if int(last) == 0:
+            raise RangeNotSatisfiable(header)
+        return max(0, size - int(last)), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and end < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    return start, min(end, size - 1)
+
+
+class FileRangeResponse(Response):
+    """A whole-file, 206 partial, 304 or 416 response for a local file."""
+
+    def __init__(self, path: Path, headers: Mapping[str, str], filename: Optional[str] = None):
+        stat = os.stat(path)
+        self.path = path
+        size = stat.st_size
+        etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+        last_modified = formatdate(stat.st_mtime, usegmt=True)
+        response_headers = {
+            "accept-ranges": "bytes",
+            "etag": etag,
+            "last-modified": last_modified,
+        }
+        if filename:
+            response_headers["content-disposition"] = f'attachment; filename="{filename}"'
+        self.media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        self.background = None
+        self.body = b""
+        self.start, self.length = 0, 0
+
+        if etag_matches(headers.get("if-none-match"), etag):
+            self.status_code = 304
+            self.init_headers(response_headers)
+            return
+        requested = headers.get("range")
+        if_range = headers.get("if-range")
+        if if_range and if_range.strip() not in (etag, last_modified):
+            requested = None  # the file changed since the client's partial copy: send it all
+        try:
+            byte_range = parse_range(requested, size)
+        except RangeNotSatisfiable:
+            self.status_code = 416
+            response_headers["content-range"] = f"bytes */{size}"
+            self.init_headers(response_headers)
+            return
+        if byte_range is None:
+            self.status_code = 200
+            self.start, self.length = 0, size
+        else:
+            self.status_code = 206
+            self.start, self.length = byte_range[0], byte_range[1] - byte_range[0] + 1
+            response_headers["content-range"] = f"bytes {byte_range[0]}-{byte_range[1]}/{size}"
+        response_headers["content-length"] = str(self.length)
+        self.init_headers(response_headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"] == "HEAD" or not self.length:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        with open(self.path, "rb") as file:
+            if "http.response.zerocopy" in scope.get("extensions", {}):
+                await send({"type": "http.response.zerocopy", "file": file, "offset": self.start, "count": self.length})
+                return
+            async with anyio.create_task_group() as tasks:
+                async def stop_on_disconnect():
+                    while (await receive())["type"] != "http.disconnect":
+                        pass
+                    tasks.cancel_scope.cancel()
+
+                tasks.start_soon(stop_on_disconnect)
+                await self._send_mapped(file, send)
+                tasks.cancel_scope.cancel()
+
+    async def _send_mapped(self, file, send: Send) -> None:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, "madvise"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            end = self.start + self.length
+            for offset in range(self.start, end, CHUNK_SIZE):
+                chunk = await anyio.to_thread.run_sync(mapped.__getitem__, slice(offset, min(offset + CHUNK_SIZE, end)))
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
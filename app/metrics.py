@@ -0,0 +1,202 @@
+"""Prometheus metrics for Mac Flix, served in the text exposition format at /metrics.
+
+Metrics are plain in-process counters, gauges and histograms (no client
+library), updated by MetricsMiddleware for every request, by app.resilience
+for every upstream call and by app.main for catalog loads. Cache and catalog
+sizes are copied in when /metrics is scraped, so the hot paths never touch
+them. Each uvicorn worker keeps its own values and a scrape reaches one of
+them; run one worker per port to scrape them all.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+UPSTREAM_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LOAD_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+_registry: list = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    """A named metric with fixed label names; values are kept per tuple of label values."""
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set(self, value: float, *labels) -> None:
+        """Set a value; for counters, mirror a total that is counted elsewhere."""
+        self._values[labels] = value
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.labels, labels)} {_number(value)}"
+
+
+class Counter(Metric):
+    kind = "counter"
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def dec(self, *labels) -> None:
+        self.inc(*labels, amount=-1.0)
+
+
+class Histogram(Metric):
+    """Observations counted into fixed buckets, plus their sum and count."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple, list] = {}  # labels -> [count per bucket..., +Inf count, sum]
+
+    def observe(self, value: float, *labels) -> None:
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[slot] += 1
+            series[-1] += value
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            snapshot = sorted((labels, list(series)) for labels, series in self._series.items())
+        names = self.labels + ("le",)
+        for labels, series in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                yield f"{self.name}_bucket{_labels(names, labels + (_number(bound),))} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, labels)} {_number(series[-1])}"
+            yield f"{self.name}_count{_labels(self.labels, labels)} {cumulative}"
+
+
+def render() -> str:
+    """All metrics in the Prometheus text format."""
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+HTTP_DURATION = Histogram(
+    "macflix_http_request_duration_seconds", "Time to serve a request, until its body is sent.", ("method", "route")
+)
+HTTP_REQUESTS = Counter("macflix_http_requests_total", "Requests served.", ("method", "route", "status"))
+HTTP_IN_FLIGHT = Gauge("macflix_http_requests_in_flight", "Requests being served.", ("method",))
+UPSTREAM_DURATION = Histogram(
+    "macflix_upstream_request_duration_seconds",
+    "Upstream API calls, including queueing, rate limiting and retries.",
+    ("client", "method"),
+    UPSTREAM_BUCKETS,
+)
+UPSTREAM_ERRORS = Counter(
+    "macflix_upstream_errors_total",
+    "Failed upstream attempts by reason: HTTP status, transport, circuit_open or bulkhead_full.",
+    ("client", "method", "reason"),
+)
+CATALOG_LOAD = Histogram(
+    "macflix_catalog_load_duration_seconds", "Catalog loads and reloads.", ("kind",), LOAD_BUCKETS,
+)
+INDEX_BUILD = Histogram(
+    "macflix_index_build_duration_seconds", "Background search, suggest and similar index builds.", ("index",),
+    LOAD_BUCKETS,
+)
+CATALOG_RELOADS = Counter("macflix_catalog_reloads_total", "Catalog reloads by outcome.", ("outcome",))
+CATALOG_CHANGES = Counter("macflix_catalog_reload_items_total", "Items changed by reloads.", ("change",))
+CATALOG_ITEMS = Gauge("macflix_catalog_items", "Items in the live catalog.")
+CACHE_HITS = Counter("macflix_cache_hits_total", "Cache lookups answered from the cache.", ("cache",))
+CACHE_MISSES = Counter("macflix_cache_misses_total", "Cache lookups that had to load the value.", ("cache",))
+CACHE_HIT_RATIO = Gauge("macflix_cache_hit_ratio", "Hits over all lookups since startup.", ("cache",))
+CACHE_ENTRIES = Gauge("macflix_cache_entries", "Entries or files held by a cache.", ("cache",))
+CACHE_BYTES = Gauge("macflix_cache_bytes", "Bytes held by an on-disk cache.", ("cache",))
+
+
+def record_cache(name: str, hits: int, misses: int, entries: int, size: Optional[int] = None) -> None:
+    """Copy a cache's own counters into the cache metrics."""
+    CACHE_HITS.set(hits, name)
+    CACHE_MISSES.set(misses, name)
+    CACHE_ENTRIES.set(entries, name)
+    if size is not None:
+        CACHE_BYTES.set(size, name)
+    if hits + misses:
+        CACHE_HIT_RATIO.set(hits / (hits + misses), name)
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each request under its route template (e.g. /content/{item_id}).
+
+    Requests that match no route are counted as "unmatched", so unknown
+    paths cannot create unbounded label values.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec(method)
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            HTTP_DURATION.observe(elapsed, method, path)
+            HTTP_REQUESTS.inc(method, path, status)
@@ -20,6 +20,7 @@ class ContentItem(BaseModel):
     language: Optional[str] = None
     video_url: HttpUrl
     download_url: Optional[HttpUrl] = None
+    video_file: Optional[str] = None  # path under MACFLIX_MEDIA_DIR, streamed locally instead of video_url
 
 class Filter(BaseModel):
     """A filter within a category."""
@@ -36,6 +37,65 @@ class CategoryConfig(BaseModel):
     """Categories and filters config."""
     categories: List[Category]
 
+class ContentQueryResult(BaseModel):
+    """A page of filtered content with facet counts."""
+    total: int
+    offset: int
+    limit: int
+    items: List[ContentItem]
+    facets: Optional[Dict[str, Dict[str, int]]] = None
+
+class Suggestion(BaseModel):
+    """An autocomplete entry: a title (with its item id) or a person's name."""
+    text: str
+    kind: Literal["title", "person"]
+    id: Optional[str] = None
+
+class FederatedHit(BaseModel):
+    """A title found by /search/federated, merged across the sources that returned it."""
+    id: str  # catalog id when in the catalog, else the IMDb id, else tmdb:{type}:{id}
+    title: str
+    year: Optional[int] = None
+    type: Optional[str] = None  # movie, tv, or the upstream's own kind
+    imdb_id: Optional[str] = None
+    tmdb_id: Optional[int] = None
+    poster_url: Optional[str] = None
+    rating: Optional[float] = None
+    in_catalog: bool = False
+    sources: List[str] = []
+    score: float = 0.0
+
+class FederatedSearchResult(BaseModel):
+    """Merged results of a federated search, and how each source fared."""
+    query: str
+    results: List[FederatedHit]
+    sources: Dict[str, Literal["ok", "timeout", "unavailable", "error", "disabled"]]
+    partial: bool  # some source did not answer in time or failed
+
+class HomeCard(BaseModel):
+    """The fields of a content item that a home-page card shows."""
+    id: str
+    title: str
+    type: Literal["movie", "tv"]
+    year: int
+    genres: List[str]
+    description: str
+    rating: Optional[float] = None
+    poster_url: HttpUrl
+    trailer_url: Optional[HttpUrl] = None
+
+class HomeRow(BaseModel):
+    """One home-page row: the best-rated items of a category filter."""
+    category: str
+    filter: Optional[str] = None  # None for a category without filters
+    total: int
+    items: List[HomeCard]
+
+class HomePage(BaseModel):
+    """Every home-page row, as served by /home."""
+    row_size: int
+    rows: List[HomeRow]
+
 class SecretsConfig(BaseModel):
     """API keys and secrets."""
     tmdb_api_key: str
@@ -1,47 +1,123 @@
 """OMDB API client for Mac Flix."""
 
 import os
+from typing import NamedTuple, Optional
+import httpx
 import requests
+from app.cache import UPSTREAM_CACHE_STALE_TTL, TTLCache, normalize_query
+from app.disk_cache import DiskCache, aload_through, load_through
+from app.http_client import HTTP_TIMEOUT
+from app.resilience import Upstream, UpstreamUnavailable
 
 OMDB_API_KEY = os.getenv("OMDB_API_KEY", "")
-OMDB_BASE_URL = "http://www.omdbapi.com/"
+OMDB_BASE_URL = os.getenv("OMDB_BASE_URL", "http://www.omdbapi.com/")
+OMDB_TYPES = {"movie": "movie", "tv": "series"}  # catalog media type -> OMDB's type parameter
 
-class OMDBClient:
-    def __init__(self, api_key: str = OMDB_API_KEY):
-        self.api_key = api_key
+def parse_response(resp, operation: str, empty):
+    """Return OMDB's JSON body, logging and raising on HTTP errors.
 
-    def search(self, title: str):
-        """Search OMDB for movies by title."""
-        params = {"apikey": self.api_key, "s": title}
-        resp = requests.get(OMDB_BASE_URL, params=params)
+    OMDB reports misses with Response="False" and HTTP 200; those return `empty`.
+    """
+    if resp.status_code >= 400:
         try:
-            resp.raise_for_status()
-        except requests.HTTPError as e:
-            try:
-                print(f"OMDB API error (search): {resp.json().get('Error')}")
-            except Exception:
-                print(f"OMDB API error (search): {resp.text}")
-            raise e
-        data = resp.json()
-        if data.get("Response") == "False":
-            print(f"OMDB API error (search): {data.get('Error')}")
-            return []
-        return data.get("Search", [])
+            print(f"OMDB API error ({operation}): {resp.json().get('Error')}")
+        except Exception:
+            print(f"OMDB API error ({operation}): {resp.text}")
+    resp.raise_for_status()
+    data = resp.json()
+    if data.get("Response") == "False":
+        print(f"OMDB API error ({operation}): {data.get('Error')}")
+        return empty
+    return data
+
+class OMDBRequest(NamedTuple):
+    """One cached OMDB call: its cache key and the GET parameters that fetch it."""
+    key: tuple
+    params: dict
+    operation: str
+
+class BaseOMDBClient:
+    """What the sync and async OMDB clients share: configuration, cache keys and
+    request parameters. Subclasses only send the requests.
+
+    Results are cached in memory and, if given, on disk (app.disk_cache).
+    Requests go through an Upstream (app.resilience); while OMDB is
+    unavailable, recently expired cached results are served instead.
+    """
+
+    def __init__(self, api_key: str = OMDB_API_KEY, base_url: str = OMDB_BASE_URL, cache: TTLCache | None = None,
+                 disk: DiskCache | None = None, upstream: Upstream | None = None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.cache = TTLCache(stale_ttl=UPSTREAM_CACHE_STALE_TTL) if cache is None else cache
+        self.disk = disk
+        self.upstream = upstream or Upstream.from_env("omdb")
+
+    def _request(self, key: tuple, params: dict, operation: str) -> OMDBRequest:
+        return OMDBRequest(key, {"apikey": self.api_key, **params}, operation)
+
+    def _search_request(self, title: str, media_type: Optional[str] = None) -> OMDBRequest:
+        if media_type is None:
+            return self._request(("omdb", "search", normalize_query(title)), {"s": title}, "search")
+        key = ("omdb", "search", media_type, normalize_query(title))
+        return self._request(key, {"s": title, "type": OMDB_TYPES[media_type]}, "search")
+
+    def _details_request(self, imdb_id: str) -> OMDBRequest:
+        return self._request(("omdb", "details", imdb_id), {"i": imdb_id, "plot": "full"}, "get_details")
+
+class OMDBClient(BaseOMDBClient):
+    """OMDB client over a requests.Session, for scripts and threads."""
+
+    def __init__(self, api_key: str = OMDB_API_KEY, session: requests.Session | None = None,
+                 base_url: str = OMDB_BASE_URL, cache: TTLCache | None = None, disk: DiskCache | None = None,
+                 upstream: Upstream | None = None):
+        super().__init__(api_key, base_url, cache, disk, upstream)
+        self.session = session or requests.Session()
+
+    def search(self, title: str, media_type: Optional[str] = None):
+        """Search OMDB by title, for one media type ("movie" or "tv") or all of them."""
+        return self._fetch(self._search_request(title, media_type)).get("Search", [])
 
     def get_details(self, imdb_id: str):
         """Get OMDB details by IMDb ID."""
-        params = {"apikey": self.api_key, "i": imdb_id, "plot": "full"}
-        resp = requests.get(OMDB_BASE_URL, params=params)
-        try:
-            resp.raise_for_status()
-        except requests.HTTPError as e:
-            try:
-                print(f"OMDB API error (get_details): {resp.json().get('Error')}")
-            except Exception:
-                print(f"OMDB API error (get_details): {resp.text}")
-            raise e
-        data = resp.json()
-        if data.get("Response") == "False":
-            print(f"OMDB API error (get_details): {data.get('Error')}")
-            return {}
-        return data
+        return self._fetch(self._details_request(imdb_id))
+
+    def _fetch(self, request: OMDBRequest):
+        def fetch():
+            resp = self.upstream.call_sync(
+                lambda: self.session.get(self.base_url, params=request.params, timeout=HTTP_TIMEOUT), request.operation
+            )
+            return parse_response(resp, request.operation, {})
+
+        refreshed = lambda value: self.cache.set(request.key, value)
+        return self.cache.get_or_load(
+            request.key, lambda: load_through(self.disk, request.key, "omdb", fetch, refreshed),
+            stale_on=(UpstreamUnavailable,),
+        )
+
+class AsyncOMDBClient(BaseOMDBClient):
+    """OMDB client for async handlers, sharing one pooled httpx.AsyncClient."""
+
+    def __init__(self, http: httpx.AsyncClient, api_key: str = OMDB_API_KEY, base_url: str = OMDB_BASE_URL,
+                 cache: TTLCache | None = None, disk: DiskCache | None = None, upstream: Upstream | None = None):
+        super().__init__(api_key, base_url, cache, disk, upstream)
+        self.http = http
+
+    async def search(self, title: str, media_type: Optional[str] = None):
+        """Search OMDB by title, for one media type ("movie" or "tv") or all of them."""
+        return (await self._fetch(self._search_request(title, media_type))).get("Search", [])
+
+    async def get_details(self, imdb_id: str):
+        """Get OMDB details by IMDb ID."""
+        return await self._fetch(self._details_request(imdb_id))
+
+    async def _fetch(self, request: OMDBRequest):
+        async def fetch():
+            resp = await self.upstream.call(lambda: self.http.get(self.base_url, params=request.params), request.operation)
+            return parse_response(resp, request.operation, {})
+
+        refreshed = lambda value: self.cache.set(request.key, value)
+        return await self.cache.aget_or_load(
+            request.key, lambda: aload_through(self.disk, request.key, "omdb", fetch, refreshed),
+            stale_on=(UpstreamUnavailable,),
+        )
@@ -0,0 +1,139 @@
+"""Opt-in sampling profiler for single Mac Flix requests.
+
+With MACFLIX_PROFILE_DIR set, a request carrying `X-Profile: 1` (and the
+X-Admin-Token, when one is configured) is profiled: a background thread
+samples the stacks of the event loop thread and of busy worker threads
+every MACFLIX_PROFILE_INTERVAL_MS, and the samples are written to the
+directory in collapsed-stack format (`frame;frame;frame count` per line),
+which flamegraph.pl, inferno and speedscope turn into flamegraphs. The
+response names the file in its X-Profile header.
+
+Sampling costs nothing until a request asks for it, and one request is
+profiled at a time per worker. Requests running concurrently on the same
+worker show up in the samples too, so profile on a quiet worker for a
+clean picture.
+"""
+
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PROFILE_DIR = os.getenv("MACFLIX_PROFILE_DIR", "")  # empty disables the X-Profile header
+PROFILE_INTERVAL_MS = float(os.getenv("MACFLIX_PROFILE_INTERVAL_MS", "5"))
+WORKER_THREAD_PREFIX = "AnyIO worker thread"  # threads running sync endpoints
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _stack(frame) -> list:
+    """Frames from outermost to innermost."""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+def _idle_worker(frames: list) -> bool:
+    # An idle pool thread sits in Queue.get() right under its run loop.
+    for outer, inner in zip(frames, frames[1:]):
+        if outer.f_code.co_name == "run" and inner.f_code.co_name == "get" and \
+                inner.f_code.co_filename.endswith("queue.py"):
+            return True
+    return False
+
+
+class Sampler(threading.Thread):
+    """Counts collapsed stacks of the loop thread and busy worker threads until stopped."""
+
+    def __init__(self, loop_thread: int, interval: float = PROFILE_INTERVAL_MS / 1000):
+        super().__init__(name="profiler", daemon=True)
+        self.loop_thread = loop_thread
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        while not self._done.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        workers = {t.ident for t in threading.enumerate() if t.name.startswith(WORKER_THREAD_PREFIX)}
+        for ident, frame in sys._current_frames().items():
+            if ident == self.loop_thread:
+                root = "event-loop"
+            elif ident in workers:
+                root = "worker-thread"
+            else:
+                continue
+            frames = _stack(frame)
+            if root == "worker-thread" and _idle_worker(frames):
+                continue
+            self.stacks[";".join([root] + [_frame_name(f) for f in frames])] += 1
+        self.samples += 1
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+
+    def write(self, path: Path) -> None:
+        with open(path, "w") as out:
+            for stack, count in self.stacks.most_common():
+                out.write(f"{stack} {count}\n")
+
+
+class ProfileMiddleware:
+    """ASGI middleware profiling requests that ask for it with an X-Profile header and the admin token."""
+
+    def __init__(self, app: ASGIApp, directory: str = PROFILE_DIR, token: str = ""):
+        self.app = app
+        self.directory = Path(directory) if directory else None
+        self.token = token
+        self._busy = threading.Lock()
+        self._ids = itertools.count(1)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.directory is None or scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, self._with_header(send, "busy"))
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            name = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{next(self._ids)}.folded"
+            sampler = Sampler(threading.get_ident())
+            sampler.start()
+            try:
+                await self.app(scope, receive, self._with_header(send, name))
+            finally:
+                sampler.stop()
+                sampler.write(self.directory / name)
+        finally:
+            self._busy.release()
+
+    def _requested(self, scope: Scope) -> bool:
+        headers = Headers(scope=scope)
+        if headers.get("x-profile", "") not in ("1", "true"):
+            return False
+        return bool(self.token) and headers.get("x-admin-token") == self.token  # no token, no profiling
+
+    @staticmethod
+    def _with_header(send: Send, value: str) -> Send:
+        async def send_with_header(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile", value.encode())]}
+            await send(message)
+
+        return send_with_header
@@ -0,0 +1,49 @@
+"""Token-bucket rate limiting for Mac Flix upstream API calls."""
+
+import asyncio
+import threading
+import time
+from typing import Callable
+
+
+class TokenBucket:
+    """Allow `rate` calls per second on average, with bursts of up to `burst`.
+
+    acquire() (asyncio) and acquire_blocking() (threads) wait until a token is
+    available, so sync and async callers can share one budget.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(1.0, rate if burst is None else burst)
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        """Take a token and return 0, or return the seconds until one is available."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available right now."""
+        return self._take() == 0.0
+
+    async def acquire(self) -> None:
+        """Wait for and take one token."""
+        while (wait := self._take()) > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_blocking(self) -> None:
+        """Block the calling thread until a token is taken."""
+        while (wait := self._take()) > 0:
+            time.sleep(wait)
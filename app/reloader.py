@@ -0,0 +1,60 @@
+"""Config file watcher that triggers catalog hot reloads for Mac Flix."""
+
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+
+def file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    """Cheap change marker for a file: (mtime_ns, size), or None if missing."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class ConfigWatcher:
+    """Polls config files and calls `on_change` when any of them changes.
+
+    Polling a couple of stat() calls is cheap and needs no extra dependency;
+    the callback decides (by content digest) whether anything really changed.
+    """
+
+    def __init__(self, paths: Iterable[Path], on_change: Callable[[], None], interval: float = 2.0):
+        self.paths = list(paths)
+        self.on_change = on_change
+        self.interval = interval
+        self._signatures: Dict[Path, Optional[Tuple[int, int]]] = {p: file_signature(p) for p in self.paths}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self) -> bool:
+        """Check the files once; call on_change and return True if any changed."""
+        current = {p: file_signature(p) for p in self.paths}
+        if current == self._signatures:
+            return False
+        self._signatures = current
+        self.on_change()
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Config reload failed: {e}")
+
+    def start(self):
+        """Start polling in a daemon thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop polling and wait for the thread to exit."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
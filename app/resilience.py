@@ -0,0 +1,251 @@
+"""Resilience for Mac Flix upstream calls: rate limit, retries, circuit breaker and bulkhead.
+
+Every TMDB or OMDB request goes through an Upstream, which:
+
+- takes a token from a client-side TokenBucket, so we stay under the quota;
+- holds a slot of a per-upstream concurrency limit (the bulkhead), so a slow
+  upstream cannot tie up more than its share of connections and workers;
+- retries 429, 5xx and transport errors a bounded number of times with
+  jittered exponential backoff (honouring Retry-After);
+- fails fast through a circuit breaker once calls keep failing, so callers
+  can serve stale cached data instead of waiting on timeouts.
+
+Every call is timed and its failed attempts counted in app.metrics,
+labelled by client (e.g. TMDBClient) and method.
+
+Limits are read from MACFLIX_<NAME>_* environment variables (see from_env).
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Awaitable, Callable, NamedTuple, Optional
+import httpx
+import requests
+from app.metrics import UPSTREAM_DURATION, UPSTREAM_ERRORS
+from app.ratelimit import TokenBucket
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class UpstreamUnavailable(Exception):
+    """The upstream is failing or shedding load; cached data may be served instead."""
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    """Raised without calling upstream while the circuit breaker is open."""
+
+
+class BulkheadFullError(UpstreamUnavailable):
+    """Raised when no concurrency slot for the upstream frees up in time."""
+
+
+class RetryPolicy(NamedTuple):
+    """Bounded retries with full-jitter exponential backoff."""
+    attempts: int = 3
+    base_delay: float = 0.2  # seconds
+    max_delay: float = 2.0
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Seconds to wait before retry number `attempt` (1-based)."""
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failed calls and stays open for
+    `reset_timeout` seconds; then lets one trial call through (half-open),
+    which closes it on success or re-opens it on failure.
+    """
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def before_call(self) -> bool:
+        """Raise CircuitOpenError unless a call may go upstream now.
+
+        Returns whether this call took the half-open trial slot; only that
+        call should hand it back with release_trial().
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            if self._clock() - self._opened_at >= self.reset_timeout and not self._trial:
+                self._trial = True  # exactly one trial call while half-open
+                return True
+        raise CircuitOpenError("Circuit open, upstream recently failing")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def release_trial(self) -> None:
+        """Free the half-open trial slot if the call ended without an outcome (e.g. cancelled)."""
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.threshold:
+                self._opened_at = self._clock()
+            self._trial = False
+
+
+class Upstream:
+    """Rate limit, bulkhead, retries and circuit breaker for one upstream API."""
+
+    def __init__(
+        self,
+        name: str,
+        limiter: Optional[TokenBucket] = None,
+        max_concurrency: int = 20,
+        queue_timeout: Optional[float] = 1.0,  # seconds to wait for a slot; None waits indefinitely
+        retry: RetryPolicy = RetryPolicy(),
+        breaker: Optional[CircuitBreaker] = None,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        self.name = name
+        self.client = f"{name.upper()}Client"  # metrics label
+        self.limiter = limiter
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.retry = retry
+        self.breaker = breaker or CircuitBreaker()
+        self._sleep = sleep
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._thread_slots = threading.BoundedSemaphore(max_concurrency)
+
+    @classmethod
+    def from_env(cls, name: str, **overrides) -> "Upstream":
+        """Build an Upstream configured by MACFLIX_<NAME>_RATE, _BURST, _CONCURRENCY,
+        _RETRIES, _BREAKER_THRESHOLD and _BREAKER_RESET (rate 0 disables limiting)."""
+        def env(suffix, default):
+            return float(os.getenv(f"MACFLIX_{name.upper()}_{suffix}", default))
+
+        rate = env("RATE", 20)
+        settings = {
+            "limiter": TokenBucket(rate, env("BURST", 2 * rate)) if rate > 0 else None,
+            "max_concurrency": int(env("CONCURRENCY", 20)),
+            "retry": RetryPolicy(attempts=int(env("RETRIES", 3))),
+            "breaker": CircuitBreaker(int(env("BREAKER_THRESHOLD", 5)), env("BREAKER_RESET", 30)),
+        }
+        settings.update(overrides)
+        return cls(name, **settings)
+
+    async def call(self, send: Callable[[], Awaitable[httpx.Response]], method: str = "request") -> httpx.Response:
+        """Send a request (send() is called once per attempt) under all the protections."""
+        start = time.perf_counter()
+        if not await self._acquire_slot():
+            UPSTREAM_ERRORS.inc(self.client, method, "bulkhead_full")
+            raise BulkheadFullError(f"{self.name}: {self.max_concurrency} calls already in flight")
+        try:
+            trial = self._before_call(method)
+            try:
+                for attempt in range(1, self.retry.attempts + 1):
+                    if self.limiter is not None:
+                        await self.limiter.acquire()
+                    try:
+                        resp = await send()
+                    except httpx.TransportError as e:
+                        UPSTREAM_ERRORS.inc(self.client, method, "transport")
+                        error, retry_after = e, None
+                    else:
+                        if self._answered(resp.status_code, method):
+                            return resp
+                        error, retry_after = f"HTTP {resp.status_code}", resp.headers.get("retry-after")
+                    if attempt < self.retry.attempts:
+                        await self._sleep(self.retry.delay(attempt, retry_after))
+                self.breaker.record_failure()
+                raise UpstreamUnavailable(f"{self.name} failed after {self.retry.attempts} attempts: {error}")
+            finally:
+                if trial:
+                    self.breaker.release_trial()
+        finally:
+            self._slots.release()
+            UPSTREAM_DURATION.observe(time.perf_counter() - start, self.client, method)
+
+    def call_sync(self, send: Callable[[], requests.Response], method: str = "request") -> requests.Response:
+        """Blocking variant of call() for the requests-based clients."""
+        start = time.perf_counter()
+        if not self._thread_slots.acquire(timeout=self.queue_timeout):
+            UPSTREAM_ERRORS.inc(self.client, method, "bulkhead_full")
+            raise BulkheadFullError(f"{self.name}: {self.max_concurrency} calls already in flight")
+        try:
+            trial = self._before_call(method)
+            try:
+                for attempt in range(1, self.retry.attempts + 1):
+                    if self.limiter is not None:
+                        self.limiter.acquire_blocking()
+                    try:
+                        resp = send()
+                    except (requests.ConnectionError, requests.Timeout) as e:
+                        UPSTREAM_ERRORS.inc(self.client, method, "transport")
+                        error, retry_after = e, None
+                    else:
+                        if self._answered(resp.status_code, method):
+                            return resp
+                        error, retry_after = f"HTTP {resp.status_code}", resp.headers.get("retry-after")
+                    if attempt < self.retry.attempts:
+                        time.sleep(self.retry.delay(attempt, retry_after))
+                self.breaker.record_failure()
+                raise UpstreamUnavailable(f"{self.name} failed after {self.retry.attempts} attempts: {error}")
+            finally:
+                if trial:
+                    self.breaker.release_trial()
+        finally:
+            self._thread_slots.release()
+            UPSTREAM_DURATION.observe(time.perf_counter() - start, self.client, method)
+
+    async def _acquire_slot(self) -> bool:
+        """Take a bulkhead slot, waiting up to queue_timeout; False if none freed up in time.
+
+        The acquire is shielded, so a slot it takes just as the wait times out
+        or the caller is cancelled is kept or handed back rather than leaked.
+        """
+        acquire = asyncio.ensure_future(self._slots.acquire())
+        try:
+            await asyncio.wait_for(asyncio.shield(acquire), self.queue_timeout)
+        except asyncio.TimeoutError:
+            return not acquire.cancel()  # cancel() fails once the slot is ours
+        except asyncio.CancelledError:
+            if not acquire.cancel():
+                self._slots.release()
+            raise
+        return True
+
+    def _before_call(self, method: str) -> bool:
+        try:
+            return self.breaker.before_call()
+        except CircuitOpenError:
+            UPSTREAM_ERRORS.inc(self.client, method, "circuit_open")
+            raise
+
+    def _answered(self, status: int, method: str) -> bool:
+        """Count an error status; True (and a success for the breaker) unless it should be retried."""
+        if status >= 400:
+            UPSTREAM_ERRORS.inc(self.client, method, str(status))
+        if status in RETRY_STATUSES:
+            return False
+        self.breaker.record_success()
+        return True
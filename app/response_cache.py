@@ -0,0 +1,108 @@
+"""Pre-encoded JSON responses with strong ETags for Mac Flix catalog endpoints."""
+
+import hashlib
+import os
+import threading
+from typing import Dict, NamedTuple, Optional
+from pydantic import BaseModel
+from app.catalog import CatalogStore
+from app.models import CategoryConfig
+
+# Per-item encodings kept per worker; the oldest are dropped past this bound.
+ITEM_CACHE_LIMIT = int(os.getenv("MACFLIX_RESPONSE_CACHE_ITEMS", "50000"))
+
+
+class Encoded(NamedTuple):
+    """A JSON response body and its strong ETag."""
+    body: bytes
+    etag: str
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the response bytes."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def encode_model(model: BaseModel) -> Encoded:
+    """Encode a Pydantic model to JSON bytes the way FastAPI would serve it."""
+    body = model.model_dump_json().encode("utf-8")
+    return Encoded(body, make_etag(body))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, per RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+class ResponseCache:
+    """Encoded bodies for one catalog snapshot and categories document.
+
+    Entries are built on first use and never change, because a reload swaps
+    in a new store (and so a new cache) instead of mutating this one.
+    """
+
+    def __init__(
+        self,
+        store: CatalogStore,
+        categories: Optional[CategoryConfig],
+        previous: Optional["ResponseCache"] = None,
+    ):
+        self.store = store
+        self.categories = categories
+        self._items: Dict[str, Encoded] = {}
+        self._all: Optional[Encoded] = None
+        self._categories: Optional[Encoded] = None
+        self._lock = threading.Lock()
+        if previous is not None:
+            # Carry over encodings of items the reload did not touch (none if it cannot tell).
+            changed = store.changed_since(previous.store)
+            if changed is not None:
+                for item_id, encoded in list(previous._items.items()):
+                    ordinal = store.ordinal(item_id)
+                    if ordinal is not None and ordinal not in changed:
+                        self._items[item_id] = encoded
+            if previous.store is store:
+                self._all = previous._all
+            if previous.categories is categories:
+                self._categories = previous._categories
+
+    @property
+    def all_items_etag(self) -> str:
+        """ETag of the full list, known without encoding it."""
+        return f'"{self.store.version}"'
+
+    def item(self, item_id: str) -> Optional[Encoded]:
+        """Encoded item by ID, or None if it is not in the catalog."""
+        encoded = self._items.get(item_id)
+        if encoded is None:
+            body = self.store.item_json(item_id)
+            if body is None:
+                return None
+            encoded = Encoded(body, make_etag(body))
+            if len(self._items) >= ITEM_CACHE_LIMIT:
+                try:
+                    del self._items[next(iter(self._items))]
+                except (KeyError, StopIteration, RuntimeError):
+                    pass  # another thread evicted first
+            self._items[item_id] = encoded
+        return encoded
+
+    def all_items(self) -> Encoded:
+        """Encoded list of every item in the catalog."""
+        if self._all is None:
+            with self._lock:
+                if self._all is None:
+                    body = b"[" + b",".join(self.store.iter_json()) + b"]"
+                    self._all = Encoded(body, self.all_items_etag)
+        return self._all
+
+    def categories_doc(self) -> Encoded:
+        """Encoded categories document."""
+        if self._categories is None:
+            self._categories = encode_model(self.categories)
+        return self._categories
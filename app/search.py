@@ -0,0 +1,268 @@
+"""In-process full-text search over the Mac Flix catalog.
+
+An inverted index over title, cast, director, genres and description maps
+each term to its postings: item ordinals with a BM25 term weight, kept in
+ascending weight order so a query reads only the best `SEARCH_CHAMPIONS`
+entries of each term (champion lists) instead of every item containing it.
+Field weights make a title match count for more than a description match.
+
+The last query word is also matched as a prefix (search-as-you-type), and
+words missing from the vocabulary are corrected to terms within a small
+edit distance, found through a trigram index over the vocabulary.
+
+An index is never mutated once built: updated() derives a new one with
+changed items re-indexed, as CatalogStore.apply_changes does for its
+bitsets. Document frequencies and the item count stay exact; the average
+document length is fixed when the index is first built.
+"""
+
+import heapq
+import math
+import os
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Mapping, NamedTuple, Tuple
+
+SEARCH_CHAMPIONS = int(os.getenv("MACFLIX_SEARCH_CHAMPIONS", "1000"))  # postings read per query term
+FIELD_WEIGHTS = {"title": 3.0, "cast": 1.5, "director": 1.5, "genres": 1.0, "description": 1.0}
+K1 = 1.2
+B = 0.75
+PREFIX_EXPANSIONS = 8  # most frequent completions of the last word
+PREFIX_WEIGHT = 0.8
+TYPO_MIN_LENGTH = 4  # shorter words are too ambiguous to correct
+TYPO_EXPANSIONS = 3
+EXPANSION_CACHE_SIZE = 10000
+
+_WORD = re.compile(r"\w+")
+
+Postings = Tuple[array, array]  # (ordinals "I", weights "f"), ascending by weight
+
+
+class SearchHits(NamedTuple):
+    """Ranked (ordinal, score) pairs, and how many items were scored (at most
+    SEARCH_CHAMPIONS per matched term)."""
+    total: int
+    ranked: List[Tuple[int, float]]
+
+
+def fold(text: str) -> str:
+    """Lower-case text and strip accents, so "Amélie" matches "amelie"."""
+    text = text.casefold()
+    if not text.isascii():
+        text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    return text
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD.findall(fold(text))
+
+
+def document_terms(fields: Mapping[str, object]) -> Tuple[Dict[str, float], float]:
+    """Field-weighted term frequencies and length of one item's searchable text."""
+    freqs: Dict[str, float] = {}
+    length = 0.0
+    for name, weight in FIELD_WEIGHTS.items():
+        value = fields.get(name)
+        if not value:
+            continue
+        tokens = tokenize(value if isinstance(value, str) else " ".join(value))
+        length += weight * len(tokens)
+        for token in tokens:
+            freqs[token] = freqs.get(token, 0.0) + weight
+    return freqs, length
+
+
+def trigrams(term: str) -> Iterator[str]:
+    padded = f" {term} "
+    return (padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Damerau-Levenshtein (optimal string alignment) distance, or limit + 1 once it exceeds limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+class SearchIndex:
+    """Immutable BM25 inverted index with prefix and typo-tolerant term lookup."""
+
+    def __init__(self, postings: Dict[str, Postings], count: int, avg_length: float):
+        self.count = count
+        self.avg_length = avg_length or 1.0
+        self._postings = postings
+        self._terms = sorted(postings)
+        self._grams: Dict[Tuple[str, int], List[str]] = {}
+        for term in self._terms:
+            self._add_grams(term)
+        self._expansions: Dict[Tuple[str, bool], List[Tuple[str, float]]] = {}
+
+    @classmethod
+    def build(cls, docs: Iterable[Tuple[int, Mapping[str, object]]]) -> "SearchIndex":
+        """Index (ordinal, fields) pairs; fields needs the FIELD_WEIGHTS keys."""
+        collected: Dict[str, Tuple[array, array]] = {}  # term -> (ordinals, frequencies)
+        lengths: Dict[int, float] = {}
+        for ordinal, fields in docs:
+            freqs, lengths[ordinal] = document_terms(fields)
+            for term, freq in freqs.items():
+                entry = collected.get(term)
+                if entry is None:
+                    entry = collected[term] = (array("I"), array("f"))
+                entry[0].append(ordinal)
+                entry[1].append(freq)
+        index = cls({}, len(lengths), sum(lengths.values()) / len(lengths) if lengths else 1.0)
+        for term, (ordinals, freqs) in collected.items():
+            weights = [index.weight(freq, lengths[o]) for o, freq in zip(ordinals, freqs)]
+            order = sorted(range(len(weights)), key=weights.__getitem__)
+            collected[term] = (array("I", [ordinals[i] for i in order]), array("f", [weights[i] for i in order]))
+        return cls(collected, index.count, index.avg_length)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def weight(self, freq: float, length: float) -> float:
+        """BM25 term-frequency saturation; scores multiply it by the term's idf."""
+        return freq * (K1 + 1) / (freq + K1 * (1 - B + B * length / self.avg_length))
+
+    def idf(self, term: str) -> float:
+        df = len(self._postings[term][0])
+        return math.log(1 + (self.count - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, limit: int = 20, prefix: bool = True) -> SearchHits:
+        """Rank items for a query; the last word also matches as a prefix unless the query ends in a space."""
+        words = tokenize(query)
+        as_prefix = prefix and bool(query) and not query[-1].isspace()
+        totals: Dict[int, float] = {}
+        for i, word in enumerate(words):
+            best: Dict[int, float] = {}
+            for term, factor in self._expand(word, as_prefix and i == len(words) - 1):
+                ordinals, weights = self._postings[term]
+                depth = SEARCH_CHAMPIONS if factor == 1.0 else SEARCH_CHAMPIONS // 4
+                scale = self.idf(term) * factor
+                for ordinal, weight in zip(reversed(ordinals[-depth:]), reversed(weights[-depth:])):
+                    score = weight * scale
+                    if score > best.get(ordinal, 0.0):
+                        best[ordinal] = score
+            for ordinal, score in best.items():
+                totals[ordinal] = totals.get(ordinal, 0.0) + score
+        ranked = heapq.nlargest(limit, totals.items(), key=lambda hit: (hit[1], -hit[0]))
+        return SearchHits(len(totals), ranked)
+
+    def _expand(self, word: str, as_prefix: bool) -> List[Tuple[str, float]]:
+        """The indexed terms a query word stands for, each with a score factor."""
+        key = (word, as_prefix)
+        cached = self._expansions.get(key)
+        if cached is not None:
+            return cached
+        terms = [(word, 1.0)] if word in self._postings else []
+        if as_prefix:
+            start = bisect_left(self._terms, word)
+            end = bisect_left(self._terms, word + "\U0010ffff", start)
+            completions = (t for t in self._terms[start:end] if t != word)
+            popular = heapq.nlargest(PREFIX_EXPANSIONS, completions, key=lambda t: len(self._postings[t][0]))
+            terms.extend((t, PREFIX_WEIGHT) for t in popular)
+        if not terms and len(word) >= TYPO_MIN_LENGTH:
+            terms = [(t, 1.0 / (1 + d)) for t, d in self._corrections(word)]
+        if len(self._expansions) >= EXPANSION_CACHE_SIZE:
+            self._expansions.clear()
+        self._expansions[key] = terms
+        return terms
+
+    def _corrections(self, word: str) -> List[Tuple[str, int]]:
+        """Indexed terms within edit distance 1 (2 for words of 8+ letters), most frequent first."""
+        limit = 1 if len(word) < 8 else 2
+        grams = list(trigrams(word))
+        shared: Counter = Counter()
+        for length in range(len(word) - limit, len(word) + limit + 1):
+            for gram in grams:
+                shared.update(self._grams.get((gram, length), ()))
+        # Each edit changes at most three trigrams, so closer terms share at least this many.
+        needed = len(grams) - 3 * limit
+        matches = []
+        for term, count in shared.items():
+            if count >= needed and term in self._postings:
+                distance = edit_distance(word, term, limit)
+                if distance <= limit:
+                    matches.append((distance, -len(self._postings[term][0]), term))
+        return [(term, distance) for distance, _, term in sorted(matches)[:TYPO_EXPANSIONS]]
+
+    def _add_grams(self, term: str) -> None:
+        for gram in trigrams(term):
+            self._grams.setdefault((gram, len(term)), []).append(term)
+
+    def updated(
+        self,
+        removed: Iterable[Tuple[int, Mapping[str, object]]],
+        added: Iterable[Tuple[int, Mapping[str, object]]],
+    ) -> "SearchIndex":
+        """Derive an index with the removed (ordinal, old fields) documents dropped
+        and the added ones indexed; a replaced item appears in both."""
+        count = self.count
+        gone: Dict[str, List[Tuple[float, int]]] = {}
+        for ordinal, fields in removed:
+            freqs, length = document_terms(fields)
+            for term, freq in freqs.items():
+                gone.setdefault(term, []).append((self.weight(freq, length), ordinal))
+            count -= 1
+        fresh: Dict[str, List[Tuple[float, int]]] = {}
+        for ordinal, fields in added:
+            freqs, length = document_terms(fields)
+            for term, freq in freqs.items():
+                fresh.setdefault(term, []).append((self.weight(freq, length), ordinal))
+            count += 1
+
+        postings = dict(self._postings)
+        for term in gone.keys() | fresh.keys():
+            ordinals, weights = postings.get(term) or (array("I"), array("f"))
+            ordinals, weights = ordinals[:], weights[:]  # copy-on-write; slicing copies in C
+            for weight, ordinal in gone.get(term, ()):
+                # The stored weight is recomputed exactly (same frozen average length),
+                # so the posting sits among the entries of equal weight.
+                start = bisect_left(weights, array("f", [weight])[0])
+                try:
+                    i = ordinals.index(ordinal, start)
+                except ValueError:
+                    i = ordinals.index(ordinal)
+                del ordinals[i], weights[i]
+            for weight, ordinal in fresh.get(term, ()):
+                i = bisect_left(weights, weight)
+                ordinals.insert(i, ordinal)
+                weights.insert(i, weight)
+            if ordinals:
+                postings[term] = (ordinals, weights)
+            else:
+                del postings[term]
+
+        index = SearchIndex.__new__(SearchIndex)
+        index.count = count
+        index.avg_length = self.avg_length
+        index._postings = postings
+        index._expansions = {}
+        new_terms = [term for term in fresh if term not in self._postings]
+        gone_terms = {term for term in gone if term not in postings}
+        if not new_terms and not gone_terms:
+            index._terms, index._grams = self._terms, self._grams
+            return index
+        index._terms = [term for term in self._terms if term not in gone_terms]
+        index._grams = dict(self._grams)
+        for term in new_terms:
+            insort(index._terms, term)
+            for gram in trigrams(term):
+                key = (gram, len(term))
+                index._grams[key] = index._grams.get(key, []) + [term]
+        # Terms that left the vocabulary stay in the trigram lists; lookups skip them.
+        return index
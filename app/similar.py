@@ -0,0 +1,213 @@
+"""Item-item "More Like This" similarity for the Mac Flix catalog.
+
+Each item becomes a sparse feature row: its genres, cast, director,
+language and type, plus overlapping year and rating bands (so 1999 and
+2001 still share a band). Features are weighted by kind and by IDF, so a
+shared director counts for more than a shared language, and rows are
+L2-normalized, making a dot product the cosine similarity.
+
+All top-k neighbour lists are precomputed when the index is built, in
+batched sparse matrix products, so a request is a lookup. Comparing every
+pair is quadratic, so candidates come from champion lists: for each
+feature only the CANDIDATES_PER_FEATURE best-rated items holding it are
+considered, and the best candidates by that partial score are then
+rescored exactly against the full feature rows.
+"""
+
+import math
+import os
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+import numpy as np
+from scipy import sparse
+
+SIMILAR_K = int(os.getenv("MACFLIX_SIMILAR_K", "20"))  # neighbours precomputed per item
+CANDIDATES_PER_FEATURE = int(os.getenv("MACFLIX_SIMILAR_CANDIDATES", "256"))
+RESCORE_FACTOR = 4  # candidates rescored exactly per neighbour kept
+BATCH_SIZE = 2048
+WEIGHTS = {"director": 3.0, "cast": 2.0, "genre": 1.5, "language": 1.0, "type": 1.0, "year": 1.0, "rating": 0.5}
+UNRATED = 5.0
+
+
+def item_features(fields: Mapping[str, object]) -> Iterator[Tuple[str, float]]:
+    """The (feature, weight) pairs of one item, before IDF weighting."""
+    for genre in fields.get("genres") or ():
+        yield f"genre:{genre}", WEIGHTS["genre"]
+    for name in fields.get("cast") or ():
+        yield f"cast:{name}", WEIGHTS["cast"]
+    if fields.get("director"):
+        yield f"director:{fields['director']}", WEIGHTS["director"]
+    if fields.get("language"):
+        yield f"language:{fields['language']}", WEIGHTS["language"]
+    yield f"type:{fields['type']}", WEIGHTS["type"]
+    # Two offset bands each: nearby values share at least one of them.
+    year = fields["year"]
+    yield f"year:{year // 5}", WEIGHTS["year"] / 2
+    yield f"year+:{(year + 2) // 5}", WEIGHTS["year"] / 2
+    rating = fields.get("rating")
+    if rating is not None:
+        yield f"rating:{int(rating)}", WEIGHTS["rating"] / 2
+        yield f"rating+:{int(rating + 0.5)}", WEIGHTS["rating"] / 2
+
+
+def _normalize_rows(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags((1.0 / norms).astype(np.float32)) @ matrix
+
+
+def _top_k(indptr: np.ndarray, cols: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """The k highest-scoring cols of each CSR row, best first, as (rows x k) arrays
+    padded with col -1 and score -inf."""
+    counts = np.diff(indptr)
+    width = max(int(counts.max()) if len(counts) else 0, k)
+    row_of = np.repeat(np.arange(len(counts)), counts)
+    pos = np.arange(len(cols)) - indptr[:-1][row_of]
+    # Rows are short (bounded by the champion lists), so pad them into a dense block
+    # and let argpartition pick each row's top k in one vectorized call.
+    dense = np.full((len(counts), width), -np.inf, dtype=np.float32)
+    dense[row_of, pos] = scores
+    ids = np.full((len(counts), width), -1, dtype=np.int64)
+    ids[row_of, pos] = cols
+    if width > k:
+        part = np.argpartition(-dense, k - 1, axis=1)[:, :k]
+        dense, ids = np.take_along_axis(dense, part, axis=1), np.take_along_axis(ids, part, axis=1)
+    order = np.argsort(-dense, axis=1, kind="stable")
+    return np.take_along_axis(ids, order, axis=1), np.take_along_axis(dense, order, axis=1)
+
+
+class SimilarIndex:
+    """Precomputed top-k similar items per ordinal, plus on-demand scoring for items added later."""
+
+    def __init__(
+        self,
+        features: sparse.csr_matrix,
+        champions_t: sparse.csr_matrix,
+        ordinals: np.ndarray,
+        neighbors: np.ndarray,
+        scores: np.ndarray,
+        vocab: Dict[str, int],
+        idf: np.ndarray,
+        stale: Optional[Set[int]] = None,
+    ):
+        self._features = features  # rows x features, L2-normalized
+        self._champions_t = champions_t  # features x rows, CANDIDATES_PER_FEATURE entries per feature
+        self._ordinals = ordinals  # row -> catalog ordinal
+        self._rows = np.full(int(ordinals.max()) + 1 if len(ordinals) else 0, -1, dtype=np.int64)
+        self._rows[ordinals] = np.arange(len(ordinals))
+        self._neighbors = neighbors  # rows x k, row indices (-1 pads)
+        self._scores = scores
+        self._vocab = vocab
+        self._idf = idf
+        self._stale = stale or set()
+
+    @classmethod
+    def build(
+        cls,
+        docs: Iterable[Tuple[int, Mapping[str, object]]],
+        k: int = SIMILAR_K,
+        batch_size: int = BATCH_SIZE,
+    ) -> "SimilarIndex":
+        """Encode (ordinal, fields) pairs and precompute every item's k nearest neighbours."""
+        vocab: Dict[str, int] = {}
+        ordinals: List[int] = []
+        quality: List[float] = []
+        indptr, cols, vals = [0], [], []
+        for ordinal, fields in docs:
+            ordinals.append(ordinal)
+            rating = fields.get("rating")
+            quality.append(UNRATED if rating is None else rating)
+            for feature, weight in item_features(fields):
+                cols.append(vocab.setdefault(feature, len(vocab)))
+                vals.append(weight)
+            indptr.append(len(cols))
+        n = len(ordinals)
+        raw = sparse.csr_matrix(
+            (np.array(vals, dtype=np.float32), np.array(cols, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+            shape=(n, len(vocab)),
+        )
+        raw.sum_duplicates()
+        df = np.bincount(raw.indices, minlength=len(vocab))
+        idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+        features = _normalize_rows(raw @ sparse.diags(idf)).tocsr()
+        champions_t = cls._champions(features, np.array(quality, dtype=np.float32))
+
+        neighbors = np.full((n, k), -1, dtype=np.int32)
+        scores = np.zeros((n, k), dtype=np.float32)
+        for start in range(0, n, batch_size):
+            rows = np.arange(start, min(start + batch_size, n))
+            neighbors[rows], scores[rows] = cls._rank(features, champions_t, features[rows], rows, k)
+        return cls(features, champions_t, np.array(ordinals, dtype=np.int64), neighbors, scores, vocab, idf)
+
+    @staticmethod
+    def _champions(features: sparse.csr_matrix, quality: np.ndarray) -> sparse.csr_matrix:
+        """features^T keeping, per feature, only its best-rated rows."""
+        by_feature = features.tocsc()
+        feature_of = np.repeat(np.arange(by_feature.shape[1]), np.diff(by_feature.indptr))
+        order = np.lexsort((-quality[by_feature.indices], feature_of))
+        rank = np.arange(len(order)) - by_feature.indptr[feature_of[order]]
+        keep = order[rank < CANDIDATES_PER_FEATURE]
+        champions = sparse.csr_matrix(
+            (by_feature.data[keep], (feature_of[keep], by_feature.indices[keep])),
+            shape=(by_feature.shape[1], by_feature.shape[0]),
+        )
+        return champions
+
+    @staticmethod
+    def _rank(features, champions_t, queries: sparse.csr_matrix, query_rows: np.ndarray, k: int):
+        """Top-k (neighbour rows, scores) for a batch of query vectors, as padded (batch x k) arrays."""
+        partial = (queries @ champions_t).tocsr()
+        row_of = np.repeat(np.arange(len(query_rows)), np.diff(partial.indptr))
+        partial.data[partial.indices == query_rows[row_of]] = -1.0  # an item is not its own neighbour
+        candidates, approx = _top_k(partial.indptr, partial.indices, partial.data, k * RESCORE_FACTOR)
+        qi, ci = np.nonzero(approx > 0)
+        exact = np.full(approx.shape, -np.inf, dtype=np.float32)
+        exact[qi, ci] = np.asarray(queries[qi].multiply(features[candidates[qi, ci]]).sum(axis=1)).ravel()
+        order = np.argsort(-exact, axis=1, kind="stable")[:, :k]
+        neighbors = np.take_along_axis(candidates, order, axis=1)
+        scores = np.take_along_axis(exact, order, axis=1)
+        neighbors[scores == -np.inf] = -1
+        scores[scores == -np.inf] = 0.0
+        return neighbors, scores
+
+    def __len__(self) -> int:
+        return len(self._ordinals)
+
+    def nbytes(self) -> int:
+        """Memory held by the index's arrays (the vocabulary dict aside)."""
+        matrices = sum(m.data.nbytes + m.indices.nbytes + m.indptr.nbytes for m in (self._features, self._champions_t))
+        arrays = sum(a.nbytes for a in (self._ordinals, self._rows, self._neighbors, self._scores, self._idf))
+        return matrices + arrays
+
+    def neighbors(self, ordinal: int) -> Optional[List[Tuple[int, float]]]:
+        """Precomputed (ordinal, score) neighbours, best first; None if the item
+        was added or changed since the index was built."""
+        if ordinal in self._stale or ordinal >= len(self._rows) or self._rows[ordinal] < 0:
+            return None
+        row = self._rows[ordinal]
+        found = self._neighbors[row] >= 0
+        return list(zip(self._ordinals[self._neighbors[row][found]].tolist(), self._scores[row][found].tolist()))
+
+    def query(self, fields: Mapping[str, object], exclude: int, k: int = SIMILAR_K) -> List[Tuple[int, float]]:
+        """Score one item's current fields against the indexed items (features unseen at build are ignored)."""
+        weights: Dict[int, float] = {}
+        for feature, weight in item_features(fields):
+            col = self._vocab.get(feature)
+            if col is not None:
+                weights[col] = weights.get(col, 0.0) + weight * float(self._idf[col])
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        vector = sparse.csr_matrix(
+            (np.array(list(weights.values()), dtype=np.float32) / norm,
+             np.array(list(weights.keys()), dtype=np.int32), np.array([0, len(weights)])),
+            shape=(1, self._features.shape[1]),
+        )
+        own_row = self._rows[exclude] if exclude < len(self._rows) else -1
+        rows, scores = self._rank(self._features, self._champions_t, vector, np.array([own_row]), k)
+        found = rows[0] >= 0
+        return list(zip(self._ordinals[rows[0][found]].tolist(), scores[0][found].tolist()))
+
+    def updated(self, changed: Iterable[int]) -> "SimilarIndex":
+        """This index with the given ordinals' precomputed neighbours marked stale."""
+        index = SimilarIndex.__new__(SimilarIndex)
+        index.__dict__.update(self.__dict__)
+        index._stale = self._stale | set(changed)
+        return index
@@ -0,0 +1,379 @@
+"""Compiled, memory-mapped catalog snapshots shared by Mac Flix workers.
+
+A snapshot is a read-only, columnar segment holding a validated catalog:
+item JSON, an id hash table, ids sorted for paging, record fingerprints and
+the index bitsets. Every worker memory-maps the same file, so the bulk of
+the catalog lives once in the OS page cache however many workers run.
+Items are only parsed into ContentItem objects when a request needs them,
+and a bounded per-worker LRU keeps the hot ones.
+
+Build one after editing content.yaml (or let workers build it on demand with
+MACFLIX_SHARED_CATALOG=1):
+
+    python -m app.snapshot [--output PATH]
+"""
+
+import abc
+import argparse
+import json
+import mmap
+import os
+import pickle
+import struct
+import zlib
+from array import array
+from collections.abc import MutableMapping, Sequence
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from app.catalog import INDEXED_FIELDS, CatalogStore
+from app.compact import ItemMemo, construct
+from app.models import ContentItem
+
+MAGIC = b"MACFLIX\0"
+SCHEMA_VERSION = 2
+HEADER = struct.Struct("<8sH32sQ")  # magic, schema version, catalog version, metadata length
+FINGERPRINT_SIZE = 12
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is missing, corrupt or incompatible."""
+
+
+def _hash_id(key: bytes) -> int:
+    return zlib.crc32(key)
+
+
+class Segment:
+    """Typed views over the sections of a mapped snapshot file."""
+
+    def __init__(self, view: memoryview, meta: dict):
+        self.count: int = meta["count"]
+        self.index_keys: Dict[str, List[Tuple[object, int]]] = meta["index_keys"]
+        sections = {name: view[start:start + length] for name, (start, length) in meta["sections"].items()}
+        self.item_offsets = sections["item_offsets"].cast("Q")
+        self.items = sections["items"]
+        self.id_offsets = sections["id_offsets"].cast("Q")
+        self.ids = sections["ids"]
+        self.id_table = sections["id_table"].cast("I")
+        self.sorted = sections["sorted"].cast("I")
+        self.fingerprints = sections["fingerprints"]
+        self.bitsets = sections["bitsets"]
+        self._mask = len(self.id_table) - 1
+
+    def item_json(self, ordinal: int) -> bytes:
+        return bytes(self.items[self.item_offsets[ordinal]:self.item_offsets[ordinal + 1]])
+
+    def id_at(self, ordinal: int) -> str:
+        return bytes(self.ids[self.id_offsets[ordinal]:self.id_offsets[ordinal + 1]]).decode("utf-8")
+
+    def find(self, item_id: str) -> Optional[int]:
+        """Ordinal of an id via the open-addressing hash table, or None."""
+        key = item_id.encode("utf-8")
+        slot = _hash_id(key) & self._mask
+        while True:
+            entry = self.id_table[slot]
+            if entry == 0:
+                return None
+            ordinal = entry - 1
+            if self.ids[self.id_offsets[ordinal]:self.id_offsets[ordinal + 1]] == key:
+                return ordinal
+            slot = (slot + 1) & self._mask
+
+    def fingerprint(self, ordinal: int) -> bytes:
+        start = ordinal * FINGERPRINT_SIZE
+        return bytes(self.fingerprints[start:start + FINGERPRINT_SIZE])
+
+    def load_indexes(self) -> Dict[str, Dict[object, int]]:
+        """Rebuild index bitsets as ints (the one per-worker copy of index data)."""
+        nbytes = (self.count + 7) // 8
+        return {
+            field: {key: int.from_bytes(self.bitsets[start:start + nbytes], "little") for key, start in keys}
+            for field, keys in self.index_keys.items()
+        }
+
+
+class _OverlayMapping(MutableMapping):
+    """Copy-on-write mapping: a read-only segment column plus local changes."""
+
+    def __init__(self, segment: Segment):
+        self._segment = segment
+        self._overlay: Dict[str, object] = {}
+        self._hidden: Set[str] = set()
+
+    @abc.abstractmethod
+    def _base(self, key: str):
+        """The segment's value for key, or None if the segment does not hold it."""
+
+    def __getitem__(self, key):
+        if key in self._overlay:
+            return self._overlay[key]
+        if key in self._hidden:
+            raise KeyError(key)
+        value = self._base(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key not in self._hidden and self._segment.find(key) is not None:
+            self._hidden.add(key)
+        self._overlay[key] = value
+
+    def __delitem__(self, key):
+        if key in self._overlay:
+            del self._overlay[key]
+        elif key not in self._hidden and self._segment.find(key) is not None:
+            self._hidden.add(key)
+        else:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for ordinal in range(self._segment.count):
+            item_id = self._segment.id_at(ordinal)
+            if item_id not in self._hidden:
+                yield item_id
+        yield from self._overlay
+
+    def __len__(self) -> int:
+        return self._segment.count - len(self._hidden) + len(self._overlay)
+
+    def copy(self):
+        other = type(self)(self._segment)
+        other._overlay = dict(self._overlay)
+        other._hidden = set(self._hidden)
+        return other
+
+
+class SharedIdMap(_OverlayMapping):
+    """id -> ordinal mapping answered from the segment's hash table."""
+
+    def _base(self, key: str) -> Optional[int]:
+        return self._segment.find(key)
+
+    def sorted_keys(self) -> Sequence:
+        """Ids in sorted order; a zero-copy view while nothing was changed locally."""
+        if not self._overlay and not self._hidden:
+            return SortedIdView(self._segment)
+        return sorted(self)
+
+
+class SharedFingerprints(_OverlayMapping):
+    """id -> record fingerprint mapping backed by the segment's fingerprint column."""
+
+    def _base(self, key: str) -> Optional[bytes]:
+        ordinal = self._segment.find(key)
+        return None if ordinal is None else self._segment.fingerprint(ordinal)
+
+
+class SortedIdView(Sequence):
+    """Read-only sequence of ids in sorted order, decoded on access (bisect-friendly)."""
+
+    def __init__(self, segment: Segment):
+        self._segment = segment
+
+    def __len__(self) -> int:
+        return self._segment.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self._segment.id_at(self._segment.sorted[index])
+
+
+class SnapshotItems:
+    """Lazy, copy-on-write item sequence backed by a memory-mapped snapshot.
+
+    Base items are parsed from their JSON on access and kept in a bounded LRU
+    shared by copies (the bytes never change). Reloads record replaced,
+    removed (None) and appended items on the copy.
+    """
+
+    def __init__(self, segment: Segment, memo: Optional[ItemMemo] = None):
+        self._segment = segment
+        self._base = segment.count
+        self._memo = ItemMemo() if memo is None else memo
+        self._overrides: Dict[int, Optional[ContentItem]] = {}
+        self._extra: List[Optional[ContentItem]] = []
+
+    def __len__(self) -> int:
+        return self._base + len(self._extra)
+
+    def __getitem__(self, ordinal: int) -> Optional[ContentItem]:
+        if ordinal >= self._base:
+            return self._extra[ordinal - self._base]
+        if ordinal in self._overrides:
+            return self._overrides[ordinal]
+        item = self._memo.get(ordinal)
+        if item is None:
+            # The JSON was validated when the snapshot was written; build the item without validating it again.
+            item = self._memo.put(ordinal, construct(json.loads(self._segment.item_json(ordinal))))
+        return item
+
+    def __setitem__(self, ordinal: int, item: Optional[ContentItem]) -> None:
+        if ordinal >= self._base:
+            self._extra[ordinal - self._base] = item
+        else:
+            self._overrides[ordinal] = item
+
+    def __iter__(self) -> Iterator[Optional[ContentItem]]:
+        for ordinal in range(len(self)):
+            yield self[ordinal]
+
+    def append(self, item: ContentItem) -> None:
+        self._extra.append(item)
+
+    def copy(self) -> "SnapshotItems":
+        items = SnapshotItems(self._segment, self._memo)
+        items._overrides = dict(self._overrides)
+        items._extra = list(self._extra)
+        return items
+
+    def fields(self, ordinal: int) -> Optional[dict]:
+        """An unmodified item's fields decoded from its stored JSON, or None if it was replaced."""
+        encoded = self.json(ordinal)
+        return None if encoded is None else json.loads(encoded)
+
+    def json(self, ordinal: int) -> Optional[bytes]:
+        """The stored JSON for an unmodified item, or None if it was replaced."""
+        if ordinal >= self._base or ordinal in self._overrides:
+            return None
+        return self._segment.item_json(ordinal)
+
+
+def _id_table(ids: List[bytes]) -> array:
+    """Open-addressing hash table (load factor <= 0.5) of ordinal + 1 per slot."""
+    slots = 2
+    while slots < 2 * len(ids):
+        slots *= 2
+    mask = slots - 1
+    table = array("I", bytes(4 * slots))
+    for ordinal, key in enumerate(ids):
+        slot = _hash_id(key) & mask
+        while table[slot]:
+            slot = (slot + 1) & mask
+        table[slot] = ordinal + 1
+    return table
+
+
+def write_snapshot(store: CatalogStore, path: Path) -> None:
+    """Compile a store into a snapshot file, replacing `path` atomically."""
+    store = store.compacted()
+    ids = store.ordered_ids()
+    count = len(ids)
+    encoded_ids = [item_id.encode("utf-8") for item_id in ids]
+    bodies = list(store.iter_json())
+    item_offsets = array("Q", [0])
+    for body in bodies:
+        item_offsets.append(item_offsets[-1] + len(body))
+    id_offsets = array("Q", [0])
+    for key in encoded_ids:
+        id_offsets.append(id_offsets[-1] + len(key))
+    order = sorted(range(count), key=ids.__getitem__)
+    missing = bytes(FINGERPRINT_SIZE)
+    fingerprints = b"".join(
+        (store.fingerprints.get(item_id) or missing)[:FINGERPRINT_SIZE].ljust(FINGERPRINT_SIZE, b"\0")
+        for item_id in ids
+    )
+    nbytes = (count + 7) // 8
+    index_keys: Dict[str, List[Tuple[object, int]]] = {}
+    bitsets: List[bytes] = []
+    for field in INDEXED_FIELDS:
+        index_keys[field] = []
+        for key, bits in store.indexes[field].items():
+            index_keys[field].append((key, len(bitsets) * nbytes))
+            bitsets.append(bits.to_bytes(nbytes, "little"))
+
+    sections = [
+        ("item_offsets", [item_offsets.tobytes()]),
+        ("items", bodies),
+        ("id_offsets", [id_offsets.tobytes()]),
+        ("ids", encoded_ids),
+        ("id_table", [_id_table(encoded_ids).tobytes()]),
+        ("sorted", [array("I", order).tobytes()]),
+        ("fingerprints", [fingerprints]),
+        ("bitsets", bitsets),
+    ]
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w+b") as f:
+        # Sections go first (8-byte aligned for typed views), then the metadata locating them.
+        f.write(bytes(HEADER.size))
+        layout = {}
+        for name, chunks in sections:
+            f.write(bytes(-f.tell() % 8))
+            start = f.tell()
+            for chunk in chunks:
+                f.write(chunk)
+            layout[name] = (start, f.tell() - start)
+        meta = pickle.dumps(
+            {
+                "fields": tuple(ContentItem.model_fields),
+                "count": count,
+                "sections": layout,
+                "index_keys": index_keys,
+            },
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+        f.write(meta)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, SCHEMA_VERSION, store.version.encode("ascii"), len(meta)))
+    os.replace(tmp, path)
+
+
+def read_snapshot_version(path: Path) -> str:
+    """Read just the catalog version a snapshot was compiled from."""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+    except OSError as e:
+        raise SnapshotError(f"Cannot open snapshot {path}: {e}") from e
+    return _check_header(path, header)[0]
+
+
+def load_snapshot(path: Path) -> CatalogStore:
+    """Memory-map a snapshot and assemble a lazily materialized CatalogStore."""
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"Cannot open snapshot {path}: {e}") from e
+    version, meta_len = _check_header(path, mm[:HEADER.size])
+    view = memoryview(mm)
+    meta = pickle.loads(view[len(mm) - meta_len:])
+    if meta["fields"] != tuple(ContentItem.model_fields):
+        raise SnapshotError(f"Snapshot {path} was built for a different ContentItem model")
+    segment = Segment(view, meta)
+    return CatalogStore.from_parts(
+        SnapshotItems(segment),
+        SharedIdMap(segment),
+        segment.load_indexes(),
+        (1 << segment.count) - 1,
+        version,
+        SharedFingerprints(segment),
+    )
+
+
+def _check_header(path: Path, header: bytes):
+    """Validate a snapshot header; returns (catalog version, metadata length)."""
+    if len(header) < HEADER.size:
+        raise SnapshotError(f"Snapshot {path} is truncated")
+    magic, schema, version, meta_len = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise SnapshotError(f"{path} is not a Mac Flix snapshot")
+    if schema != SCHEMA_VERSION:
+        raise SnapshotError(f"Snapshot {path} has schema {schema}, expected {SCHEMA_VERSION}")
+    return version.rstrip(b"\0").decode("ascii"), meta_len
+
+
+def main():
+    from app.config_loader import CONFIG_DIR, load_catalog
+
+    parser = argparse.ArgumentParser(description="Compile content.yaml into a catalog snapshot.")
+    parser.add_argument("--output", type=Path, default=CONFIG_DIR / "content.snapshot")
+    args = parser.parse_args()
+    store = load_catalog(use_snapshot=False)
+    write_snapshot(store, args.output)
+    print(f"Wrote {len(store)} items to {args.output} (version {store.version})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Autocomplete over catalog titles and people (cast and directors) for Mac Flix.
+
+Every word start of every title or name is a key, so "knig" completes
+"The Dark Knight". Keys are not stored as strings: a sorted array holds one
+packed integer (entry << 8 | offset) per key, and bisect compares the
+entry's normalized text from that offset. A max segment tree over the
+entries' scores finds the best entry in any key range in O(log n), so the
+top k completions of a prefix cost O(k log n) whatever the range size;
+prefixes of up to BUCKET_DEPTH characters, which match the most keys, have
+their completions precomputed.
+"""
+
+import heapq
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+from app.models import Suggestion
+from app.search import tokenize
+
+SUGGEST_LIMIT = 20  # most completions one request may ask for
+BUCKET_DEPTH = 2
+KINDS = ("title", "person")
+UNRATED = 5.0  # score of titles without a rating
+MAX_OFFSET = 255  # word starts past this are not keys
+
+
+def normalize(text: str) -> str:
+    """Folded words joined by single spaces, so punctuation and case never block a match."""
+    return " ".join(tokenize(text))
+
+
+class SuggestIndex:
+    """Immutable prefix index of titles (scored by rating) and people (scored by their best title)."""
+
+    def __init__(self, texts: List[str], kinds: bytearray, ids: List[Optional[str]], scores: array):
+        self._texts = texts
+        self._kinds = kinds
+        self._ids = ids
+        self._keys = [normalize(text) + " " for text in texts]
+        positions = [
+            entry << 8 | offset
+            for entry, key in enumerate(self._keys)
+            for offset in (0, *(i + 1 for i, c in enumerate(key[:MAX_OFFSET]) if c == " " and i + 1 < len(key) - 1))
+        ]
+        positions.sort(key=self._key_at)
+        self._positions = array("Q", positions)
+        self._scores = array("f", (scores[p >> 8] for p in positions))
+        self._scores.append(float("-inf"))  # padding leaves
+        self._size = 1
+        while self._size < len(positions):
+            self._size *= 2
+        tree = array("I", [len(positions)]) * (2 * self._size)
+        tree[self._size:self._size + len(positions)] = array("I", range(len(positions)))
+        for node in range(self._size - 1, 0, -1):
+            left, right = tree[2 * node], tree[2 * node + 1]
+            tree[node] = left if self._scores[left] >= self._scores[right] else right
+        self._tree = tree
+        self._buckets: Dict[str, Tuple[int, ...]] = {}
+        for prefix in {self._key_at(p)[:depth] for p in positions for depth in range(1, BUCKET_DEPTH + 1)}:
+            lo, hi = self._range(prefix)
+            self._buckets[prefix] = tuple(self._top(lo, hi, SUGGEST_LIMIT))
+
+    @classmethod
+    def build(cls, docs: Iterable[Mapping[str, object]]) -> "SuggestIndex":
+        """Index items' fields (id, title, rating, cast, director)."""
+        texts: List[str] = []
+        kinds = bytearray()
+        ids: List[Optional[str]] = []
+        scores = array("f")
+        people: Dict[str, int] = {}
+        for fields in docs:
+            rating = fields.get("rating")
+            score = UNRATED if rating is None else rating
+            texts.append(fields["title"])
+            kinds.append(0)
+            ids.append(fields["id"])
+            scores.append(score)
+            names = list(fields.get("cast") or ())
+            if fields.get("director"):
+                names.append(fields["director"])
+            for name in names:
+                entry = people.get(name)
+                if entry is None:
+                    entry = people[name] = len(texts)
+                    texts.append(name)
+                    kinds.append(1)
+                    ids.append(None)
+                    scores.append(score)
+                elif score > scores[entry]:
+                    scores[entry] = score
+        return cls(texts, kinds, ids, scores)
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the index beyond the catalog's own strings."""
+        keys = sum(sys.getsizeof(key) for key in self._keys)
+        arrays = sum(a.itemsize * len(a) for a in (self._positions, self._scores, self._tree))
+        lists = sys.getsizeof(self._texts) + sys.getsizeof(self._ids) + sys.getsizeof(self._keys) + len(self._kinds)
+        buckets = sys.getsizeof(self._buckets) + sum(sys.getsizeof(b) for b in self._buckets.values())
+        return keys + arrays + lists + buckets
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Suggestion]:
+        """The best `limit` titles and names with a word starting with prefix.
+
+        A trailing space or punctuation mark makes the last word whole, so
+        "star " matches "Star Wars" but not "Stardust".
+        """
+        query = normalize(prefix)
+        if not query:
+            return []
+        if not prefix[-1].isalnum():
+            query += " "
+        entries = self._buckets.get(query)
+        if entries is None:
+            entries = self._top(*self._range(query), limit)
+        return [
+            Suggestion.model_construct(text=self._texts[e], kind=KINDS[self._kinds[e]], id=self._ids[e])
+            for e in entries[:limit]
+        ]
+
+    def _key_at(self, position: int) -> str:
+        return self._keys[position >> 8][position & 0xFF:]
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        lo = bisect_left(self._positions, prefix, key=self._key_at)
+        return lo, bisect_left(self._positions, prefix + "\U0010ffff", lo, key=self._key_at)
+
+    def _best(self, lo: int, hi: int) -> int:
+        """Index of the highest-scoring key in [lo, hi)."""
+        tree, scores = self._tree, self._scores
+        best = len(self._positions)
+        lo += self._size
+        hi += self._size
+        while lo < hi:
+            if lo & 1:
+                if scores[tree[lo]] > scores[best]:
+                    best = tree[lo]
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                if scores[tree[hi]] > scores[best]:
+                    best = tree[hi]
+            lo >>= 1
+            hi >>= 1
+        return best
+
+    def _top(self, lo: int, hi: int, k: int) -> List[int]:
+        """The k best distinct entries among keys [lo, hi), best first."""
+        heap: List[Tuple[float, int, int, int]] = []  # (-score, best key, lo, hi)
+
+        def push(lo: int, hi: int):
+            if lo < hi:
+                best = self._best(lo, hi)
+                heapq.heappush(heap, (-self._scores[best], best, lo, hi))
+
+        push(lo, hi)
+        entries: List[int] = []
+        seen = set()
+        while heap and len(entries) < k:
+            _, best, lo, hi = heapq.heappop(heap)
+            entry = self._positions[best] >> 8
+            if entry not in seen:
+                seen.add(entry)
+                entries.append(entry)
+            push(lo, best)
+            push(best + 1, hi)
+        return entries
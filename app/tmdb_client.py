@@ -1,47 +1,77 @@
 """TMDB API client for Mac Flix."""
 
 import os
+from typing import NamedTuple, Optional
+import httpx
 import requests
+from app.cache import UPSTREAM_CACHE_STALE_TTL, TTLCache, normalize_query
+from app.disk_cache import DiskCache, aload_through, load_through
+from app.http_client import HTTP_TIMEOUT
+from app.resilience import Upstream, UpstreamUnavailable
 
 TMDB_API_KEY = os.getenv("TMDB_API_KEY", "")
-TMDB_BASE_URL = "https://api.themoviedb.org/3"
+TMDB_BASE_URL = os.getenv("TMDB_BASE_URL", "https://api.themoviedb.org/3")
 TMDB_IMAGE_BASE = "https://image.tmdb.org/t/p/w500"
 
-class TMDBClient:
-    def __init__(self, api_key: str = TMDB_API_KEY):
+def check_response(resp, operation: str) -> None:
+    """Log TMDB's error message and raise if the response has an error status."""
+    if resp.status_code >= 400:
+        try:
+            print(f"TMDB API error ({operation}): {resp.json().get('status_message')}")
+        except Exception:
+            print(f"TMDB API error ({operation}): {resp.text}")
+    resp.raise_for_status()
+
+def pick_find_result(found: dict):
+    """The first movie or TV match of a /find response, tagged with its media_type."""
+    for media_type in ("movie", "tv"):
+        results = found.get(f"{media_type}_results") or []
+        if results:
+            return {**results[0], "media_type": media_type}
+    return None
+
+class TMDBRequest(NamedTuple):
+    """One cached TMDB call: its cache key, the GET that fetches it and the part of the body to keep."""
+    key: tuple
+    url: str
+    params: dict
+    operation: str
+    field: Optional[str] = None  # keep only this list from the body (e.g. search "results")
+
+    def extract(self, data: dict):
+        return data if self.field is None else data.get(self.field, [])
+
+class BaseTMDBClient:
+    """What the sync and async TMDB clients share: configuration, cache keys and
+    request parameters. Subclasses only send the requests.
+
+    Results are cached in memory and, if given, on disk (app.disk_cache).
+    Requests go through an Upstream (app.resilience) for rate limiting, retries
+    and circuit breaking; while TMDB is unavailable, recently expired cached
+    results are served instead of an error.
+    """
+
+    def __init__(self, api_key: str = TMDB_API_KEY, base_url: str = TMDB_BASE_URL, cache: TTLCache | None = None,
+                 disk: DiskCache | None = None, upstream: Upstream | None = None):
         self.api_key = api_key
+        self.base_url = base_url
+        self.cache = TTLCache(stale_ttl=UPSTREAM_CACHE_STALE_TTL) if cache is None else cache
+        self.disk = disk
+        self.upstream = upstream or Upstream.from_env("tmdb")
 
-    def search(self, query: str, media_type: str = "movie"):
-        """Search TMDB for movies or TV shows."""
-        url = f"{TMDB_BASE_URL}/search/{media_type}"
-        params = {"api_key": self.api_key, "query": query}
-        resp = requests.get(url, params=params)
-        try:
-            resp.raise_for_status()
-        except requests.HTTPError as e:
-            try:
-                error_json = resp.json()
-                print(f"TMDB API error (search): {error_json.get('status_message')}")
-            except Exception:
-                print(f"TMDB API error (search): {resp.text}")
-            raise e
-        return resp.json().get("results", [])
+    def _request(self, key: tuple, path: str, params: dict, operation: str, field: Optional[str] = None) -> TMDBRequest:
+        return TMDBRequest(key, f"{self.base_url}{path}", {"api_key": self.api_key, **params}, operation, field)
 
-    def get_details(self, tmdb_id: int, media_type: str = "movie"):
-        """Get details for a movie or TV show by TMDB ID."""
-        url = f"{TMDB_BASE_URL}/{media_type}/{tmdb_id}"
-        params = {"api_key": self.api_key, "append_to_response": "videos,images"}
-        resp = requests.get(url, params=params)
-        try:
-            resp.raise_for_status()
-        except requests.HTTPError as e:
-            try:
-                error_json = resp.json()
-                print(f"TMDB API error (get_details): {error_json.get('status_message')}")
-            except Exception:
-                print(f"TMDB API error (get_details): {resp.text}")
-            raise e
-        return resp.json()
+    def _search_request(self, query: str, media_type: str) -> TMDBRequest:
+        key = ("tmdb", "search", media_type, normalize_query(query))
+        return self._request(key, f"/search/{media_type}", {"query": query}, "search", "results")
+
+    def _details_request(self, tmdb_id: int, media_type: str) -> TMDBRequest:
+        key = ("tmdb", "details", media_type, int(tmdb_id))
+        return self._request(key, f"/{media_type}/{tmdb_id}", {"append_to_response": "videos,images"}, "get_details")
+
+    def _find_request(self, imdb_id: str) -> TMDBRequest:
+        return self._request(("tmdb", "find", imdb_id), f"/find/{imdb_id}", {"external_source": "imdb_id"}, "find")
 
     def get_poster_url(self, poster_path: str) -> str:
         """Get full URL for a poster image."""
@@ -56,3 +86,70 @@ class TMDBClient:
             if video.get("site") == "YouTube" and video.get("type") == "Trailer":
                 return f"https://www.youtube.com/watch?v={video.get('key')}"
         return ""
+
+class TMDBClient(BaseTMDBClient):
+    """TMDB client over a requests.Session, for scripts and threads."""
+
+    def __init__(self, api_key: str = TMDB_API_KEY, session: requests.Session | None = None,
+                 base_url: str = TMDB_BASE_URL, cache: TTLCache | None = None, disk: DiskCache | None = None,
+                 upstream: Upstream | None = None):
+        super().__init__(api_key, base_url, cache, disk, upstream)
+        self.session = session or requests.Session()
+
+    def search(self, query: str, media_type: str = "movie"):
+        """Search TMDB for movies or TV shows."""
+        return self._fetch(self._search_request(query, media_type))
+
+    def get_details(self, tmdb_id: int, media_type: str = "movie"):
+        """Get details for a movie or TV show by TMDB ID."""
+        return self._fetch(self._details_request(tmdb_id, media_type))
+
+    def find_by_imdb_id(self, imdb_id: str):
+        """Find the TMDB movie or TV result for an IMDb id (with media_type set), or None."""
+        return pick_find_result(self._fetch(self._find_request(imdb_id)))
+
+    def _fetch(self, request: TMDBRequest):
+        def fetch():
+            resp = self.upstream.call_sync(
+                lambda: self.session.get(request.url, params=request.params, timeout=HTTP_TIMEOUT), request.operation
+            )
+            check_response(resp, request.operation)
+            return request.extract(resp.json())
+
+        refreshed = lambda value: self.cache.set(request.key, value)
+        return self.cache.get_or_load(
+            request.key, lambda: load_through(self.disk, request.key, "tmdb", fetch, refreshed),
+            stale_on=(UpstreamUnavailable,),
+        )
+
+class AsyncTMDBClient(BaseTMDBClient):
+    """TMDB client for async handlers, sharing one pooled httpx.AsyncClient."""
+
+    def __init__(self, http: httpx.AsyncClient, api_key: str = TMDB_API_KEY, base_url: str = TMDB_BASE_URL,
+                 cache: TTLCache | None = None, disk: DiskCache | None = None, upstream: Upstream | None = None):
+        super().__init__(api_key, base_url, cache, disk, upstream)
+        self.http = http
+
+    async def search(self, query: str, media_type: str = "movie"):
+        """Search TMDB for movies or TV shows."""
+        return await self._fetch(self._search_request(query, media_type))
+
+    async def get_details(self, tmdb_id: int, media_type: str = "movie"):
+        """Get details for a movie or TV show by TMDB ID."""
+        return await self._fetch(self._details_request(tmdb_id, media_type))
+
+    async def find_by_imdb_id(self, imdb_id: str):
+        """Find the TMDB movie or TV result for an IMDb id (with media_type set), or None."""
+        return pick_find_result(await self._fetch(self._find_request(imdb_id)))
+
+    async def _fetch(self, request: TMDBRequest):
+        async def fetch():
+            resp = await self.upstream.call(lambda: self.http.get(request.url, params=request.params), request.operation)
+            check_response(resp, request.operation)
+            return request.extract(resp.json())
+
+        refreshed = lambda value: self.cache.set(request.key, value)
+        return await self.cache.aget_or_load(
+            request.key, lambda: aload_through(self.disk, request.key, "tmdb", fetch, refreshed),
+            stale_on=(UpstreamUnavailable,),
+        )
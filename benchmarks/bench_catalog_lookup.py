@@ -0,0 +1,56 @@
+"""Benchmark: item lookup latency vs catalog size.
+
+Compares the old linear scan over a list of items with CatalogStore.get,
+for catalogs from 1k to 1M items. Run from the project root:
+
+    python -m benchmarks.bench_catalog_lookup [--sizes 1000,10000,100000,1000000]
+"""
+
+import argparse
+import random
+import time
+from benchmarks.synthetic import synthetic_items
+from app.catalog import CatalogStore
+
+
+def linear_get(items, item_id):
+    for item in items:
+        if item.id == item_id:
+            return item
+    return None
+
+
+def per_call_us(fn, ids) -> float:
+    start = time.perf_counter()
+    for item_id in ids:
+        fn(item_id)
+    return (time.perf_counter() - start) / len(ids) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--scan-lookups", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'items':>10} {'build ms':>10} {'store get us':>14} {'genre lookup ms':>16} {'linear scan us':>15}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        items = synthetic_items(size)
+        rng = random.Random(size)
+        ids = [items[rng.randrange(size)].id for _ in range(args.lookups)]
+
+        start = time.perf_counter()
+        store = CatalogStore(items)
+        build_ms = (time.perf_counter() - start) * 1e3
+
+        store_us = per_call_us(store.get, ids)
+        start = time.perf_counter()
+        store.lookup("genre", "Drama")
+        genre_ms = (time.perf_counter() - start) * 1e3
+        scan_us = per_call_us(lambda i: linear_get(items, i), ids[: args.scan_lookups])
+        print(f"{size:>10} {build_ms:>10.1f} {store_us:>14.3f} {genre_ms:>16.2f} {scan_us:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark: federated search latency against calling the three sources one by one.
+
+Points the TMDB and OMDB clients at the local upstream stub and, for
+distinct queries (so the caches never answer), compares searching the
+catalog, TMDB and OMDB in sequence with federated_search, once with a
+deadline above the stub latency and once below it. Run from the project root:
+
+    python -m benchmarks.bench_federated [--items 100000] [--latency-ms 100] [--queries 50]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from app.catalog import CatalogStore
+from app.federated import federated_search, local_hits
+from app.http_client import make_async_client
+from app.omdb_client import AsyncOMDBClient
+from app.tmdb_client import AsyncTMDBClient
+from benchmarks.stub_upstream import StubServer
+from benchmarks.synthetic import WORDS, synthetic_items
+
+
+async def run(store: CatalogStore, stub: StubServer, queries: int, deadline: float) -> dict:
+    async with make_async_client() as http:
+        tmdb = AsyncTMDBClient(http, api_key="bench", base_url=stub.tmdb_url)
+        omdb = AsyncOMDBClient(http, api_key="bench", base_url=stub.omdb_url)
+        timings = {"sequential": [], "federated": [], "federated, short deadline": []}
+        for i in range(queries):
+            query = f"{WORDS[i % len(WORDS)]} {i}"
+            start = time.perf_counter()
+            local_hits(store, query, 20)
+            await tmdb.search(f"{query} seq")
+            await omdb.search(f"{query} seq")
+            timings["sequential"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await federated_search(store, tmdb, omdb, f"{query} fed", timeout=deadline * 10)
+            timings["federated"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            result = await federated_search(store, tmdb, omdb, f"{query} short", timeout=deadline)
+            timings["federated, short deadline"].append(time.perf_counter() - start)
+        timings["answered"] = result.sources
+        return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+    store = CatalogStore(synthetic_items(args.items), compact=True)
+    store.search_index
+    deadline = args.latency_ms / 2000  # half the stub latency: only the catalog makes it
+    with StubServer(args.latency_ms) as stub:
+        timings = asyncio.run(run(store, stub, args.queries, deadline))
+    print(f"{args.items} items, stub latency {args.latency_ms:.0f} ms, short deadline {deadline * 1000:.0f} ms")
+    print(f"{'mode':>26} {'p50 ms':>8} {'max ms':>8}")
+    for mode in ("sequential", "federated", "federated, short deadline"):
+        values = timings[mode]
+        print(f"{mode:>26} {statistics.median(values) * 1000:>8.1f} {max(values) * 1000:>8.1f}")
+    print(f"short deadline sources: {timings['answered']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark: materialized home rows against computing the rows per request.
+
+Builds a synthetic compact catalog with the repo's categories.yaml rows and
+measures (1) answering a home page by filtering, sorting and encoding each
+row on request against looking up the pre-encoded /home document (both
+in-process, without HTTP overhead), and (2) the
+reload cost of ranking every row from scratch against patching them after
+a small content.yaml change. Run from the project root:
+
+    python -m benchmarks.bench_home [--items 100000] [--changes 20] [--rounds 20]
+"""
+
+import argparse
+import gc
+import random
+import statistics
+import time
+import app.main as api
+from app.catalog import CatalogStore
+from app.config_loader import load_categories_config
+from app.filters import evaluate_filters, page_ordinals
+from app.home import HOME_ROW_SIZE, HomeRows, row_specs
+from benchmarks.synthetic import synthetic_items
+
+
+def rows_per_request(store: CatalogStore, categories) -> bytes:
+    """What the home page costs without materialized rows: one category query per row."""
+    bodies = []
+    for _, flt in row_specs(categories):
+        bits = evaluate_filters(store, [flt] if flt is not None else [])
+        bodies.append(store.json_array(page_ordinals(store, bits, 0, HOME_ROW_SIZE, "rating")))
+    return b",".join(bodies)
+
+
+def timed(call, rounds: int) -> float:
+    """Median milliseconds per call."""
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--changes", type=int, default=20, help="items updated per reload")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    items = synthetic_items(args.items)
+    store = CatalogStore(items, compact=True)
+    categories = load_categories_config()
+    api.catalog, api.categories = store, categories
+    print(f"{args.items} items, {len(list(row_specs(categories)))} rows of {HOME_ROW_SIZE}")
+
+    print(f"{'home page':>30} {'ms':>8}")
+    print(f"{'rows computed per request':>30} {timed(lambda: rows_per_request(store, categories), args.rounds):>8.2f}")
+    api.home_rows()
+    print(f"{'materialized /home':>30} {timed(lambda: api.home_rows().encoded, args.rounds):>8.4f}")
+
+    rng = random.Random(0)
+    full, patched, reranked = [], [], 0
+    rows = HomeRows(store, categories)
+    for step in range(args.rounds):
+        upserts = [
+            item.model_copy(update={"rating": round(rng.uniform(1, 10), 1)})
+            for item in rng.sample(items, args.changes)
+        ]
+        store, _ = store.apply_changes(upserts, [], f"v{step}")
+        gc.collect()  # neither side pays for earlier garbage
+        start = time.perf_counter()
+        patched_rows = HomeRows(store, categories, previous=rows)
+        patched.append(time.perf_counter() - start)
+        reranked += patched_rows.reranked
+        gc.collect()
+        start = time.perf_counter()
+        HomeRows(store, categories)
+        full.append(time.perf_counter() - start)
+        rows = patched_rows  # only now, so freeing the previous snapshot is not timed
+    print(f"{f'reload, {args.changes} items changed':>30} {'ms':>8}")
+    print(f"{'rank every row again':>30} {statistics.median(full) * 1000:>8.2f}")
+    print(f"{'patch the rows':>30} {statistics.median(patched) * 1000:>8.2f}  ({reranked} rows re-ranked)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Benchmark: poster proxy cold fetch-and-resize throughput and warm hit latency.
+
+Serves posters from the in-process stub origin (benchmarks.stub_upstream),
+so the numbers are the cache's own cost: a cold pass fetches and resizes
+every poster, a warm pass serves them from disk. Run from the project root:
+
+    python -m benchmarks.bench_images [--posters 200] [--size w342]
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+import httpx
+from app.images import ImageCache
+from benchmarks.stub_upstream import make_app
+
+
+async def run(cache: ImageCache, urls, size: str) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(cache.get(url, size) for url in urls))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posters", type=int, default=200)
+    parser.add_argument("--size", default="w342")
+    args = parser.parse_args()
+
+    # Distinct dimensions give distinct bytes, so every poster is a separate blob.
+    urls = [f"http://origin.test/img/{500 + i % 40}x{750 + i // 40}.jpg" for i in range(args.posters)]
+    with tempfile.TemporaryDirectory() as scratch:
+        http = httpx.AsyncClient(transport=httpx.ASGITransport(app=make_app(latency_ms=0)))
+        cache = ImageCache(Path(scratch), http)
+        cold = asyncio.run(run(cache, urls, args.size))
+        cache._pool.shutdown(wait=True)  # background variants finish before the warm pass
+        cache._pool = type(cache._pool)(1)
+        warm = asyncio.run(run(cache, urls, args.size))
+        stats = cache.stats()
+        cache.close()
+    print(f"{'posters':>8} {'cold/s':>8} {'warm us':>8} {'files':>6} {'cache MB':>9}")
+    print(f"{args.posters:>8} {args.posters / cold:>8.0f} {warm / args.posters * 1e6:>8.0f}"
+          f" {stats.files:>6} {stats.bytes / 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
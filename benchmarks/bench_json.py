@@ -0,0 +1,78 @@
+"""Benchmark: list endpoint throughput with and without the fast JSON mode.
+
+Serves a synthetic compact catalog through the FastAPI app in-process and
+requests large pages from the list endpoints, first through the default
+response_model path (validate, then encode with the stdlib) and then with
+MACFLIX_FAST_JSON behaviour switched on (stored item JSON joined into the
+body, orjson for the rest when installed). Pages start at random offsets, so
+the item LRU does not hide the cost of building models. Run from the
+project root:
+
+    python -m benchmarks.bench_json [--items 100000] [--seconds 3]
+"""
+
+import argparse
+import random
+import time
+from fastapi.testclient import TestClient
+import app.fast_json as fast_json
+import app.main as api
+from app.catalog import CatalogStore
+from app.models import Category, CategoryConfig, Filter
+from benchmarks.synthetic import GENRES, WORDS, synthetic_items
+
+
+def endpoints(size: int):
+    def cursor(rng):
+        return api.encode_cursor(f"tt{rng.randrange(size):08d}")
+
+    return {
+        "content?limit=1000": lambda rng: f"/content?limit=1000&cursor={cursor(rng)}",
+        "content/query limit=500": lambda rng: f"/content/query?genre={rng.choice(GENRES)}&limit=500"
+                                               f"&offset={rng.randrange(size // 20)}",
+        "categories items limit=500": lambda rng: f"/categories/Top%20Rated/items?limit=500&sort=rating"
+                                                  f"&offset={rng.randrange(size // 20)}",
+        "search limit=100": lambda rng: f"/search?q={rng.choice(WORDS)}&limit=100",
+    }
+
+
+def measure(client: TestClient, path_for, seconds: float) -> float:
+    rng = random.Random(0)
+    requests = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        response = client.get(path_for(rng))
+        assert response.status_code == 200, response.text
+        requests += 1
+    return requests / (time.perf_counter() - start)
+
+
+def set_fast(enabled: bool) -> None:
+    api.FAST_JSON = fast_json.FAST_JSON = enabled
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    api.catalog = CatalogStore(synthetic_items(args.items), compact=True)
+    api.catalog.search_index
+    api.categories = CategoryConfig(categories=[
+        Category(name="Top Rated", filters=[Filter(name="Good", type="rating", value=7.0)]),
+    ])
+    client = TestClient(api.app)
+    print(f"{args.items} items, orjson {'installed' if fast_json.orjson_available() else 'not installed'}")
+    print(f"{'endpoint':>28} {'default req/s':>14} {'fast req/s':>11} {'speedup':>8}")
+    for name, path_for in endpoints(args.items).items():
+        results = []
+        for enabled in (False, True):
+            set_fast(enabled)
+            measure(client, path_for, min(0.5, args.seconds))  # warm up
+            results.append(measure(client, path_for, args.seconds))
+        print(f"{name:>28} {results[0]:>14.1f} {results[1]:>11.1f} {results[1] / results[0]:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
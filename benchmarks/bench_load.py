@@ -0,0 +1,249 @@
+"""Benchmark: end-to-end API load test: startup, memory, endpoint latency and throughput.
+
+For each catalog size, writes a synthetic config directory and starts
+`uvicorn app.main:app --workers N` on it for each worker count, with the TMDB
+and OMDB clients pointed at the local upstream stub. Then it drives each
+endpoint with concurrent clients for a fixed time. It records time to first
+response and until all workers are up, server memory (RSS and PSS summed
+over all processes), latency percentiles, throughput and error counts, and
+writes them as JSON for benchmarks.compare to check against a stored
+baseline. Run from the project root:
+
+    python -m benchmarks.bench_load [--sizes 1000,100000,1000000] [--workers 1,2,4]
+        [--seconds 5] [--concurrency 32] [--stub-latency-ms 20] [--stub-error-rate 0]
+        [--out bench-results.json]
+
+The load generator runs in this process, so on small machines it shares the
+CPUs with the server; compare results only with runs on the same hardware.
+Each worker builds its own search, autocomplete and similarity indexes, so
+1M items needs several GB of RAM per worker.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+import httpx
+from benchmarks.stub_upstream import StubServer, free_port
+from benchmarks.synthetic import FIRST_NAMES, GENRES, WORDS, write_config_dir
+
+STARTUP_TIMEOUT = 3600.0  # seconds; a 1M-item catalog builds its indexes at startup
+
+
+def endpoints(size: int) -> Dict[str, Callable[[random.Random], str]]:
+    """Name -> request path generator for each benchmarked endpoint."""
+    def item_id(rng):
+        return f"tt{rng.randrange(size):08d}"
+
+    return {
+        "content_page": lambda rng: "/content?limit=50",
+        "content_item": lambda rng: f"/content/{item_id(rng)}",
+        "content_query": lambda rng: f"/content/query?genre={rng.choice(GENRES)}&min_rating={rng.randint(3, 8)}&limit=20",
+        "category_items": lambda rng: "/categories/Top%20Rated/items?limit=20",
+        "search": lambda rng: f"/search?q={rng.choice(WORDS)}%20{rng.choice(WORDS)[:3]}",
+        "suggest": lambda rng: f"/suggest?prefix={rng.choice(WORDS + FIRST_NAMES)[:rng.randint(1, 4)]}",
+        "similar": lambda rng: f"/content/{item_id(rng)}/similar?limit=10",
+        # Distinct queries, so the upstream caches do not answer everything.
+        "tmdb_search": lambda rng: f"/tmdb/search?query={rng.choice(WORDS)}{rng.randrange(100_000)}",
+    }
+
+
+def process_tree(pid: int) -> List[int]:
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(c) for c in f.read().split()]
+    except OSError:
+        return pids
+    for child in children:
+        pids.extend(process_tree(child))
+    return pids
+
+
+def memory_mb(pid: int) -> Dict[str, float]:
+    """RSS and PSS summed over a process and its children (PSS splits shared pages fairly)."""
+    rss = pss = 0
+    for p in process_tree(pid):
+        try:
+            with open(f"/proc/{p}/smaps_rollup") as f:
+                for line in f:
+                    if line.startswith("Rss:"):
+                        rss += int(line.split()[1])
+                    elif line.startswith("Pss:"):
+                        pss += int(line.split()[1])
+        except OSError:
+            pass
+    return {"rss_mb": round(rss / 1024, 1), "pss_mb": round(pss / 1024, 1)}
+
+
+def percentile(sorted_ms: List[float], p: float) -> float:
+    return sorted_ms[min(len(sorted_ms) - 1, int(len(sorted_ms) * p))] if sorted_ms else float("nan")
+
+
+async def drive(base_url: str, path_for: Callable[[random.Random], str], concurrency: int, seconds: float) -> dict:
+    """Run concurrency closed-loop clients against one endpoint for the given time."""
+    latencies: List[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + seconds
+
+        async def worker(seed: int):
+            nonlocal errors
+            rng = random.Random(seed)
+            while time.perf_counter() < deadline:
+                path = path_for(rng)
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    ok = response.status_code < 500 and response.status_code != 429
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append((time.perf_counter() - start) * 1000)
+                errors += not ok
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.5), 2),
+        "p90_ms": round(percentile(latencies, 0.9), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else float("nan"),
+    }
+
+
+def start_server(config_dir: Path, workers: int, stub: StubServer, port: int) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        MACFLIX_CONFIG_DIR=str(config_dir),
+        TMDB_BASE_URL=stub.tmdb_url,
+        OMDB_BASE_URL=stub.omdb_url,
+        TMDB_API_KEY="bench",
+        OMDB_API_KEY="bench",
+    )
+    cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers),
+           "--log-level", "warning", "--backlog", "4096"]
+    return subprocess.Popen(cmd, env=env)
+
+
+def cpu_seconds(pid: int) -> float:
+    total = 0
+    for p in process_tree(pid):
+        try:
+            with open(f"/proc/{p}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            total += int(fields[11]) + int(fields[12])  # utime + stime
+        except OSError:
+            pass
+    return total / os.sysconf("SC_CLK_TCK")
+
+
+def wait_ready(server: subprocess.Popen, port: int) -> tuple:
+    """Seconds until the first response, and until every worker has finished starting up.
+
+    Workers accept connections only after their startup, so the first answer
+    comes from the fastest one; the rest are done once the server goes idle.
+    """
+    start = time.perf_counter()
+    with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=5) as client:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError("Server exited during startup")
+            if time.perf_counter() - start > STARTUP_TIMEOUT:
+                raise RuntimeError("Server did not start in time")
+            try:
+                if client.get("/").status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.05)
+    first = time.perf_counter() - start
+    used = cpu_seconds(server.pid)
+    while True:
+        time.sleep(0.5)
+        now = cpu_seconds(server.pid)
+        if now - used < 0.05:
+            return first, time.perf_counter() - start - 0.5
+        used = now
+
+
+def run_config(config_dir: Path, size: int, workers: int, stub: StubServer, args) -> dict:
+    port = free_port()
+    server = start_server(config_dir, workers, stub, port)
+    try:
+        first_s, ready_s = wait_ready(server, port)
+        result = {"items": size, "workers": workers, "startup_s": round(first_s, 2), "ready_s": round(ready_s, 2),
+                  **memory_mb(server.pid)}
+        base_url = f"http://127.0.0.1:{port}"
+        result["endpoints"] = {}
+        for name, path_for in endpoints(size).items():
+            if args.only and name not in args.only.split(","):
+                continue
+            asyncio.run(drive(base_url, path_for, args.concurrency, min(1.0, args.seconds)))  # warm up
+            result["endpoints"][name] = stats = asyncio.run(drive(base_url, path_for, args.concurrency, args.seconds))
+            print(f"{size:>9} {workers:>7} {name:>15} {stats['rps']:>8.0f} {stats['p50_ms']:>8.2f}"
+                  f" {stats['p99_ms']:>8.2f} {stats['errors']:>6}")
+        result.update({f"after_{k}": v for k, v in memory_mb(server.pid).items()})
+        return result
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,100000,1000000")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--seconds", type=float, default=5.0, help="measured time per endpoint")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--stub-latency-ms", type=float, default=20.0)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--only", default="", help="comma-separated endpoint names (default: all)")
+    parser.add_argument("--out", default="bench-results.json")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "seconds": args.seconds,
+            "concurrency": args.concurrency,
+            "stub_latency_ms": args.stub_latency_ms,
+            "stub_error_rate": args.stub_error_rate,
+        },
+        "runs": [],
+    }
+    print(f"{'items':>9} {'workers':>7} {'endpoint':>15} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>6}")
+    with StubServer(args.stub_latency_ms, error_rate=args.stub_error_rate) as stub:
+        for size in (int(s) for s in args.sizes.split(",")):
+            with tempfile.TemporaryDirectory() as tmp:
+                config_dir = Path(tmp)
+                write_config_dir(config_dir, size)
+                for workers in (int(w) for w in args.workers.split(",")):
+                    for stale in config_dir.glob("content.snapshot*"):
+                        stale.unlink()  # every run pays the same cold start
+                    run = run_config(config_dir, size, workers, stub, args)
+                    print(f"{size:>9} {workers:>7} {'startup':>15} first response {run['startup_s']:.2f}s,"
+                          f" all workers {run['ready_s']:.2f}s, rss {run['rss_mb']:.0f} MB, pss {run['pss_mb']:.0f} MB")
+                    results["runs"].append(run)
+    Path(args.out).write_text(json.dumps(results, indent=2) + "\n")
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Benchmark: catalog memory, validated ContentItem lists vs compact columns.
+
+Measures Python heap growth with tracemalloc while holding each representation,
+plus the cost of materializing and encoding items. Run from the project root:
+
+    python -m benchmarks.bench_memory [--sizes 10000,100000]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from app.catalog import CatalogStore
+from app.compact import ItemMemo
+from app.models import ContentItem
+from benchmarks.synthetic import synthetic_records
+
+
+def held_mb(build):
+    """Heap still allocated by the object build() returns, in MB."""
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current / 1e6
+
+
+def per_item_us(fn, n):
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000")
+    args = parser.parse_args()
+
+    print(f"{'items':>10} {'models MB':>10} {'store MB':>9} {'compact MB':>11} {'get us':>7} {'json us':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        records = list(synthetic_records(size))
+        models, models_mb = held_mb(lambda: [ContentItem(**r) for r in records])
+        store, store_mb = held_mb(lambda: CatalogStore(models))
+        del models, store
+        compact, compact_mb = held_mb(
+            lambda: CatalogStore((ContentItem(**r) for r in records), version="v", compact=True)
+        )
+        ids = [r["id"] for r in records[:1000]]
+        compact._items._memo = ItemMemo(size=0)  # time cold materialization, not LRU hits
+        get_us = per_item_us(lambda i: compact.get(ids[i]), len(ids))
+        json_us = per_item_us(lambda i: compact.item_json(ids[i]), len(ids))
+        print(
+            f"{size:>10} {models_mb:>10.1f} {models_mb + store_mb:>9.1f} {compact_mb:>11.1f}"
+            f" {get_us:>7.1f} {json_us:>8.1f}"
+        )
+        del compact
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark: per-request cost of the metrics and profiler middleware.
+
+Calls a minimal FastAPI route directly through its ASGI interface, bare and
+wrapped in MetricsMiddleware and ProfileMiddleware (enabled, but with no
+X-Profile header), and reports the added time per request. Run from the
+project root:
+
+    python -m benchmarks.bench_metrics [--requests 20000]
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from fastapi import FastAPI
+from app.metrics import MetricsMiddleware, render
+from app.profiler import ProfileMiddleware
+
+
+def make_app(instrumented: bool, profile_dir: str) -> FastAPI:
+    served = FastAPI()
+
+    @served.get("/items/{item_id}")
+    async def item(item_id: str):
+        return {"id": item_id}
+
+    if instrumented:
+        served.add_middleware(MetricsMiddleware)
+        served.add_middleware(ProfileMiddleware, directory=profile_dir)
+    return served
+
+
+async def run(asgi, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    headers = [(b"host", b"bench"), (b"accept", b"application/json")]
+    start = time.perf_counter()
+    for i in range(requests):
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": f"/items/{i}", "raw_path": f"/items/{i}".encode(), "query_string": b"", "headers": headers,
+            "server": ("bench", 80), "client": ("127.0.0.1", 1), "root_path": "",
+        }
+        await asgi(scope, receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as profile_dir:
+        bare = make_app(False, profile_dir)
+        instrumented = make_app(True, profile_dir)
+        asyncio.run(run(bare, 1000))  # warm up both apps (builds the middleware stacks)
+        asyncio.run(run(instrumented, 1000))
+        bare_us = min(asyncio.run(run(bare, args.requests)) for _ in range(3))
+        instrumented_us = min(asyncio.run(run(instrumented, args.requests)) for _ in range(3))
+    print(f"bare:          {bare_us:7.1f} us/request")
+    print(f"instrumented:  {instrumented_us:7.1f} us/request (+{instrumented_us - bare_us:.1f} us)")
+    start = time.perf_counter()
+    size = len(render())
+    print(f"render:        {(time.perf_counter() - start) * 1000:7.2f} ms for {size} bytes")
+
+
+if __name__ == "__main__":
+    main()
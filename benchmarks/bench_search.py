@@ -0,0 +1,89 @@
+"""Benchmark: full-text search index build time, memory and query latency.
+
+Builds the index straight from synthetic records (no ContentItem objects),
+then times a mix of exact, multi-word, prefix and misspelled queries, and an
+incremental update. Run from the project root:
+
+    python -m benchmarks.bench_search [--sizes 100000,1000000] [--queries 2000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from app.search import SearchIndex
+from benchmarks.synthetic import FIRST_NAMES, LAST_NAMES, WORDS, synthetic_records
+
+TARGET_P99_MS = 5.0
+
+
+def query_mix(rng: random.Random, n: int):
+    """Search-as-you-type prefixes, whole words, names and one-letter typos."""
+    queries = []
+    for _ in range(n):
+        word = rng.choice(WORDS)
+        kind = rng.randrange(5)
+        if kind == 0:
+            queries.append(word[:rng.randint(1, len(word))])
+        elif kind == 1:
+            queries.append(" ".join(rng.sample(WORDS, rng.randint(2, 4))) + " ")
+        elif kind == 2:
+            queries.append(f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}")
+        elif kind == 3:
+            i = rng.randrange(len(word) - 1)
+            queries.append(word[:i] + word[i + 1] + word[i] + word[i + 2:] + " ")
+        else:
+            queries.append(f"{rng.choice(WORDS)} {word[:3]}")
+    return queries
+
+
+def postings_mb(index: SearchIndex) -> float:
+    arrays = sum(sys.getsizeof(ordinals) + sys.getsizeof(weights) for ordinals, weights in index._postings.values())
+    return (arrays + sys.getsizeof(index._postings)) / 1e6
+
+
+def percentile(sorted_ms, p):
+    return sorted_ms[min(len(sorted_ms) - 1, int(len(sorted_ms) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'items':>10} {'build s':>8} {'postings MB':>12} {'p50 ms':>7} {'p99 ms':>7} {'max ms':>7} {'update ms':>10}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        start = time.perf_counter()
+        index = SearchIndex.build(enumerate(synthetic_records(size)))
+        build_s = time.perf_counter() - start
+        index_mb = postings_mb(index)
+
+        rng = random.Random(size)
+        queries = query_mix(rng, args.queries)
+        for query in queries[:200]:  # warm the expansion cache as steady traffic would
+            index.search(query, args.limit)
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, args.limit)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+
+        changed = [(i, record) for i, record in enumerate(synthetic_records(100, seed=size))]
+        old = [(i, record) for i, record in enumerate(synthetic_records(100))]
+        start = time.perf_counter()
+        index.updated(old, changed)
+        update_ms = (time.perf_counter() - start) * 1000
+
+        p99 = percentile(timings, 0.99)
+        print(
+            f"{size:>10} {build_s:>8.1f} {index_mb:>12.1f} {percentile(timings, 0.5):>7.2f} {p99:>7.2f}"
+            f" {timings[-1]:>7.2f} {update_ms:>10.1f}" + ("" if p99 <= TARGET_P99_MS else "  (over target)")
+        )
+        del index
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark: per-worker memory with private vs shared (memory-mapped) catalogs.
+
+Forks N worker processes that each load the catalog the way a uvicorn worker
+would, touch a sample of items, and report RSS and PSS from
+/proc/self/smaps_rollup (Linux only). Run from the project root:
+
+    python -m benchmarks.bench_shared_memory [--size 100000] [--workers 4]
+"""
+
+import argparse
+import multiprocessing
+import tempfile
+from pathlib import Path
+import yaml
+import app.config_loader as config_loader
+from benchmarks.synthetic import synthetic_records
+
+try:
+    from yaml import CSafeDumper as Dumper
+except ImportError:
+    from yaml import SafeDumper as Dumper
+
+
+def memory_kb():
+    """(rss, pss) in kB for the current process."""
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                values[parts[0]] = int(parts[1])
+    return values["Rss:"], values["Pss:"]
+
+
+def worker(config_dir, shared, sample, ready, done, results):
+    config_loader.CONFIG_DIR = Path(config_dir)
+    store = config_loader.load_catalog(use_snapshot=shared, shared=shared)
+    for item_id in list(store.ids())[:: max(1, len(store) // sample)]:
+        store.item_json(item_id)
+    ready.wait()  # measure while every worker holds its catalog
+    results.put(memory_kb())
+    done.wait()
+
+
+def measure(config_dir, shared, workers, sample):
+    ready = multiprocessing.Barrier(workers + 1)
+    done = multiprocessing.Barrier(workers + 1)
+    results = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(target=worker, args=(config_dir, shared, sample, ready, done, results))
+        for _ in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    ready.wait()
+    samples = [results.get() for _ in procs]
+    done.wait()
+    for p in procs:
+        p.join()
+    rss = sum(s[0] for s in samples) / len(samples) / 1024
+    pss = sum(s[1] for s in samples) / len(samples) / 1024
+    return rss, pss
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--sample", type=int, default=1000, help="items each worker reads")
+    args = parser.parse_args()
+
+    multiprocessing.set_start_method("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(Path(tmp) / "content.yaml", "w", encoding="utf-8") as f:
+            yaml.dump({"movies": list(synthetic_records(args.size))}, f, Dumper=Dumper)
+        print(f"{args.size} items, {args.workers} workers")
+        print(f"{'mode':>10} {'RSS MB':>8} {'PSS MB':>8} {'total PSS MB':>13}")
+        for label, shared in (("private", False), ("shared", True)):
+            rss, pss = measure(tmp, shared, args.workers, args.sample)
+            print(f"{label:>10} {rss:>8.1f} {pss:>8.1f} {pss * args.workers:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
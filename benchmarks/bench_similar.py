@@ -0,0 +1,53 @@
+"""Benchmark: "More Like This" precompute time, memory and lookup latency.
+
+Builds the similarity index straight from synthetic records, then times
+precomputed lookups and on-demand scoring (the path for items changed since
+the build). Run from the project root:
+
+    python -m benchmarks.bench_similar [--sizes 100000,1000000] [--queries 2000]
+"""
+
+import argparse
+import random
+import time
+from app.similar import SimilarIndex
+from benchmarks.synthetic import synthetic_records
+
+
+def percentile(sorted_ms, p):
+    return sorted_ms[min(len(sorted_ms) - 1, int(len(sorted_ms) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'items':>10} {'build s':>8} {'index MB':>9} {'lookup us':>10} {'query p50 ms':>13} {'query p99 ms':>13}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        records = list(synthetic_records(size))
+        start = time.perf_counter()
+        index = SimilarIndex.build(enumerate(records))
+        build_s = time.perf_counter() - start
+
+        sample = random.Random(size).sample(range(size), min(args.queries, size))
+        start = time.perf_counter()
+        for ordinal in sample:
+            index.neighbors(ordinal)
+        lookup_us = (time.perf_counter() - start) / len(sample) * 1e6
+        timings = []
+        for ordinal in sample:
+            start = time.perf_counter()
+            index.query(records[ordinal], exclude=ordinal)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(
+            f"{size:>10} {build_s:>8.1f} {index.nbytes() / 1e6:>9.1f} {lookup_us:>10.1f}"
+            f" {percentile(timings, 0.5):>13.2f} {percentile(timings, 0.99):>13.2f}"
+        )
+        del index, records
+
+
+if __name__ == "__main__":
+    main()
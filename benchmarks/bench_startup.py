@@ -0,0 +1,59 @@
+"""Benchmark: catalog startup time at several catalog sizes.
+
+Compares the original loader (pure-Python yaml.safe_load + full validation),
+the CSafeLoader path, and loading a compiled snapshot. Run from the project root:
+
+    python -m benchmarks.bench_startup [--sizes 1000,10000,100000] [--pure-yaml-max 10000]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+import yaml
+import app.config_loader as config_loader
+from app.models import ContentItem
+from app.snapshot import write_snapshot
+from benchmarks.synthetic import write_catalog
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def pure_python_load(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    return [ContentItem(**item) for item in data.get("movies", [])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--pure-yaml-max", type=int, default=10_000, help="skip the pure-Python loader above this size")
+    args = parser.parse_args()
+
+    print(f"{'items':>10} {'pure yaml s':>12} {'C yaml s':>10} {'snapshot s':>11} {'first get ms':>13} {'MB':>7}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            config_dir = Path(tmp)
+            config_loader.CONFIG_DIR = config_dir
+            content = config_dir / "content.yaml"
+            write_catalog(content, size)
+
+            pure = "-"
+            if size <= args.pure_yaml_max:
+                pure = f"{timed(lambda: pure_python_load(content))[1]:.3f}"
+            store, c_yaml = timed(lambda: config_loader.load_catalog(use_snapshot=False))
+            write_snapshot(store, config_dir / "content.snapshot")
+            del store
+            snap_store, snap = timed(config_loader.load_catalog)
+            _, first_get = timed(lambda: snap_store.get("tt00000007"))
+            mb = (config_dir / "content.snapshot").stat().st_size / 1e6
+            print(f"{size:>10} {pure:>12} {c_yaml:>10.3f} {snap:>11.3f} {first_get * 1e3:>13.3f} {mb:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
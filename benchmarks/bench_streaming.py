@@ -0,0 +1,157 @@
+"""Benchmark: local media streaming throughput and server memory under concurrency.
+
+Generates sample files, serves them with FileRangeResponse under uvicorn in a
+child process, and has many concurrent clients pull whole files or random
+byte ranges (like a seeking player). Reports aggregate throughput and the
+server's peak anonymous RSS, which should stay flat however large the files
+are (mapped file pages are page cache and not counted).
+Run from the project root:
+
+    python -m benchmarks.bench_streaming [--files 4] [--file-mb 256] [--clients 1,16,64]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+import httpx
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from app.media import FileRangeResponse
+from benchmarks.stub_upstream import free_port
+
+RANGE_BYTES = 1 << 20
+
+
+def make_app(media_dir: Path) -> FastAPI:
+    served = FastAPI(title="Mac Flix media bench")
+
+    @served.get("/media/{name}")
+    def media(name: str, request: Request):
+        path = media_dir / name
+        if not path.is_file():
+            raise HTTPException(status_code=404)
+        return FileRangeResponse(path, request.headers)
+
+    return served
+
+
+def generate(media_dir: Path, files: int, file_mb: int):
+    chunk = os.urandom(1 << 20)
+    for i in range(files):
+        path = media_dir / f"sample{i}.mp4"
+        if not path.exists() or path.stat().st_size != file_mb << 20:
+            with open(path, "wb") as out:
+                for _ in range(file_mb):
+                    out.write(chunk)
+
+
+def anon_rss_mb(pid: int) -> float:
+    """Private (heap) memory of the process; mapped file pages are page cache, not Python memory."""
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+class PeakSampler(threading.Thread):
+    """Track a process's peak anonymous RSS while a run is in progress."""
+
+    def __init__(self, pid: int):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.peak = anon_rss_mb(pid)
+        self.done = threading.Event()
+
+    def run(self):
+        while not self.done.wait(0.05):
+            self.peak = max(self.peak, anon_rss_mb(self.pid))
+
+
+async def pull(client: httpx.AsyncClient, url: str, headers=None) -> int:
+    received = 0
+    async with client.stream("GET", url, headers=headers) as response:
+        async for chunk in response.aiter_raw():
+            received += len(chunk)
+    return received
+
+
+async def run(port: int, names, clients: int, mode: str, seconds: float, file_size: int):
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+        async def worker(seed: int) -> int:
+            rng = random.Random(seed)
+            total = 0
+            while time.perf_counter() < deadline:
+                url = f"/media/{rng.choice(names)}"
+                if mode == "full":
+                    total += await pull(client, url)
+                else:
+                    start = rng.randrange(0, file_size - RANGE_BYTES)
+                    total += await pull(client, url, {"Range": f"bytes={start}-{start + RANGE_BYTES - 1}"})
+            return total
+
+        start = time.perf_counter()
+        totals = await asyncio.gather(*(worker(i) for i in range(clients)))
+        return sum(totals), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--file-mb", type=int, default=256)
+    parser.add_argument("--clients", default="1,16,64")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--dir", default="", help="where sample files go (default: a temp dir)")
+    parser.add_argument("--serve", default="", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        uvicorn.run(make_app(Path(args.serve)), host="127.0.0.1", port=args.port, log_level="warning", backlog=4096)
+        return
+
+    with tempfile.TemporaryDirectory() as scratch:
+        media_dir = Path(args.dir or scratch)
+        generate(media_dir, args.files, args.file_mb)
+        names = [f"sample{i}.mp4" for i in range(args.files)]
+        port = free_port()
+        server = subprocess.Popen([sys.executable, "-m", "benchmarks.bench_streaming", "--serve", str(media_dir),
+                                   "--port", str(port)])
+        try:
+            deadline = time.monotonic() + 10
+            while True:
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                    break
+                except OSError:
+                    if time.monotonic() > deadline or server.poll() is not None:
+                        raise RuntimeError("Media server did not start")
+                    time.sleep(0.05)
+            print(f"{args.files} x {args.file_mb} MB files, server heap at start {anon_rss_mb(server.pid):.0f} MB")
+            print(f"{'mode':>7} {'clients':>8} {'MB/s':>8} {'peak heap MB':>13}")
+            for mode in ("full", "ranges"):
+                for clients in (int(c) for c in args.clients.split(",")):
+                    sampler = PeakSampler(server.pid)
+                    sampler.start()
+                    received, elapsed = asyncio.run(
+                        run(port, names, clients, mode, args.seconds, args.file_mb << 20)
+                    )
+                    sampler.done.set()
+                    sampler.join()
+                    print(f"{mode:>7} {clients:>8} {received / elapsed / 1e6:>8.0f} {sampler.peak:>13.0f}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
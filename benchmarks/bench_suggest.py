@@ -0,0 +1,60 @@
+"""Benchmark: autocomplete index build time, memory and completion latency.
+
+Builds the index straight from synthetic records and times completions for
+one- to several-character prefixes of titles and names. Run from the project root:
+
+    python -m benchmarks.bench_suggest [--sizes 100000,1000000] [--queries 5000]
+"""
+
+import argparse
+import random
+import time
+from app.suggest import SuggestIndex
+from benchmarks.synthetic import FIRST_NAMES, LAST_NAMES, WORDS, synthetic_records
+
+
+def prefixes(rng: random.Random, n: int):
+    """What a user has typed so far: part of a title word, a word and a bit, or part of a name."""
+    typed = []
+    for _ in range(n):
+        kind = rng.randrange(3)
+        if kind == 0:
+            word = rng.choice(WORDS)
+            typed.append(word[:rng.randint(1, len(word))])
+        elif kind == 1:
+            typed.append(f"{rng.choice(WORDS)} {rng.choice(WORDS)[:rng.randint(1, 3)]}")
+        else:
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            typed.append(name[:rng.randint(1, len(name))])
+    return typed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'items':>10} {'entries':>9} {'build s':>8} {'index MB':>9} {'B/entry':>8} {'p50 us':>7} {'p99 us':>7}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        start = time.perf_counter()
+        index = SuggestIndex.build(synthetic_records(size))
+        build_s = time.perf_counter() - start
+        nbytes = index.nbytes()
+
+        timings = []
+        for prefix in prefixes(random.Random(size), args.queries):
+            start = time.perf_counter()
+            index.complete(prefix, args.limit)
+            timings.append((time.perf_counter() - start) * 1e6)
+        timings.sort()
+        print(
+            f"{size:>10} {len(index):>9} {build_s:>8.1f} {nbytes / 1e6:>9.1f} {nbytes / len(index):>8.0f}"
+            f" {timings[len(timings) // 2]:>7.1f} {timings[int(len(timings) * 0.99)]:>7.1f}"
+        )
+        del index
+
+
+if __name__ == "__main__":
+    main()
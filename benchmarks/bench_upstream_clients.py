@@ -0,0 +1,85 @@
+"""Benchmark: upstream search throughput under concurrency.
+
+Runs TMDB searches against the local stub server (benchmarks.stub_upstream)
+three ways: a bare requests.get per call on a thread pool (the old client),
+the sync client with a shared session, and the async client on one pooled
+httpx.AsyncClient. Run from the project root:
+
+    python -m benchmarks.bench_upstream_clients [--requests 2000] [--concurrency 1,16,64] [--latency-ms 20]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from app.http_client import make_async_client
+from app.tmdb_client import AsyncTMDBClient, TMDBClient
+from benchmarks.stub_upstream import StubServer
+
+
+def report(label, concurrency, latencies, elapsed):
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"{label:>14} {concurrency:>6} {len(latencies) / elapsed:>9.0f}"
+        f" {statistics.median(latencies) * 1e3:>8.1f} {p99 * 1e3:>8.1f}"
+    )
+
+
+def run_threads(call, n, concurrency):
+    def timed(i):
+        start = time.perf_counter()
+        call(i)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = list(pool.map(timed, range(n)))
+    return latencies, time.perf_counter() - start
+
+
+async def run_async(call, n, concurrency):
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def timed(i):
+        async with gate:
+            start = time.perf_counter()
+            await call(i)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(timed(i) for i in range(n)))
+    return latencies, time.perf_counter() - start
+
+
+async def pooled(base_url, n, concurrency):
+    async with make_async_client() as http:
+        client = AsyncTMDBClient(http, api_key="bench", base_url=base_url)
+        return await run_async(lambda i: client.search(f"q{i}"), n, concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", default="1,16,64")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    with StubServer(args.latency_ms) as stub:
+        url = f"{stub.tmdb_url}/search/movie"
+        session_client = TMDBClient(api_key="bench", base_url=stub.tmdb_url)
+        print(f"{'client':>14} {'conc':>6} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            n = args.requests if concurrency > 1 else max(1, args.requests // 10)
+            bare = lambda i: requests.get(url, params={"api_key": "bench", "query": f"q{i}"}).json()
+            report("requests.get", concurrency, *run_threads(bare, n, concurrency))
+            session = lambda i: session_client.search(f"q{i}")
+            report("shared session", concurrency, *run_threads(session, n, concurrency))
+            report("async pooled", concurrency, *asyncio.run(pooled(stub.tmdb_url, n, concurrency)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Compare benchmarks.bench_load results against a stored baseline.
+
+Matches runs by catalog size and worker count and flags every metric that
+got worse by more than the tolerance: latency, startup time and memory going
+up, throughput going down, or new errors. A run or endpoint the baseline has
+no numbers for is reported as missing, since nothing about it was checked.
+Exits 1 on any regression or missing baseline, so CI can gate on it:
+
+    python -m benchmarks.compare bench-results.json benchmarks/baseline.json [--tolerance 0.5]
+        [--allow-missing]
+
+Refresh the baseline by copying a results file from the same machine class over it.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+HIGHER_IS_WORSE = ("startup_s", "ready_s", "pss_mb")
+ENDPOINT_HIGHER_IS_WORSE = ("p50_ms", "p99_ms")
+ENDPOINT_LOWER_IS_WORSE = ("rps",)
+MIN_ABSOLUTE = {"startup_s": 0.5, "ready_s": 0.5, "pss_mb": 10.0, "p50_ms": 1.0, "p99_ms": 2.0, "rps": 5.0}
+
+
+def metrics(run: dict) -> Iterator[Tuple[str, str, float, bool]]:
+    """(name, metric, value, higher_is_worse) for one run."""
+    for metric in HIGHER_IS_WORSE:
+        if metric in run:
+            yield "server", metric, run[metric], True
+    for endpoint, stats in run.get("endpoints", {}).items():
+        for metric in ENDPOINT_HIGHER_IS_WORSE:
+            yield endpoint, metric, stats[metric], True
+        for metric in ENDPOINT_LOWER_IS_WORSE:
+            yield endpoint, metric, stats[metric], False
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> Tuple[List[str], List[str]]:
+    """Regression messages and missing-baseline messages; differences under MIN_ABSOLUTE count as noise."""
+    regressions, missing = [], []
+    base_runs = {(r["items"], r["workers"]): r for r in baseline["runs"]}
+    for run in results["runs"]:
+        key = (run["items"], run["workers"])
+        base = base_runs.get(key)
+        if base is None:
+            missing.append(f"{key[0]} items / {key[1]} workers: no baseline run")
+            continue
+        for endpoint in run.get("endpoints", {}).keys() - base.get("endpoints", {}).keys():
+            missing.append(f"{key[0]} items / {key[1]} workers: no baseline for {endpoint}")
+        base_values = {(name, metric): value for name, metric, value, _ in metrics(base)}
+        for name, metric, value, higher_is_worse in metrics(run):
+            old = base_values.get((name, metric))
+            if old is None:
+                continue
+            change = (value - old) / old if old else 0.0
+            worse = change > tolerance if higher_is_worse else change < -tolerance
+            if worse and abs(value - old) >= MIN_ABSOLUTE.get(metric, 0.0):
+                regressions.append(f"{key[0]} items / {key[1]} workers: {name} {metric} {old} -> {value} ({change:+.0%})")
+        for endpoint, stats in run.get("endpoints", {}).items():
+            old_errors = base.get("endpoints", {}).get(endpoint, {}).get("errors", 0)
+            if stats["errors"] > old_errors:
+                regressions.append(f"{key[0]} items / {key[1]} workers: {endpoint} errors {old_errors} -> {stats['errors']}")
+    return regressions, missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("results")
+    parser.add_argument("baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative change (0.5 = 50%%)")
+    parser.add_argument("--allow-missing", action="store_true", help="only warn about runs without a baseline")
+    args = parser.parse_args()
+    results = json.loads(Path(args.results).read_text())
+    baseline = json.loads(Path(args.baseline).read_text())
+    regressions, missing = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    for line in missing:
+        print(f"{'WARNING' if args.allow_missing else 'MISSING'} {line}; not checked", file=sys.stderr)
+    print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}, {len(missing)} without a baseline")
+    sys.exit(1 if regressions or (missing and not args.allow_missing) else 0)
+
+
+if __name__ == "__main__":
+    main()
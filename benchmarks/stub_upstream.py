@@ -0,0 +1,159 @@
+"""Local stub of the TMDB and OMDB APIs for benchmarks.
+
+Answers TMDB /3/search/{type}, /3/find/{id}, /3/{type}/{id} and OMDB /?s=...
+and /?i=... with canned JSON after a configurable delay, failing a configurable
+fraction of calls with 503 or 429, so client, endpoint
+and enrichment throughput can be measured without network access or API
+keys. /img/{width}x{height}.jpg serves generated posters as an image origin. Run standalone with:
+
+    python -m benchmarks.stub_upstream [--port 8765] [--latency-ms 20] [--error-rate 0.05]
+
+or start it from Python with StubServer (used by the benchmarks).
+"""
+
+import argparse
+import asyncio
+import io
+import random
+import socket
+import subprocess
+import sys
+import time
+import uvicorn
+from functools import lru_cache
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+from PIL import Image
+
+
+def make_app(latency_ms: float = 20.0, error_rate: float = 0.0, seed: int = 0) -> FastAPI:
+    """Build the stub application; every response waits latency_ms first, and
+    error_rate of them are 503s or 429s (alternately) instead of data."""
+    stub = FastAPI(title="Mac Flix upstream stub")
+    stub.state.hits = 0
+    stub.state.errors = 0
+    rng = random.Random(seed)
+
+    async def respond(payload):
+        stub.state.hits += 1
+        await asyncio.sleep(latency_ms / 1000)
+        if error_rate and rng.random() < error_rate:
+            stub.state.errors += 1
+            status = 503 if stub.state.errors % 2 else 429
+            return JSONResponse({"status_message": "stub failure"}, status_code=status, headers={"Retry-After": "1"})
+        return payload
+
+    @stub.get("/3/search/{media_type}")
+    async def tmdb_search(media_type: str, query: str = ""):
+        results = [{"id": i, "title": f"{query} {i}", "media_type": media_type} for i in range(20)]
+        return await respond({"page": 1, "results": results, "total_results": 20})
+
+    @stub.get("/3/find/{external_id}")
+    async def tmdb_find(external_id: str):
+        tmdb_id = int("".join(c for c in external_id if c.isdigit()) or 0)
+        return await respond({"movie_results": [{"id": tmdb_id, "title": f"Title {tmdb_id}"}], "tv_results": []})
+
+    @stub.get("/3/{media_type}/{tmdb_id}")
+    async def tmdb_details(media_type: str, tmdb_id: int):
+        videos = [{"site": "YouTube", "type": "Trailer", "key": f"yt{tmdb_id}"}]
+        return await respond({
+            "id": tmdb_id,
+            "title": f"Title {tmdb_id}",
+            "poster_path": f"/poster{tmdb_id}.jpg",
+            "vote_average": 7.25,
+            "videos": {"results": videos},
+        })
+
+    @stub.get("/")
+    async def omdb(request: Request):
+        params = request.query_params
+        if "i" in params:
+            return await respond({
+                "Response": "True",
+                "imdbID": params["i"],
+                "Title": "Stub",
+                "Poster": f"https://images.example.com/{params['i']}.jpg",
+                "imdbRating": "7.9",
+                "Runtime": "118 min",
+                "Director": "Ann Lee",
+                "Actors": "Bo Kim, Cy Diaz",
+                "Language": "English, French",
+            })
+        results = [{"Title": f"{params.get('s', '')} {i}", "imdbID": f"tt{i:07d}"} for i in range(10)]
+        return await respond({"Response": "True", "Search": results, "totalResults": "10"})
+
+    @stub.get("/img/{width}x{height}.jpg")
+    async def poster(width: int, height: int):
+        stub.state.hits += 1
+        await asyncio.sleep(latency_ms / 1000)
+        return Response(poster_jpeg(width, height), media_type="image/jpeg")
+
+    return stub
+
+
+@lru_cache(maxsize=32)
+def poster_jpeg(width: int, height: int) -> bytes:
+    """A gradient JPEG of the given size, standing in for a poster."""
+    image = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=90)
+    return out.getvalue()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class StubServer:
+    """Run the stub with uvicorn in a child process, as a context manager.
+
+    A separate process keeps the stub's event loop off the benchmark's GIL.
+    """
+
+    def __init__(self, latency_ms: float = 20.0, port: int = 0, error_rate: float = 0.0):
+        self.port = port or free_port()
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self._proc = None
+
+    @property
+    def tmdb_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/3"
+
+    @property
+    def omdb_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/"
+
+    def __enter__(self) -> "StubServer":
+        cmd = [sys.executable, "-m", "benchmarks.stub_upstream", "--port", str(self.port),
+               "--latency-ms", str(self.latency_ms), "--error-rate", str(self.error_rate)]
+        self._proc = subprocess.Popen(cmd)
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=0.1).close()
+                return self
+            except OSError:
+                if time.monotonic() > deadline or self._proc.poll() is not None:
+                    self._proc.kill()
+                    raise RuntimeError("Stub server did not start")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc):
+        self._proc.terminate()
+        self._proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered 503/429")
+    args = parser.parse_args()
+    uvicorn.run(make_app(args.latency_ms, args.error_rate), host="127.0.0.1", port=args.port, log_level="warning", backlog=4096)
+
+
+if __name__ == "__main__":
+    main()
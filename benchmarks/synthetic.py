@@ -0,0 +1,92 @@
+"""Synthetic catalog generator for Mac Flix benchmarks.
+
+Also writes a whole config directory for running the server on a synthetic
+catalog (point MACFLIX_CONFIG_DIR at it):
+
+    python -m benchmarks.synthetic --items 100000 --out /tmp/macflix-100k
+"""
+
+import argparse
+import random
+import shutil
+from pathlib import Path
+from typing import Dict, Iterator, List
+import yaml
+from app.config_loader import CONFIG_DIR
+from app.models import ContentItem
+
+try:
+    from yaml import CSafeDumper as Dumper
+except ImportError:
+    from yaml import SafeDumper as Dumper
+
+GENRES = [
+    "Action", "Adventure", "Animation", "Comedy", "Crime", "Documentary", "Drama",
+    "Family", "Fantasy", "History", "Horror", "Music", "Mystery", "Romance",
+    "Science Fiction", "Thriller", "War", "Western",
+]
+LANGUAGES = ["English", "French", "Spanish", "German", "Japanese", "Korean", "Hindi", "Italian"]
+WORDS = [
+    "night", "river", "shadow", "king", "city", "love", "war", "dream", "storm", "ghost",
+    "summer", "last", "secret", "lost", "star", "road", "blood", "iron", "silent", "golden",
+    "winter", "empire", "heart", "fire", "ocean", "house", "garden", "machine", "wild", "return",
+]
+FIRST_NAMES = ["Alice", "Bob", "Carla", "David", "Elena", "Frank", "Grace", "Hiro", "Ines", "Jonas"]
+LAST_NAMES = ["Smith", "Moreau", "Garcia", "Weber", "Tanaka", "Kim", "Patel", "Rossi", "Brown", "Lee"]
+
+
+def synthetic_records(n: int, seed: int = 42) -> Iterator[Dict]:
+    """Yield n raw catalog records in the content.yaml schema."""
+    rng = random.Random(seed)
+    for i in range(n):
+        slug = f"syn{i:07d}"
+        cast = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(rng.randint(1, 4))]
+        yield {
+            "id": f"tt{i:08d}",
+            "title": " ".join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(1, 4))),
+            "type": "tv" if rng.random() < 0.25 else "movie",
+            "year": rng.randint(1950, 2025),
+            "genres": rng.sample(GENRES, rng.randint(1, 3)),
+            "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))) + ".",
+            "rating": round(rng.uniform(1.0, 9.9), 1),
+            "poster_url": f"https://images.example.com/posters/{slug}.jpg",
+            "trailer_url": f"https://www.youtube.com/embed/{slug}",
+            "cast": cast,
+            "director": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "duration": rng.randint(20, 180),
+            "language": rng.choice(LANGUAGES),
+            "video_url": f"https://example.com/videos/{slug}.mp4",
+            "download_url": f"https://example.com/downloads/{slug}.mp4",
+        }
+
+
+def synthetic_items(n: int, seed: int = 42, validate: bool = False) -> List[ContentItem]:
+    """Build n ContentItem objects; skips Pydantic validation unless asked."""
+    build = ContentItem.model_validate if validate else lambda rec: ContentItem.model_construct(**rec)
+    return [build(rec) for rec in synthetic_records(n, seed)]
+
+
+def write_catalog(path: Path, n: int, seed: int = 42) -> None:
+    """Write n synthetic records as a content.yaml file."""
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.dump({"movies": list(synthetic_records(n, seed))}, f, Dumper=Dumper)
+
+
+def write_config_dir(config_dir: Path, n: int, seed: int = 42) -> None:
+    """A config directory with a synthetic content.yaml and the shipped categories.yaml."""
+    config_dir.mkdir(parents=True, exist_ok=True)
+    write_catalog(config_dir / "content.yaml", n, seed)
+    shutil.copy(CONFIG_DIR / "categories.yaml", config_dir / "categories.yaml")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic Mac Flix config directory.")
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+    write_config_dir(Path(args.out), args.items, args.seed)
+
+
+if __name__ == "__main__":
+    main()
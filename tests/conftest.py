@@ -0,0 +1,50 @@
+"""Shared pytest fixtures for Mac Flix tests."""
+
+import pytest
+from fastapi.testclient import TestClient
+import app.main as main
+from app.models import ContentItem
+
+
+@pytest.fixture
+def make_item():
+    """Factory for valid ContentItem objects with overridable fields."""
+    def factory(item_id, **overrides):
+        data = {
+            "id": item_id,
+            "title": f"Title {item_id}",
+            "type": "movie",
+            "year": 2001,
+            "genres": ["Drama"],
+            "description": "A test item.",
+            "rating": 7.0,
+            "poster_url": f"https://example.com/{item_id}.jpg",
+            "language": "English",
+            "video_url": f"https://example.com/{item_id}.mp4",
+        }
+        data.update(overrides)
+        return ContentItem(**data)
+    return factory
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """Point the app at a catalog (and categories, if given) and return a TestClient for it."""
+    def factory(store, categories=None):
+        monkeypatch.setattr(main, "catalog", store)
+        if categories is not None:
+            monkeypatch.setattr(main, "categories", categories)
+        return TestClient(main.app)
+    return factory
+
+
+@pytest.fixture
+def categories():
+    """Categories `client` serves; None keeps the app's. Modules override it."""
+    return None
+
+
+@pytest.fixture
+def client(store, categories, serve):
+    """A TestClient serving the module's `store` fixture and `categories`."""
+    return serve(store, categories)
@@ -1,7 +1,13 @@
-lets do next """Pytest tests for Mac Flix FastAPI backend."""
+"""Pytest tests for Mac Flix FastAPI backend."""
 
+import json
+import httpx
+import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.omdb_client import AsyncOMDBClient
+from app.tmdb_client import AsyncTMDBClient
+from benchmarks.stub_upstream import make_app
 
 client = TestClient(app)
 
@@ -29,10 +35,15 @@ def test_get_content_item_invalid():
     assert response.status_code == 404
 
 def test_get_categories():
-    response = client.get("/categories")
+    with TestClient(app) as client:  # runs startup, which loads categories.yaml
+        response = client.get("/categories")
     assert response.status_code == 200
     assert "categories" in response.json()
 
+def test_get_categories_before_startup(monkeypatch):
+    monkeypatch.setattr("app.main.categories", None)
+    assert client.get("/categories").status_code == 503
+
 def test_stream_content_valid():
     response = client.get("/content")
     items = response.json()
@@ -58,10 +69,45 @@ def test_download_content_invalid():
     assert response.status_code == 404
 
 
-def test_tmdb_search():
-    """Test TMDB search endpoint."""
+def test_tmdb_search(monkeypatch):
+    """Test TMDB search endpoint, against the local upstream stub rather than the live API."""
+    import app.main as main
+    http = httpx.AsyncClient(transport=httpx.ASGITransport(app=make_app(latency_ms=0)))
+    monkeypatch.setattr(main, "tmdb", AsyncTMDBClient(http, api_key="test", base_url="http://stub.test/3"))
+    monkeypatch.setattr(main, "omdb", AsyncOMDBClient(http, api_key="test", base_url="http://stub.test/"))
     response = client.get("/tmdb/search", params={"query": "Inception", "media_type": "movie"})
     assert response.status_code == 200
     data = response.json()
     assert "results" in data
     assert isinstance(data["results"], list)
+
+
+@pytest.fixture
+def paged_client(make_item, serve):
+    from app.catalog import CatalogStore
+    return serve(CatalogStore([make_item(f"id{i:02d}") for i in range(25)]))
+
+def test_get_all_content_cursor_pagination(paged_client):
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 10, **({"cursor": cursor} if cursor else {})}
+        resp = paged_client.get("/content", params=params)
+        assert resp.status_code == 200
+        assert resp.headers["X-Total-Count"] == "25"
+        seen.extend(item["id"] for item in resp.json())
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == [f"id{i:02d}" for i in range(25)]
+
+def test_get_all_content_invalid_cursor(paged_client):
+    assert paged_client.get("/content", params={"cursor": "!!!"}).status_code == 400
+
+def test_export_content_ndjson(paged_client):
+    resp = paged_client.get("/content/export")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = resp.text.splitlines()
+    assert len(lines) == 25
+    assert json.loads(lines[0])["id"] == "id00"
@@ -0,0 +1,80 @@
+"""Pytest tests for the TTL + LRU upstream cache and its single-flight loading."""
+
+import asyncio
+import threading
+import pytest
+from app.cache import CacheStats, TTLCache, normalize_query
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalize_query():
+    assert normalize_query("  The   DARK knight ") == "the dark knight"
+
+
+def test_ttl_and_lru_eviction():
+    clock = Clock()
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1
+    clock.now = 11
+    assert cache.get("a") is None
+    assert cache.stats() == CacheStats(hits=0, misses=0, coalesced=0, evictions=1, expirations=1, size=1)
+
+
+def test_get_or_load_counts_and_skips_failures():
+    cache = TTLCache()
+    assert cache.get_or_load("k", lambda: 1) == 1
+    assert cache.get_or_load("k", lambda: 2) == 1
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("bad", lambda: (_ for _ in ()).throw(RuntimeError("upstream down")))
+    assert cache.get("bad") is None
+    assert (cache.stats().hits, cache.stats().misses) == (1, 2)
+
+
+def test_threads_coalesce_concurrent_misses():
+    cache = TTLCache()
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        release.wait(5)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("k", loader))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    while cache.stats().misses + cache.stats().coalesced < 8:
+        pass
+    release.set()
+    for t in threads:
+        t.join()
+    assert calls == [1] and results == ["value"] * 8
+
+
+def test_tasks_coalesce_concurrent_misses():
+    cache = TTLCache()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def run():
+        return await asyncio.gather(*(cache.aget_or_load("k", loader) for _ in range(20)))
+
+    assert asyncio.run(run()) == ["value"] * 20
+    assert calls == [1]
+    assert (cache.stats().misses, cache.stats().coalesced) == (1, 19)
@@ -0,0 +1,66 @@
+"""Pytest unit tests for the Mac Flix catalog store."""
+
+import pytest
+from app.catalog import CatalogStore, bits_from_ordinals, decode_cursor, encode_cursor, iter_bits
+from app.config_loader import load_catalog
+
+
+@pytest.fixture
+def store(make_item):
+    return CatalogStore([
+        make_item("a", genres=["Drama", "Crime"], year=1994),
+        make_item("b", type="tv", genres=["Fantasy"], year=2011, language="French"),
+        make_item("c", genres=["Drama"], year=2011, language=None),
+    ])
+
+
+def test_bitset_roundtrip():
+    bits = bits_from_ordinals([0, 3, 9, 64], 70)
+    assert list(iter_bits(bits)) == [0, 3, 9, 64]
+    assert list(iter_bits(0)) == []
+
+
+def test_get_by_id(store):
+    assert store.get("b").title == "Title b"
+    assert store.get("missing") is None
+    assert "a" in store
+    assert len(store) == 3
+
+
+def test_secondary_indexes(store):
+    assert [i.id for i in store.lookup("genre", "Drama")] == ["a", "c"]
+    assert [i.id for i in store.lookup("type", "tv")] == ["b"]
+    assert [i.id for i in store.lookup("year", 2011)] == ["b", "c"]
+    assert [i.id for i in store.lookup("language", "English")] == ["a"]
+    assert store.lookup("genre", "Western") == []
+    assert store.keys("genre") == ["Crime", "Drama", "Fantasy"]
+
+
+def test_unknown_index(store):
+    with pytest.raises(KeyError):
+        store.lookup("director", "Nobody")
+
+
+def test_duplicate_id_rejected(make_item):
+    with pytest.raises(ValueError):
+        CatalogStore([make_item("a"), make_item("a")])
+
+
+def test_load_catalog():
+    store = load_catalog()
+    assert isinstance(store, CatalogStore)
+    assert all(store.get(item.id) is item for item in store)
+
+
+def test_cursor_roundtrip():
+    assert decode_cursor(encode_cursor("tt0111161")) == "tt0111161"
+    with pytest.raises(ValueError):
+        decode_cursor("!!!")
+
+
+def test_page_after_uses_id_order(make_item):
+    store = CatalogStore([make_item(i) for i in ["c", "a", "d", "b"]])
+    items, more = store.page_after(None, 2)
+    assert [i.id for i in items] == ["a", "b"] and more
+    items, more = store.page_after("b", 2)
+    assert [i.id for i in items] == ["c", "d"] and not more
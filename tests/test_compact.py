@@ -0,0 +1,61 @@
+"""Pytest tests for compact, column-backed catalog storage."""
+
+import warnings
+import pytest
+from app.catalog import CatalogStore
+from app.compact import CompactItems
+
+
+@pytest.fixture
+def items(make_item):
+    return [
+        make_item("a", title="Amélie", genres=["Comedy", "Romance"], language="French", rating=8),
+        make_item(
+            "b", type="tv", rating=None, language=None, cast=["Ann Lee", "Bo Kim"], director="Ann Lee",
+            duration=0, trailer_url="https://youtube.com/embed/b", download_url="https://example.com/b.zip",
+        ),
+        make_item("c", genres=[], cast=[]),
+    ]
+
+
+def test_compact_items_roundtrip(items):
+    compact = CompactItems()
+    for item in items:
+        compact.append(item)
+    assert [compact[i] for i in range(3)] == items
+    assert [compact.json(i) for i in range(3)] == [item.model_dump_json().encode("utf-8") for item in items]
+    assert compact[1] is compact[1]
+
+
+def test_compact_items_are_built_without_validation(items, monkeypatch):
+    compact = CompactItems()
+    for item in items:
+        compact.append(item)
+    monkeypatch.setattr("app.models.ContentItem.__init__", None)  # any validating construction would fail
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")  # plain strings in HttpUrl fields warn when serialized
+        assert [compact[i].model_dump_json() for i in range(3)] == [item.model_dump_json() for item in items]
+    assert compact[1].trailer_url == items[1].trailer_url
+
+
+def test_compact_items_copy_on_write(items, make_item):
+    compact = CompactItems()
+    for item in items:
+        compact.append(item)
+    copy = compact.copy()
+    copy[0] = make_item("a", title="Edited")
+    copy[2] = None
+    copy.append(make_item("d"))
+    assert compact[0].title == "Amélie" and len(compact) == 3
+    assert copy[0].title == "Edited" and copy.json(0) is None
+    assert copy[2] is None and copy[3].id == "d" and len(copy) == 4
+    compact.append(make_item("e"))  # frozen columns: later appends stay local
+    assert len(copy) == 4
+
+
+def test_compact_store_stays_compact(items, make_item):
+    store = CatalogStore(items, version="v1", compact=True)
+    assert store.compact and [i.id for i in store.lookup("genre", "Comedy")] == ["a"]
+    assert store.item_json("b") == items[1].model_dump_json().encode("utf-8")
+    new, _ = store.apply_changes([], ["a", "b"], "v2")  # past the tombstone threshold
+    assert new.compact and [i.id for i in new] == ["c"]
@@ -0,0 +1,103 @@
+"""Pytest tests for the persistent SQLite metadata cache."""
+
+import asyncio
+import threading
+import httpx
+import pytest
+import app.disk_cache as disk_cache
+from app.disk_cache import STALE_TTL, DiskCache, aload_through
+from app.tmdb_client import AsyncTMDBClient
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def disk(tmp_path, clock):
+    return DiskCache(tmp_path / "cache" / "metadata.sqlite", clock=clock)
+
+
+def test_fresh_stale_and_expired(disk, clock):
+    disk.set(("tmdb", "details", "movie", 1), "tmdb", {"id": 1}, ttl=10)
+    assert disk.get(("tmdb", "details", "movie", 1)) == ({"id": 1}, True)
+    clock.now += 11
+    assert disk.get(("tmdb", "details", "movie", 1)) == ({"id": 1}, False)
+    clock.now += STALE_TTL
+    assert disk.get(("tmdb", "details", "movie", 1)) is None
+    assert disk.stats()[:3] == (1, 1, 1)
+
+
+def test_shared_between_processes(disk, tmp_path, clock):
+    other = DiskCache(tmp_path / "cache" / "metadata.sqlite", clock=clock)
+    disk.set("k", "omdb", [1, 2])
+    assert other.get("k") == ([1, 2], True)
+
+
+def test_evicts_least_recently_used_by_size(disk, clock):
+    disk.max_bytes = 100
+    for i in range(10):
+        clock.now += 100  # past TOUCH_INTERVAL, so each get refreshes accessed_at
+        disk.set(i, "tmdb", "x" * 20)
+    disk.get(0)
+    assert disk.evict() > 0
+    assert disk.stats().bytes <= 100
+    assert disk.get(0) is not None and disk.get(1) is None and disk.get(9) is not None
+
+
+def test_stale_while_revalidate(disk, clock):
+    calls = []
+
+    def upstream(request):
+        calls.append(request)
+        return httpx.Response(200, json={"results": [{"title": f"v{len(calls)}"}]})
+
+    client = AsyncTMDBClient(httpx.AsyncClient(transport=httpx.MockTransport(upstream)), disk=disk)
+
+    async def run():
+        first = await client.search("Heat")
+        client.cache.clear()  # a restarted worker: empty memory, warm disk
+        warm = await client.search("Heat")
+        clock.now += 2 * 24 * 3600  # past the TMDB TTL, within the stale window
+        client.cache.clear()
+        stale = await client.search("Heat")
+        await asyncio.gather(*disk_cache._background)  # let the background refresh finish
+        return first, warm, stale, await client.search("Heat")
+
+    first, warm, stale, refreshed = asyncio.run(run())
+    assert first == warm == stale == [{"title": "v1"}]
+    assert refreshed == [{"title": "v2"}] and len(calls) == 2
+    assert disk.get(("tmdb", "search", "movie", "heat")) == ([{"title": "v2"}], True)
+
+
+def test_without_disk_fetches_directly():
+    async def fetch():
+        return 42
+    assert asyncio.run(aload_through(None, "k", "tmdb", fetch, lambda v: None)) == 42
+
+
+def test_async_reads_and_writes_leave_the_event_loop(disk):
+    threads = []
+    get, set_ = disk.get, disk.set
+    disk.get = lambda *args: threads.append(threading.get_ident()) or get(*args)
+    disk.set = lambda *args: threads.append(threading.get_ident()) or set_(*args)
+
+    async def fetch():
+        return {"title": "Heat"}
+
+    async def run():
+        await aload_through(disk, "k", "tmdb", fetch, lambda v: None)
+        return await aload_through(disk, "k", "tmdb", fetch, lambda v: None), threading.get_ident()
+
+    value, loop_thread = asyncio.run(run())
+    assert value == {"title": "Heat"}
+    assert len(threads) == 3 and loop_thread not in threads
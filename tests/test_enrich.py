@@ -0,0 +1,104 @@
+"""Pytest tests for the bulk enrichment job and its token-bucket rate limit."""
+
+import argparse
+import asyncio
+import httpx
+import yaml
+import app.enrich as enrich
+from app.enrich import Checkpoint, merge_catalog, omdb_fields, run_enrichment
+from app.omdb_client import AsyncOMDBClient
+from app.ratelimit import TokenBucket
+from app.snapshot import load_snapshot
+from app.tmdb_client import AsyncTMDBClient
+
+
+def upstream(calls):
+    def handler(request):
+        calls.append(request.url.path)
+        if request.url.host == "tmdb.test":
+            if request.url.path.startswith("/3/find/"):
+                return httpx.Response(200, json={"movie_results": [{"id": 7}], "tv_results": []})
+            videos = [{"site": "YouTube", "type": "Trailer", "key": "abc"}]
+            return httpx.Response(200, json={"id": 7, "poster_path": "/p.jpg", "videos": {"results": videos}})
+        imdb_id = request.url.params["i"]
+        if imdb_id == "tt-bad":
+            return httpx.Response(503, text="unavailable")
+        return httpx.Response(200, json={"Response": "True", "imdbRating": "8.1", "Runtime": "99 min",
+                                         "Poster": "N/A", "Actors": "Ann Lee, Bo Kim", "Language": "French"})
+    return handler
+
+
+def clients(calls):
+    http = httpx.AsyncClient(transport=httpx.MockTransport(upstream(calls)))
+    omdb = AsyncOMDBClient(http, base_url="https://omdb.test/")
+    tmdb = AsyncTMDBClient(http, base_url="https://tmdb.test/3")
+    return omdb, tmdb
+
+
+def test_omdb_fields_skip_missing_values():
+    fields = omdb_fields({"Poster": "N/A", "imdbRating": "7.5", "Runtime": "N/A", "Director": "Ann Lee"})
+    assert fields == {"rating": 7.5, "director": "Ann Lee"}
+
+
+def test_run_enrichment_checkpoints_and_resumes(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    calls = []
+    checkpoint = Checkpoint(path)
+    stats = asyncio.run(run_enrichment(["tt1", "tt2", "tt-bad"], *clients(calls), checkpoint, concurrency=2))
+    checkpoint.close()
+    assert (stats.fetched, stats.skipped, stats.failed) == (2, 0, 1)
+    assert checkpoint.entries["tt1"]["fields"] == {
+        "trailer_url": "https://www.youtube.com/watch?v=abc",
+        "poster_url": "https://image.tmdb.org/t/p/w500/p.jpg",
+        "rating": 8.1, "duration": 99, "cast": ["Ann Lee", "Bo Kim"], "language": "French",
+    }
+
+    calls.clear()
+    resumed = Checkpoint(path)
+    stats = asyncio.run(run_enrichment(["tt1", "tt2", "tt-bad"], *clients(calls), resumed))
+    assert (stats.fetched, stats.skipped, stats.failed) == (0, 2, 1)
+    assert all("tt1" not in c and "tt2" not in c for c in calls)
+    stale = Checkpoint(path)
+    stats = asyncio.run(run_enrichment(["tt1"], *clients(calls), stale, max_age=0))
+    assert stats.fetched == 1
+
+
+def test_merge_catalog_fills_missing_fields(tmp_path, make_item):
+    checkpoint = Checkpoint(tmp_path / "checkpoint.jsonl")
+    checkpoint.record("a", {"rating": 5.0, "duration": 99, "poster_url": "not a url"}, now=0)
+    checkpoint.record("b", {"duration": 120}, now=0)
+    checkpoint.close()
+    records = [make_item(i).model_dump(mode="json") for i in "abc"]
+    merged = merge_catalog(records, checkpoint)
+    assert (merged[0]["duration"], merged[0]["rating"]) == (99, 7.0)  # hand-set values win
+    assert merged[1]["duration"] == 120 and merged[2] == records[2]
+    overwritten = merge_catalog(records, checkpoint, overwrite=True)
+    assert overwritten[0] == records[0]  # the invalid poster URL keeps "a" unenriched
+
+
+def test_limit_enriches_only_the_first_items_but_writes_them_all(tmp_path, make_item, monkeypatch):
+    calls = []
+    monkeypatch.setattr(enrich, "make_async_client",
+                        lambda: httpx.AsyncClient(transport=httpx.MockTransport(upstream(calls))))
+    source = tmp_path / "content.yaml"
+    source.write_text(yaml.safe_dump({"movies": [make_item(f"tt{i}").model_dump(mode="json") for i in range(5)]}))
+    args = argparse.Namespace(
+        input=str(source), output=str(tmp_path / "enriched.yaml"), snapshot=str(tmp_path / "enriched.snapshot"),
+        checkpoint=str(tmp_path / "checkpoint.jsonl"), concurrency=2, rate=1000.0, burst=None, max_age=30.0,
+        tmdb=False, overwrite=False, limit=2,
+    )
+    stats = asyncio.run(enrich._enrich(args))
+    assert stats.fetched == 2 and len(calls) == 2
+    written = yaml.safe_load((tmp_path / "enriched.yaml").read_text())["movies"]
+    assert [record["id"] for record in written] == [f"tt{i}" for i in range(5)]
+    assert [record.get("duration") for record in written] == [99, 99, None, None, None]
+    assert len(load_snapshot(tmp_path / "enriched.snapshot")) == 5
+
+
+def test_token_bucket_limits_rate():
+    now = [0.0]
+    bucket = TokenBucket(rate=2, burst=2, clock=lambda: now[0])
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    now[0] = 0.5
+    assert bucket.try_acquire() and not bucket.try_acquire()
@@ -0,0 +1,72 @@
+"""Pytest tests for the fast JSON response mode (MACFLIX_FAST_JSON)."""
+
+import json
+import pytest
+import app.fast_json as fast_json
+import app.main as main
+from app.catalog import CatalogStore
+from app.models import Category, CategoryConfig, ContentQueryResult, Filter
+
+PATHS = [
+    "/content?limit=2",
+    "/content?limit=2&cursor=Yg",
+    "/content/query?genre=Drama&sort=rating&limit=3",
+    "/content/query?genre=Comedy&facets=false",
+    "/search?q=title",
+    "/suggest?prefix=ti",
+    "/content/a/similar?limit=3",
+    "/categories/Dramas/items?facets=true",
+    "/categories/Dramas/items?filter=Recent",
+]
+
+
+@pytest.fixture(params=[False, True], ids=["models", "compact"])
+def client(request, make_item, serve):
+    items = [
+        make_item("a", title="Amélie", genres=["Drama", "Comedy"], cast=["Audrey Tautou"], rating=8.3),
+        make_item("b", genres=["Drama"], year=2019, cast=["Audrey Tautou"], director="Jean", rating=6.5),
+        make_item("c", genres=["Comedy"], trailer_url="https://example.com/t.mp4", duration=95),
+        make_item("d", genres=["Drama"], rating=None, language=None),
+    ]
+    return serve(CatalogStore(items, compact=request.param), CategoryConfig(categories=[
+        Category(name="Dramas", filters=[Filter(name="Recent", type="year", value=2010)]),
+    ]))
+
+
+def fetch_all(client):
+    responses = {}
+    for path in PATHS:
+        response = client.get(path)
+        assert response.status_code == 200, path
+        responses[path] = (response.json(), response.headers.get("x-next-cursor"), response.headers.get("x-total-count"))
+    return responses
+
+
+@pytest.mark.parametrize("use_orjson", [False, True], ids=["stdlib", "orjson"])
+def test_fast_mode_matches_validated_responses(client, monkeypatch, use_orjson):
+    if use_orjson and not fast_json.orjson_available():
+        pytest.skip("orjson is not installed")
+    expected = fetch_all(client)
+    monkeypatch.setattr(main, "FAST_JSON", True)
+    monkeypatch.setattr(fast_json, "FAST_JSON", True)
+    if not use_orjson:
+        monkeypatch.setattr(fast_json, "orjson", None)
+    assert fetch_all(client) == expected
+
+
+def test_fast_mode_returns_raw_json(client, monkeypatch):
+    monkeypatch.setattr(main, "FAST_JSON", True)
+    response = client.get("/content/query?genre=Drama")
+    assert response.headers["content-type"] == "application/json"
+    assert ContentQueryResult.model_validate_json(response.content).total == 3
+
+
+def test_query_result_keeps_model_key_order():
+    body = fast_json.query_result(3, 0, 2, b"[]", {"type": {"movie": 3}})
+    assert list(json.loads(body)) == list(ContentQueryResult.model_fields)
+    assert json.loads(fast_json.query_result(0, 5, 10, b"[]"))["facets"] is None
+
+
+def test_openapi_schema_is_unchanged_by_fast_mode():
+    schema = main.app.openapi()["paths"]["/content/query"]["get"]["responses"]["200"]
+    assert schema["content"]["application/json"]["schema"] == {"$ref": "#/components/schemas/ContentQueryResult"}
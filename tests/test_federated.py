@@ -0,0 +1,130 @@
+"""Pytest tests for federated search over the catalog, TMDB and OMDB."""
+
+import asyncio
+import time
+import httpx
+import pytest
+import app.main as main
+from app.catalog import CatalogStore
+from app.federated import federated_search, merge, omdb_hits, tmdb_hits
+from app.models import FederatedHit
+from app.omdb_client import AsyncOMDBClient
+from app.resilience import RetryPolicy, Upstream
+from app.tmdb_client import AsyncTMDBClient
+
+TMDB_RESULTS = [
+    {"id": 27205, "title": "Inception", "release_date": "2010-07-15", "vote_average": 8.4, "poster_path": "/i.jpg"},
+    {"id": 64956, "title": "Inception: The Cobol Job", "release_date": "2010-12-07", "vote_average": 7.1},
+]
+OMDB_RESULTS = [
+    {"Title": "Inception", "Year": "2010", "imdbID": "tt1375666", "Type": "movie", "Poster": "N/A"},
+    {"Title": "Inception: Jump Right Into the Action", "Year": "2010", "imdbID": "tt5295894", "Type": "movie"},
+]
+
+
+async def no_sleep(seconds):
+    pass
+
+
+def upstream_transport(delays=None, statuses=None, seen=None):
+    """A mock TMDB/OMDB origin; delays and statuses are per host (tmdb.test, omdb.test)."""
+    delays, statuses = delays or {}, statuses or {}
+
+    async def handler(request):
+        host = request.url.host
+        if seen is not None:
+            seen.append(request.url)
+        await asyncio.sleep(delays.get(host, 0))
+        if host in statuses:
+            return httpx.Response(statuses[host])
+        if host == "tmdb.test":
+            return httpx.Response(200, json={"results": TMDB_RESULTS})
+        return httpx.Response(200, json={"Response": "True", "Search": OMDB_RESULTS})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def clients(http, tmdb_key="k", omdb_key="k"):
+    def upstream(name):
+        return Upstream(name, retry=RetryPolicy(attempts=1), sleep=no_sleep)
+
+    return (
+        AsyncTMDBClient(http, api_key=tmdb_key, base_url="https://tmdb.test/3", upstream=upstream("tmdb")),
+        AsyncOMDBClient(http, api_key=omdb_key, base_url="https://omdb.test/", upstream=upstream("omdb")),
+    )
+
+
+@pytest.fixture
+def store(make_item):
+    return CatalogStore([
+        make_item("tt1375666", title="Inception", year=2010, rating=8.8),
+        make_item("tt0000001", title="Heat", year=1995),
+    ])
+
+
+def test_merge_joins_sources_by_imdb_id_and_title_year():
+    local = [FederatedHit(id="tt1375666", title="Inception", year=2010, imdb_id="tt1375666", in_catalog=True)]
+    merged = merge({"local": local, "omdb": omdb_hits(OMDB_RESULTS), "tmdb": tmdb_hits(TMDB_RESULTS, "movie")}, 10)
+    assert [hit.title for hit in merged][0] == "Inception"
+    top = merged[0]
+    assert top.sources == ["local", "omdb", "tmdb"]
+    assert top.id == "tt1375666" and top.in_catalog
+    assert top.tmdb_id == 27205
+    assert top.poster_url == "https://image.tmdb.org/t/p/w500/i.jpg"  # filled in from TMDB; OMDB had none
+    assert len(merged) == 3
+    assert [hit.score for hit in merged] == sorted((hit.score for hit in merged), reverse=True)
+
+
+def test_merge_counts_a_source_once_per_title():
+    duplicated = tmdb_hits(TMDB_RESULTS[:1] * 2, "movie")
+    merged = merge({"tmdb": duplicated}, 10)
+    assert len(merged) == 1 and merged[0].sources == ["tmdb"]
+
+
+def test_sources_run_concurrently_within_the_deadline(store):
+    tmdb, omdb = clients(upstream_transport(delays={"tmdb.test": 0.3, "omdb.test": 0.3}))
+    start = time.perf_counter()
+    result = asyncio.run(federated_search(store, tmdb, omdb, "inception", timeout=2))
+    assert time.perf_counter() - start < 0.55  # about the slowest source, not the sum
+    assert result.sources == {"local": "ok", "tmdb": "ok", "omdb": "ok"}
+    assert not result.partial
+    assert result.results[0].sources == ["local", "omdb", "tmdb"]
+
+
+def test_slow_sources_are_left_out_at_the_deadline(store):
+    tmdb, omdb = clients(upstream_transport(delays={"tmdb.test": 1.0}))
+    start = time.perf_counter()
+    result = asyncio.run(federated_search(store, tmdb, omdb, "inception", timeout=0.2))
+    assert time.perf_counter() - start < 0.6
+    assert result.sources == {"local": "ok", "tmdb": "timeout", "omdb": "ok"}
+    assert result.partial
+    assert all("tmdb" not in hit.sources for hit in result.results)
+
+
+def test_failed_and_unconfigured_sources_are_reported(store):
+    tmdb, omdb = clients(upstream_transport(statuses={"omdb.test": 503}), tmdb_key="")
+    result = asyncio.run(federated_search(store, tmdb, omdb, "inception"))
+    assert result.sources == {"local": "ok", "tmdb": "disabled", "omdb": "unavailable"}
+    assert result.results[0].id == "tt1375666"
+
+
+def test_media_type_filters_both_upstreams(store):
+    seen = []
+    tmdb, omdb = clients(upstream_transport(seen=seen))
+    result = asyncio.run(federated_search(store, tmdb, omdb, "inception", media_type="tv"))
+    assert result.sources == {"local": "ok", "tmdb": "ok", "omdb": "ok"}
+    by_host = {url.host: url for url in seen}
+    assert by_host["tmdb.test"].path == "/3/search/tv"
+    assert by_host["omdb.test"].params["type"] == "series"
+
+
+def test_federated_endpoint(client, monkeypatch):
+    tmdb, omdb = clients(upstream_transport())
+    monkeypatch.setattr(main, "tmdb", tmdb)
+    monkeypatch.setattr(main, "omdb", omdb)
+    response = client.get("/search/federated", params={"q": "inception", "limit": 2})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["results"]) == 2
+    assert data["results"][0]["in_catalog"] is True
+    assert data["sources"]["tmdb"] == "ok"
@@ -0,0 +1,106 @@
+"""Pytest tests for the Mac Flix server-side filter engine."""
+
+import pytest
+from app.catalog import CatalogStore
+from app.filters import evaluate_filters, facet_counts, page, query_bits, year_bounds
+from app.models import Category, CategoryConfig, Filter
+
+
+@pytest.fixture
+def store(make_item):
+    return CatalogStore([
+        make_item("a", genres=["Drama", "Crime"], year=1994, rating=9.3),
+        make_item("b", type="tv", genres=["Fantasy", "Drama"], year=2011, rating=9.2, language="French"),
+        make_item("c", genres=["Action"], year=2021, rating=8.0),
+        make_item("d", genres=["Action", "Fantasy"], year=2015, rating=None),
+    ])
+
+
+@pytest.fixture
+def categories():
+    return CategoryConfig(categories=[
+        Category(name="Top Rated", filters=[Filter(name="Rating > 8", type="rating", value=8.0)]),
+        Category(name="By Genre", filters=[
+            Filter(name="Action", type="genre", value="Action"),
+            Filter(name="Drama", type="genre", value="Drama"),
+        ]),
+        Category(name="2010s Fantasy", filters=[
+            Filter(name="Fantasy", type="genre", value="Fantasy"),
+            Filter(name="2010s", type="year", value=2010),
+        ]),
+    ])
+
+
+def ids(items):
+    return [item.id for item in items]
+
+
+def test_year_bounds():
+    assert year_bounds(2020) == (2020, 2029)
+    assert year_bounds("1990-1994") == (1990, 1994)
+
+
+def test_filters_or_within_type_and_across_types(store):
+    genre_or = [Filter(name="Crime", type="genre", value="Crime"), Filter(name="Action", type="genre", value="Action")]
+    assert ids(store.select(evaluate_filters(store, genre_or))) == ["a", "c", "d"]
+    mixed = genre_or + [Filter(name="2020s", type="year", value=2020)]
+    assert ids(store.select(evaluate_filters(store, mixed))) == ["c"]
+    assert evaluate_filters(store, None) == store.all_bits
+
+
+def test_rating_filter_is_strict(store):
+    top = [Filter(name="Rating > 8", type="rating", value=8.0)]
+    assert ids(store.select(evaluate_filters(store, top))) == ["a", "b"]
+
+
+def test_query_bits(store):
+    assert ids(store.select(query_bits(store, genres=["Drama", "Fantasy"], match_all_genres=True))) == ["b"]
+    assert ids(store.select(query_bits(store, genres=["Drama", "Fantasy"]))) == ["a", "b", "d"]
+    assert ids(store.select(query_bits(store, year_from=2011, year_to=2020))) == ["b", "d"]
+    assert ids(store.select(query_bits(store, min_rating=8.0))) == ["a", "b", "c"]
+    assert ids(store.select(query_bits(store, type="tv", language="French"))) == ["b"]
+
+
+def test_page_sorting(store):
+    assert ids(page(store, store.all_bits, sort="rating")) == ["a", "b", "c", "d"]
+    assert ids(page(store, store.all_bits, sort="year", offset=1, limit=2)) == ["d", "b"]
+
+
+def test_rating_pages_include_unrated_items(make_item):
+    store = CatalogStore([make_item(f"i{n:02d}", rating=None if n % 5 == 0 else n / 4) for n in range(30)])
+    pages = [page(store, store.all_bits, offset, 7, sort="rating") for offset in range(0, 30, 7)]
+    listed = [item for chunk in pages for item in chunk]
+    assert len(listed) == 30 and len(set(ids(listed))) == 30
+    ratings = [item.rating for item in listed]
+    assert ratings[:24] == sorted(ratings[:24], reverse=True)
+    assert ids(listed[24:]) == ["i00", "i05", "i10", "i15", "i20", "i25"]  # unrated last, in catalog order
+
+
+def test_facet_counts(store):
+    facets = facet_counts(store, query_bits(store, genres=["Fantasy"]))
+    assert facets["genre"] == {"Fantasy": 2, "Drama": 1, "Action": 1}
+    assert facets["decade"] == {"2010s": 2}
+    assert facets["type"] == {"tv": 1, "movie": 1}
+
+
+def test_query_endpoint(client):
+    resp = client.get("/content/query", params={"genre": ["Action"], "sort": "year", "limit": 1})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["total"] == 2
+    assert [item["id"] for item in data["items"]] == ["c"]
+    assert data["facets"]["genre"]["Fantasy"] == 1
+
+
+def test_category_items_endpoint(client):
+    data = client.get("/categories/Top Rated/items").json()
+    assert [item["id"] for item in data["items"]] == ["a", "b"]
+    data = client.get("/categories/By Genre/items", params={"filter": "Drama"}).json()
+    assert [item["id"] for item in data["items"]] == ["a", "b"]
+    data = client.get("/categories/2010s Fantasy/items").json()
+    assert [item["id"] for item in data["items"]] == ["b", "d"]
+
+
+def test_category_items_not_found(client):
+    assert client.get("/categories/Nope/items").status_code == 404
+    assert client.get("/categories/By Genre/items", params={"filter": "Nope"}).status_code == 404
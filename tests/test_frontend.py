@@ -0,0 +1,102 @@
+"""Pytest tests for the Streamlit frontend's API access and pages."""
+
+import pytest
+import requests
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+import app.frontend as frontend
+import app.home as home
+from app.catalog import CatalogStore
+from app.images import image_version
+from app.models import Category, CategoryConfig, Filter
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, etag=None):
+        self.status_code = status_code
+        self._body = body
+        self.headers = {"ETag": etag} if etag else {}
+
+    def json(self):
+        return self._body
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = responses
+        self.sent = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.sent.append(dict(headers or {}))
+        return self.responses.pop(0)
+
+
+def test_api_get_revalidates_with_etag(monkeypatch):
+    session = FakeSession([FakeResponse(200, {"n": 1}, etag='"v1"'), FakeResponse(304)])
+    monkeypatch.setattr(frontend, "api_session", lambda: session)
+    monkeypatch.setattr(frontend, "validators", lambda store=frontend.Validators(): store)
+    assert frontend.api_get("/thing", a=1) == {"n": 1}
+    assert frontend.api_get("/thing", a=1) == {"n": 1}
+    assert session.sent == [{}, {"If-None-Match": '"v1"'}]
+
+
+def test_validators_keep_the_most_recent():
+    store = frontend.Validators(limit=2)
+    store.put("a", '"1"', 1)
+    store.put("b", '"2"', 2)
+    store.put("a", '"3"', 3)
+    store.put("c", '"4"', 4)
+    assert (store.get("a"), store.get("b"), store.get("c")) == (('"3"', 3), None, ('"4"', 4))
+
+
+def test_api_get_raises_on_errors(monkeypatch):
+    monkeypatch.setattr(frontend, "api_session", lambda: FakeSession([FakeResponse(503)]))
+    monkeypatch.setattr(frontend, "validators", lambda store=frontend.Validators(): store)
+    with pytest.raises(frontend.APIError):
+        frontend.api_get("/down")
+
+
+def test_rows_and_cards():
+    home = {"rows": [{"category": "New", "filter": None}, {"category": "Genre", "filter": "Drama"}]}
+    assert [label for label, _ in frontend.rows(home)] == ["New", "Genre · Drama"]
+    item = {"id": "tt1", "title": "<b>Bold</b>", "year": 2001, "genres": ["Drama"], "description": "x",
+            "rating": 7.25, "poster_url": "https://example.com/p.jpg"}
+    card = frontend.card_html(item)
+    assert "&lt;b&gt;Bold&lt;/b&gt;" in card
+    assert f"/images/tt1/w342?v={image_version(item['poster_url'])}" in card
+
+
+@pytest.fixture
+def backend(make_item, serve, monkeypatch):
+    """Route the frontend's requests to the FastAPI app with a small catalog."""
+    client = serve(
+        CatalogStore([make_item(f"tt{i}", title=f"Drama {i}", rating=9 - i / 10, director="Ann Lee") for i in range(7)]),
+        CategoryConfig(categories=[
+            Category(name="By Genre", filters=[Filter(name="Drama", type="genre", value="Drama")]),
+        ]),
+    )
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        response = client.get(url, params=params, headers=headers)
+        fake = FakeResponse(response.status_code, response.json() if response.status_code == 200 else None,
+                            response.headers.get("etag"))
+        return fake
+
+    monkeypatch.setattr(requests.Session, "get", get)
+
+
+@pytest.mark.parametrize("home_row_size", [20, 5], ids=["from-home", "past-home"])
+def test_home_pages_rows_and_opens_details(backend, monkeypatch, home_row_size):
+    monkeypatch.setattr(home, "HOME_ROW_SIZE", home_row_size)  # 5: the second page needs its own request
+    st.cache_data.clear()
+    app = AppTest.from_file("../app/frontend.py").run()
+    assert not app.exception
+    assert [s.value for s in app.subheader] == ["Welcome to My Flix!", "By Genre · Drama"]
+    assert len([b for b in app.button if b.label == "Details"]) == frontend.ROW_SIZE
+    next(b for b in app.button if b.label == "›").click().run()
+    assert len([b for b in app.button if b.label == "Details"]) == 2
+    next(b for b in app.button if b.label == "Details").click().run()
+    assert app.header[0].value == "Drama 5 (2001)"
+    next(b for b in app.button if b.label == "Show more like this").click().run()
+    assert not app.exception
+    assert any(b.label == "Details" for b in app.button)
@@ -0,0 +1,126 @@
+"""Pytest tests for the materialized home rows and the /home endpoint."""
+
+import json
+import random
+import pytest
+import app.home as home
+from app.catalog import CatalogStore
+from app.home import HomeRows
+from app.models import Category, CategoryConfig, Filter, HomePage
+
+CATEGORIES = CategoryConfig(categories=[
+    Category(name="Top Rated", filters=[Filter(name="Rating > 8", type="rating", value=8.0)]),
+    Category(name="By Genre", filters=[
+        Filter(name="Drama", type="genre", value="Drama"),
+        Filter(name="Comedy", type="genre", value="Comedy"),
+    ]),
+    Category(name="Everything"),
+])
+
+
+@pytest.fixture(autouse=True)
+def small_rows(monkeypatch):
+    monkeypatch.setattr(home, "HOME_ROW_SIZE", 3)
+    monkeypatch.setattr(home, "ROW_DEPTH", 5)
+
+
+def catalog_items(make_item, count, rng, prefix="tt"):
+    return [
+        make_item(
+            f"{prefix}{i:03d}",
+            genres=[rng.choice(["Drama", "Comedy", "Action"])],
+            rating=rng.choice([None, 5.0, 6.5, 7.0, 8.2, 8.8, 9.1]),
+        )
+        for i in range(count)
+    ]
+
+
+def rows(home_rows):
+    return json.loads(home_rows.encoded.body)["rows"]
+
+
+def test_rows_follow_the_category_items_ordering(make_item):
+    store = CatalogStore([
+        make_item("a", rating=8.5), make_item("b", rating=9.0, genres=["Comedy"]),
+        make_item("c", rating=None), make_item("d", rating=8.5), make_item("e", rating=6.0),
+    ])
+    doc = HomePage.model_validate_json(HomeRows(store, CATEGORIES).encoded.body)
+    assert doc.row_size == 3
+    assert [(r.category, r.filter, r.total) for r in doc.rows] == [
+        ("Top Rated", "Rating > 8", 3), ("By Genre", "Drama", 4), ("By Genre", "Comedy", 1), ("Everything", None, 5),
+    ]
+    assert [item.id for item in doc.rows[0].items] == ["b", "a", "d"]
+    assert [item.id for item in doc.rows[1].items] == ["a", "d", "e"]
+    ranked = HomeRows(store, CATEGORIES)._by_key[("Everything", None)].ranked
+    assert [ordinal for *_, ordinal in ranked] == [1, 0, 3, 4, 2]  # the unrated item last, as with sort=rating
+    assert set(json.loads(HomeRows(store, CATEGORIES).encoded.body)["rows"][0]["items"][0]) == set(
+        home.HomeCard.model_fields
+    )
+
+
+@pytest.mark.parametrize("compact", [False, True], ids=["models", "compact"])
+def test_patched_rows_match_a_fresh_build(make_item, compact):
+    rng = random.Random(7)
+    items = {item.id: item for item in catalog_items(make_item, 120, rng)}
+    store = CatalogStore(items.values(), compact=compact)
+    rows_now = HomeRows(store, CATEGORIES)
+    for step in range(40):
+        ids = sorted(items)
+        upserts = [
+            make_item(item_id, genres=[rng.choice(["Drama", "Comedy"])], rating=rng.choice([None, 6.0, 8.5, 9.5]))
+            for item_id in rng.sample(ids, 3)
+        ] + catalog_items(make_item, rng.randrange(3), rng, prefix=f"n{step}-")
+        removed = rng.sample(ids, rng.randrange(4))
+        for item in upserts:
+            items[item.id] = item
+        for item_id in removed:
+            items.pop(item_id, None)
+        removed = [item_id for item_id in removed if item_id not in {item.id for item in upserts}]
+        store, _ = store.apply_changes(upserts, removed, f"v{step}")
+        rows_now = HomeRows(store, CATEGORIES, previous=rows_now)
+        assert rows_now.encoded.body == HomeRows(store, CATEGORIES).encoded.body
+
+
+def test_reload_patches_only_affected_rows(make_item):
+    store = CatalogStore([make_item(f"d{i}", rating=6.0 + i / 10) for i in range(8)] + [
+        make_item("c1", genres=["Comedy"], rating=7.0),
+    ])
+    before = HomeRows(store, CATEGORIES)
+    assert before.reranked == 4
+    new_store, _ = store.apply_changes([make_item("c1", genres=["Comedy"], rating=9.0)], [], "v2")
+    after = HomeRows(new_store, CATEGORIES, previous=before)
+    assert after.reranked == 0
+    assert after._by_key[("By Genre", ("Drama", "genre", "Drama"))] is before._by_key[("By Genre", ("Drama", "genre", "Drama"))]
+    assert [item["id"] for item in rows(after)[0]["items"]] == ["c1"]
+
+    # Removing the shown top of a row that keeps more ranks re-ranks nothing either.
+    trimmed, _ = new_store.apply_changes([], ["d7", "d6"], "v3")
+    assert HomeRows(trimmed, CATEGORIES, previous=after).reranked == 0
+
+
+def test_unrelated_stores_and_new_categories_rank_again(make_item):
+    store = CatalogStore([make_item("a", rating=9.0)])
+    before = HomeRows(store, CATEGORIES)
+    assert HomeRows(CatalogStore([make_item("a", rating=9.0)]), CATEGORIES, previous=before).reranked == 4
+    extended = CategoryConfig(categories=CATEGORIES.categories + [
+        Category(name="Recent", filters=[Filter(name="2000s", type="year", value=2000)]),
+    ])
+    assert HomeRows(store, extended, previous=before).reranked == 1
+
+
+def test_changed_since(make_item):
+    store = CatalogStore([make_item(item_id) for item_id in "abcd"])
+    new, _ = store.apply_changes([make_item("b", rating=9.0), make_item("e")], ["a"], "v2")
+    assert new.changed_since(store) == {0, 1, 4}
+    assert new.changed_since(new) == frozenset()
+    assert store.changed_since(new) is None
+    rebuilt, _ = new.apply_changes([], ["b", "c"], "v3")  # past the tombstone threshold
+    assert rebuilt.changed_since(new) is None
+
+
+def test_home_endpoint(make_item, serve):
+    client = serve(CatalogStore([make_item("a", rating=9.0), make_item("b", genres=["Comedy"])]), CATEGORIES)
+    response = client.get("/home")
+    assert response.status_code == 200
+    assert [row["total"] for row in response.json()["rows"]] == [1, 1, 1, 2]
+    assert client.get("/home", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
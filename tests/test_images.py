@@ -0,0 +1,170 @@
+"""Pytest tests for the poster proxy cache and the /images endpoint."""
+
+import asyncio
+import hashlib
+import os
+import httpx
+import pytest
+from PIL import Image
+import app.images as images
+import app.main as main
+from app.catalog import CatalogStore
+from app.images import ImageCache, ImageUnavailable, image_version
+from benchmarks.stub_upstream import make_app
+
+POSTER = "http://origin.test/img/500x750.jpg"
+
+
+@pytest.fixture
+def origin():
+    return make_app(latency_ms=0)
+
+
+def open_cache(tmp_path, origin, **kwargs) -> ImageCache:
+    http = httpx.AsyncClient(transport=httpx.ASGITransport(app=origin))
+    return ImageCache(tmp_path / "images", http, **kwargs)
+
+
+def pointer(tmp_path, url):
+    return tmp_path / "images" / "urls" / hashlib.sha256(url.encode()).hexdigest()
+
+
+def test_fetches_once_and_resizes(tmp_path, origin):
+    cache = open_cache(tmp_path, origin)
+
+    async def scenario():
+        paths = await asyncio.gather(*(cache.get(POSTER, "w185") for _ in range(5)))
+        return paths, await cache.get(POSTER, "w185"), await cache.get(POSTER, "original")
+
+    paths, again, original = asyncio.run(scenario())
+    assert origin.state.hits == 1
+    assert len(set(paths)) == 1 and again == paths[0]
+    with Image.open(again) as image:
+        assert (image.format, image.size) == ("JPEG", (185, 278))
+    with Image.open(original) as image:
+        assert image.size == (500, 750)
+    cache.close()
+
+
+def test_identical_images_are_stored_once(tmp_path, origin):
+    cache = open_cache(tmp_path, origin)
+
+    async def scenario():
+        return await cache.get(POSTER, "original"), await cache.get(POSTER + "?copy=1", "original")
+
+    first, second = asyncio.run(scenario())
+    assert first == second
+    assert origin.state.hits == 2
+    assert len(list((tmp_path / "images" / "urls").iterdir())) == 2
+    cache.close()
+
+
+def test_origin_failure_raises(tmp_path, origin):
+    cache = open_cache(tmp_path, origin)
+    with pytest.raises(ImageUnavailable):
+        asyncio.run(cache.get("http://origin.test/missing.jpg", "w92"))
+    cache.close()
+
+
+def test_oversized_images_stop_downloading(tmp_path, monkeypatch):
+    monkeypatch.setattr(images, "MAX_IMAGE_BYTES", 1000)
+    sent = []
+
+    async def body():
+        for _ in range(100):
+            sent.append(1)
+            yield b"x" * 100
+
+    http = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body())))
+    cache = ImageCache(tmp_path / "images", http)
+    with pytest.raises(ImageUnavailable, match="larger than 1000 bytes"):
+        asyncio.run(cache.get(POSTER, "original"))
+    assert len(sent) <= 11
+    cache.close()
+
+
+def test_evicts_least_recently_used(tmp_path, origin):
+    cache = open_cache(tmp_path, origin)
+    old_url = "http://origin.test/img/400x600.jpg"
+    old = asyncio.run(cache.get(old_url, "original"))
+    new = asyncio.run(cache.get(POSTER, "original"))
+    cache._pool.shutdown(wait=True)  # let the background variants land
+    old_files = [*old.parent.glob(old.name + "*"), pointer(tmp_path, old_url)]
+    new_files = [*new.parent.glob(new.name + "*"), pointer(tmp_path, POSTER)]
+    for path in old_files:
+        os.utime(path, (1, 1))
+    kept = sum(path.stat().st_size for path in new_files)
+    total = kept + sum(path.stat().st_size for path in old_files)
+    assert (cache.stats().files, cache.stats().bytes) == (8, total)
+    cache.max_bytes = int(kept / 0.9) + 1
+    assert cache.evict() == 4
+    assert not any(path.exists() for path in old_files) and all(path.exists() for path in new_files)
+    assert (cache.stats().files, cache.stats().bytes) == (4, kept)
+
+
+def test_pointers_to_evicted_originals_are_replaced(tmp_path, origin):
+    first = open_cache(tmp_path, origin)
+    original = asyncio.run(first.get(POSTER, "original"))
+    first._pool.shutdown(wait=True)
+    for path in original.parent.glob(original.name + "*"):
+        path.unlink()  # evicted by another worker
+    cache = open_cache(tmp_path, origin, workers=1)
+    cache._pool.submit(lambda: None).result()  # after the scan the cache runs when it opens
+    assert cache.stats().files == 1
+    assert asyncio.run(cache.get(POSTER, "original")) == original
+    assert origin.state.hits == 2
+    cache._pool.shutdown(wait=True)
+    on_disk = [*original.parent.glob(original.name + "*"), *pointer(tmp_path, POSTER).parent.iterdir()]
+    assert cache.stats().files == len(on_disk) == 4
+
+
+def test_stats_keep_running_totals(tmp_path, origin, monkeypatch):
+    cache = open_cache(tmp_path, origin)
+    asyncio.run(cache.get(POSTER, "original"))
+    cache._pool.shutdown(wait=True)
+    monkeypatch.setattr(cache, "_files", lambda: pytest.fail("stats() scanned the cache"))
+    assert cache.stats().files == 4
+    reopened = open_cache(tmp_path, origin)
+    reopened._pool.shutdown(wait=True)  # counted once, in the background, on open
+    assert reopened.stats()[-2:] == cache.stats()[-2:]
+
+
+def test_images_endpoint(tmp_path, origin, make_item, serve, monkeypatch):
+    cache = open_cache(tmp_path, origin)
+    monkeypatch.setattr(main, "images", cache)
+    client = serve(CatalogStore([make_item("tt1", poster_url=POSTER)]))
+    versioned = client.get("/images/tt1/w342", params={"v": image_version(POSTER)})
+    assert versioned.status_code == 200
+    assert versioned.headers["content-type"] == "image/jpeg"
+    assert versioned.headers["cache-control"] == "public, max-age=31536000, immutable"
+    plain = client.get("/images/tt1/w342")
+    assert plain.headers["cache-control"] == "public, max-age=3600"
+    etag = plain.headers["etag"]
+    assert client.get("/images/tt1/w342", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/images/tt1/w999").status_code == 404
+    assert client.get("/images/nope/w342").status_code == 404
+    monkeypatch.setattr(main, "images", None)
+    redirect = client.get("/images/tt1/w342", follow_redirects=False)
+    assert redirect.status_code == 307 and redirect.headers["location"] == POSTER
+    cache.close()
+
+
+def test_file_work_stays_off_the_event_loop(tmp_path, origin, make_item, serve, monkeypatch):
+    def off_loop(function):
+        def wrapper(*args):
+            with pytest.raises(RuntimeError):
+                asyncio.get_running_loop()
+            calls.append(function.__name__)
+            return function(*args)
+        return wrapper
+
+    calls = []
+    cache = open_cache(tmp_path, origin)
+    monkeypatch.setattr(cache, "_touch", off_loop(cache._touch))
+    monkeypatch.setattr(main, "media_type", off_loop(images.media_type))
+    monkeypatch.setattr(main, "images", cache)
+    client = serve(CatalogStore([make_item("tt1", poster_url=POSTER)]))
+    assert client.get("/images/tt1/original").status_code == 200
+    assert client.get("/images/tt1/w92").status_code == 200
+    assert {"_touch", "media_type"} <= set(calls)
+    cache.close()
@@ -0,0 +1,83 @@
+"""Pytest tests for local media streaming with HTTP ranges."""
+
+import pytest
+import app.media as media
+from app.catalog import CatalogStore
+from app.media import RangeNotSatisfiable, parse_range
+
+BODY = bytes(range(256)) * 40  # 10240 bytes
+
+
+@pytest.fixture
+def client(tmp_path, make_item, serve, monkeypatch):
+    (tmp_path / "films").mkdir()
+    (tmp_path / "films" / "clip.mp4").write_bytes(BODY)
+    (tmp_path.parent / "secret.mp4").write_bytes(b"nope")
+    monkeypatch.setattr(media, "MEDIA_DIR", str(tmp_path))
+    monkeypatch.setattr(media, "CHUNK_SIZE", 4096)
+    return serve(CatalogStore([
+        make_item("local", video_file="films/clip.mp4"),
+        make_item("escape", video_file="../secret.mp4"),
+        make_item("gone", video_file="films/missing.mp4"),
+        make_item("remote"),
+    ]))
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=-500", 100) == (0, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("items=0-1", 100) is None
+    assert parse_range("bytes=9-2", 100) is None
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=100-", 100)
+
+
+def test_full_file_and_ranges(client):
+    full = client.get("/stream/local")
+    assert full.status_code == 200
+    assert full.content == BODY
+    assert full.headers["content-length"] == str(len(BODY))
+    assert full.headers["accept-ranges"] == "bytes"
+    assert full.headers["content-type"] == "video/mp4"
+
+    part = client.get("/stream/local", headers={"Range": "bytes=4000-9000"})
+    assert part.status_code == 206
+    assert part.content == BODY[4000:9001]
+    assert part.headers["content-range"] == f"bytes 4000-9000/{len(BODY)}"
+    assert part.headers["content-length"] == "5001"
+
+    tail = client.get("/stream/local", headers={"Range": "bytes=-100"})
+    assert tail.content == BODY[-100:]
+
+    bad = client.get("/stream/local", headers={"Range": f"bytes={len(BODY)}-"})
+    assert bad.status_code == 416
+    assert bad.headers["content-range"] == f"bytes */{len(BODY)}"
+
+
+def test_if_range_and_etag(client):
+    etag = client.head("/stream/local").headers["etag"]
+    resumed = client.get("/stream/local", headers={"Range": "bytes=10-19", "If-Range": etag})
+    assert resumed.status_code == 206
+    assert resumed.content == BODY[10:20]
+    changed = client.get("/stream/local", headers={"Range": "bytes=10-19", "If-Range": '"old"'})
+    assert changed.status_code == 200
+    assert changed.content == BODY
+    assert client.get("/stream/local", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_download_and_fallbacks(client):
+    download = client.get("/download/local", headers={"Range": "bytes=0-3"})
+    assert download.status_code == 206
+    assert download.headers["content-disposition"] == 'attachment; filename="clip.mp4"'
+    head = client.head("/stream/local")
+    assert head.headers["content-length"] == str(len(BODY))
+    assert head.content == b""
+    assert client.get("/stream/escape").status_code == 404
+    assert client.get("/stream/gone").status_code == 404
+    remote = client.get("/stream/remote", follow_redirects=False)
+    assert remote.status_code == 307
@@ -0,0 +1,123 @@
+"""Pytest tests for the Prometheus metrics and the per-request profiler."""
+
+import asyncio
+import time
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import app.main as main
+from app.catalog import CatalogStore
+from app.metrics import Counter, Histogram, UPSTREAM_DURATION, UPSTREAM_ERRORS, _registry, render
+from app.omdb_client import AsyncOMDBClient
+from app.profiler import ProfileMiddleware
+from app.resilience import RetryPolicy, Upstream
+
+
+async def no_sleep(seconds):
+    pass
+
+
+@pytest.fixture
+def scratch_metrics():
+    """Metrics registered by a test are dropped from the registry afterwards."""
+    before = list(_registry)
+    yield
+    _registry[:] = before
+
+
+def test_histogram_renders_cumulative_buckets(scratch_metrics):
+    histogram = Histogram("test_latency_seconds", "Test latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, "/a")
+    text = render()
+    assert "# TYPE test_latency_seconds histogram" in text
+    assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="1"} 3' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 4' in text
+    assert 'test_latency_seconds_sum{route="/a"} 6.05' in text
+    assert 'test_latency_seconds_count{route="/a"} 4' in text
+
+
+def test_label_values_are_escaped(scratch_metrics):
+    counter = Counter("test_total", "Test counter.", ("name",))
+    counter.inc('say "hi"\\')
+    assert 'test_total{name="say \\"hi\\"\\\\"} 1' in render()
+
+
+def test_metrics_endpoint_reports_routes_and_catalog(make_item, serve):
+    client = serve(CatalogStore([make_item("a"), make_item("b")]))
+    client.get("/content/a")
+    client.get("/content/a")
+    client.get("/no/such/path")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert 'macflix_http_requests_total{method="GET",route="/content/{item_id}",status="200"}' in text
+    assert 'macflix_http_request_duration_seconds_count{method="GET",route="/content/{item_id}"}' in text
+    assert 'macflix_http_requests_total{method="GET",route="unmatched",status="404"}' in text
+    assert "macflix_catalog_items 2" in text
+    assert 'macflix_http_requests_in_flight{method="GET"} 1' in text  # the scrape itself
+
+
+def test_upstream_calls_are_timed_and_errors_counted():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503 if len(calls) == 1 else 200, json={"Search": []})
+
+    upstream = Upstream("omdb", retry=RetryPolicy(attempts=3, base_delay=0), sleep=no_sleep)
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    omdb = AsyncOMDBClient(http, api_key="k", base_url="https://omdb.test/", upstream=upstream)
+    timed = UPSTREAM_DURATION.count("OMDBClient", "search")
+    failed = UPSTREAM_ERRORS.value("OMDBClient", "search", "503")
+    asyncio.run(omdb.search("metrics test"))
+    assert UPSTREAM_DURATION.count("OMDBClient", "search") == timed + 1
+    assert UPSTREAM_ERRORS.value("OMDBClient", "search", "503") == failed + 1
+
+
+def test_reload_records_duration_and_changes(monkeypatch):
+    monkeypatch.setattr(main, "catalog", main.catalog)
+    monkeypatch.setattr(main, "categories", main.categories)
+    monkeypatch.setattr(main, "categories_version", main.categories_version)
+    reloads = main.CATALOG_LOAD.count("reload")
+    main.reload_configs()
+    assert main.CATALOG_LOAD.count("reload") == reloads + 1
+    assert "macflix_catalog_reloads_total" in render()
+
+
+def make_profiled_app(tmp_path, token=""):
+    served = FastAPI()
+
+    @served.get("/slow")
+    def slow():
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            pass
+        return {"ok": True}
+
+    served.add_middleware(ProfileMiddleware, directory=str(tmp_path), token=token)
+    return TestClient(served)
+
+
+def test_profile_header_writes_collapsed_stacks(tmp_path):
+    client = make_profiled_app(tmp_path, token="secret")
+    assert "x-profile" not in client.get("/slow").headers
+    response = client.get("/slow", headers={"X-Profile": "1", "X-Admin-Token": "secret"})
+    name = response.headers["x-profile"]
+    lines = (tmp_path / name).read_text().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any("slow (test_metrics.py" in line for line in lines)
+
+
+def test_profile_requires_admin_token(tmp_path):
+    unguarded = make_profiled_app(tmp_path)
+    assert "x-profile" not in unguarded.get("/slow", headers={"X-Profile": "1"}).headers
+    client = make_profiled_app(tmp_path, token="secret")
+    assert "x-profile" not in client.get("/slow", headers={"X-Profile": "1"}).headers
+    response = client.get("/slow", headers={"X-Profile": "1", "X-Admin-Token": "secret"})
+    assert (tmp_path / response.headers["x-profile"]).exists()
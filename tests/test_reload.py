@@ -0,0 +1,145 @@
+"""Pytest tests for incremental catalog reloads and the config watcher."""
+
+import pytest
+import yaml
+from fastapi.testclient import TestClient
+import app.main as main
+from app.catalog import CatalogDiff, CatalogStore
+from app.config_loader import load_catalog, reload_catalog
+from app.filters import query_bits
+from app.reloader import ConfigWatcher
+
+
+def record(item_id, **overrides):
+    data = {
+        "id": item_id,
+        "title": f"Title {item_id}",
+        "type": "movie",
+        "year": 2001,
+        "genres": ["Drama"],
+        "description": "A test item.",
+        "rating": 7.0,
+        "poster_url": f"https://example.com/{item_id}.jpg",
+        "video_url": f"https://example.com/{item_id}.mp4",
+    }
+    data.update(overrides)
+    return data
+
+
+@pytest.fixture
+def config_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.config_loader.CONFIG_DIR", tmp_path)
+    monkeypatch.setattr("app.main.CONFIG_DIR", tmp_path)
+    (tmp_path / "categories.yaml").write_text(yaml.safe_dump({"categories": [{"name": "All"}]}))
+    return tmp_path
+
+
+def write_catalog(config_dir, records):
+    (config_dir / "content.yaml").write_text(yaml.safe_dump({"movies": records}))
+
+
+def ids(items):
+    return [item.id for item in items]
+
+
+def test_apply_changes_patches_indexes(make_item):
+    old = CatalogStore([make_item("a"), make_item("b", genres=["Action"]), make_item("c")], version="v1")
+    old.sorted_ids  # computed lists are carried over incrementally
+    new, diff = old.apply_changes(
+        [make_item("b", genres=["Drama"], year=1990), make_item("d", genres=["Action"])], ["c"], "v2"
+    )
+    assert diff == CatalogDiff(added=1, updated=1, removed=1)
+    assert new.version == "v2" and len(new) == 3
+    assert ids(new.lookup("genre", "Drama")) == ["a", "b"]
+    assert ids(new.lookup("genre", "Action")) == ["d"]
+    assert ids(new.select(new.ranges["year"].between(1990, 1999))) == ["b"]
+    assert ids(new.select(query_bits(new))) == ["a", "b", "d"]
+    assert new.sorted_ids == ["a", "b", "d"]
+    assert new.get("c") is None and new.get("a") is old.get("a")
+    # The old snapshot is untouched.
+    assert ids(old.lookup("genre", "Action")) == ["b"] and old.get("c") is not None
+
+
+def test_apply_changes_compacts_tombstones(make_item):
+    old = CatalogStore([make_item(i) for i in "abcd"])
+    new, diff = old.apply_changes([], ["a", "b"], "v2")
+    assert diff.removed == 2
+    assert ids(new) == ["c", "d"]
+    assert ids(new.select(new.all_bits)) == ["c", "d"]
+
+
+def test_reload_catalog_only_revalidates_changes(config_dir):
+    write_catalog(config_dir, [record("a"), record("b"), record("c")])
+    store = load_catalog()
+    same, diff = reload_catalog(store)
+    assert same is store and diff == CatalogDiff(0, 0, 0)
+
+    write_catalog(config_dir, [record("a"), record("b", title="New"), record("d")])
+    new, diff = reload_catalog(store)
+    assert diff == CatalogDiff(added=1, updated=1, removed=1)
+    assert new.get("a") is store.get("a")
+    assert new.get("b").title == "New"
+    assert "c" not in new and "d" in new
+
+
+def test_reload_catalog_rejects_duplicates(config_dir):
+    write_catalog(config_dir, [record("a")])
+    store = load_catalog()
+    write_catalog(config_dir, [record("a"), record("a")])
+    with pytest.raises(ValueError):
+        reload_catalog(store)
+
+
+def test_config_watcher_detects_changes(tmp_path):
+    path = tmp_path / "content.yaml"
+    path.write_text("movies: []")
+    calls = []
+    watcher = ConfigWatcher([path], lambda: calls.append(1), interval=60)
+    assert not watcher.check()
+    path.write_text("movies: [] # edited")
+    assert watcher.check()
+    assert calls == [1]
+
+
+def test_admin_reload_endpoint(config_dir, monkeypatch):
+    write_catalog(config_dir, [record("a")])
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    with TestClient(main.app, headers={"X-Admin-Token": "secret"}) as client:
+        etag = client.get("/content").headers["ETag"]
+        write_catalog(config_dir, [record("a", title="Edited"), record("b")])
+        result = client.post("/admin/reload").json()
+        assert (result["added"], result["updated"], result["removed"]) == (1, 1, 0)
+        assert client.get("/content/a").json()["title"] == "Edited"
+        assert client.get("/content", headers={"If-None-Match": etag}).status_code == 200
+
+        write_catalog(config_dir, [{"id": "broken"}])
+        assert client.post("/admin/reload").status_code == 422
+        assert client.get("/content/b").status_code == 200
+
+
+def test_admin_reload_requires_token(monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    client = TestClient(main.app)
+    assert client.post("/admin/reload").status_code == 403
+    assert client.get("/admin/cache", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+
+def test_admin_endpoints_are_closed_without_a_token(monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "")
+    client = TestClient(main.app)
+    assert client.post("/admin/reload").status_code == 403
+    assert client.get("/admin/cache", headers={"X-Admin-Token": ""}).status_code == 403
+
+
+def test_indexes_are_built_off_the_reload_path(make_item, monkeypatch):
+    store = CatalogStore([make_item("a"), make_item("b")])
+    store.search_index
+    new, _ = store.apply_changes([make_item("c")], [], "v2")
+    assert "search_index" in new.__dict__ and "similar_index" not in new.__dict__
+    patched = new.search_index
+    main.warm_indexes(new).join()
+    assert new.search_index is patched  # patched indexes are kept, the rest built
+    assert {"suggest_index", "similar_index"} <= set(new.__dict__)
+
+    monkeypatch.setattr(main, "WARM_INDEXES", False)
+    assert main.warm_indexes(CatalogStore([make_item("a")])) is None
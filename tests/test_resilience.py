@@ -0,0 +1,210 @@
+"""Pytest tests for the upstream resilience layer (retries, circuit breaker, bulkhead)."""
+
+import asyncio
+import httpx
+import pytest
+import requests
+from fastapi.testclient import TestClient
+import app.main as main
+from app.cache import TTLCache
+from app.omdb_client import AsyncOMDBClient, OMDBClient
+from app.resilience import (
+    BulkheadFullError, CircuitBreaker, CircuitOpenError, RetryPolicy, Upstream, UpstreamUnavailable,
+)
+from app.tmdb_client import AsyncTMDBClient
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+async def no_sleep(seconds):
+    pass
+
+
+def flaky(statuses):
+    """A transport answering with the given statuses in turn, then 200."""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        status = statuses[len(calls) - 1] if len(calls) <= len(statuses) else 200
+        return httpx.Response(status, json={"Search": [{"Title": "Heat"}]})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler)), calls
+
+
+def make_upstream(**kwargs):
+    settings = {"retry": RetryPolicy(attempts=3, base_delay=0), "sleep": no_sleep}
+    settings.update(kwargs)
+    return Upstream("omdb", **settings)
+
+
+def test_retry_delay_is_jittered_and_honours_retry_after():
+    policy = RetryPolicy(attempts=5, base_delay=1.0, max_delay=4.0)
+    assert all(0 <= policy.delay(3) <= 4.0 for _ in range(100))
+    assert policy.delay(1, retry_after="2") == 2.0
+    assert policy.delay(1, retry_after="60") == 4.0
+
+
+def test_retries_transient_errors():
+    http, calls = flaky([503, 429])
+    omdb = AsyncOMDBClient(http, api_key="k", base_url="https://omdb.test/", upstream=make_upstream())
+    assert asyncio.run(omdb.search("Heat")) == [{"Title": "Heat"}]
+    assert len(calls) == 3
+
+
+def test_client_errors_are_not_retried():
+    http, calls = flaky([404])
+    omdb = AsyncOMDBClient(http, api_key="k", base_url="https://omdb.test/", upstream=make_upstream())
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(omdb.search("Heat"))
+    assert len(calls) == 1
+
+
+def test_breaker_opens_then_half_opens():
+    clock = Clock()
+    breaker = CircuitBreaker(threshold=2, reset_timeout=30, clock=clock)
+    http, calls = flaky([500] * 6)
+    upstream = make_upstream(retry=RetryPolicy(attempts=1), breaker=breaker)
+    omdb = AsyncOMDBClient(http, api_key="k", base_url="https://omdb.test/", cache=TTLCache(), upstream=upstream)
+    for _ in range(2):
+        with pytest.raises(UpstreamUnavailable):
+            asyncio.run(omdb.search("Heat"))
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(omdb.search("Heat"))
+    assert len(calls) == 2  # failed fast without calling upstream
+
+    clock.now = 30
+    assert breaker.state == "half-open"
+    with pytest.raises(UpstreamUnavailable):
+        asyncio.run(omdb.search("Heat"))  # the trial call fails and re-opens the breaker
+    assert breaker.state == "open" and len(calls) == 3
+
+    clock.now = 60
+    del calls[:]
+    http.__init__(transport=httpx.MockTransport(lambda r: calls.append(r) or httpx.Response(200, json={})))
+    assert asyncio.run(omdb.get_details("tt0113277")) == {}
+    assert breaker.state == "closed"
+
+
+def test_bulkhead_limits_concurrent_calls():
+    upstream = make_upstream(max_concurrency=1, queue_timeout=0.01)
+
+    async def slow():
+        await asyncio.sleep(0.1)
+        return httpx.Response(200)
+
+    async def run():
+        return await asyncio.gather(upstream.call(slow), upstream.call(slow), return_exceptions=True)
+
+    first, second = asyncio.run(run())
+    assert first.status_code == 200
+    assert isinstance(second, BulkheadFullError)
+
+
+def test_only_the_trial_call_frees_the_trial_slot():
+    clock = Clock()
+    breaker = CircuitBreaker(threshold=1, reset_timeout=30, clock=clock)
+    upstream = make_upstream(breaker=breaker)
+
+    async def run():
+        gate = asyncio.Event()
+
+        async def slow():
+            await gate.wait()
+            return httpx.Response(200)
+
+        started_closed = asyncio.create_task(upstream.call(slow))
+        await asyncio.sleep(0.01)
+        breaker.record_failure()
+        clock.now = 30
+        trial = asyncio.create_task(upstream.call(slow))
+        await asyncio.sleep(0.01)
+        started_closed.cancel()  # ends without an outcome, but never held the trial slot
+        await asyncio.gather(started_closed, return_exceptions=True)
+        with pytest.raises(CircuitOpenError):
+            await upstream.call(lambda: asyncio.sleep(0, httpx.Response(200)))
+        gate.set()
+        return await trial
+
+    assert asyncio.run(run()).status_code == 200
+    assert breaker.state == "closed"
+
+
+def test_cancelled_calls_do_not_leak_bulkhead_slots():
+    upstream = make_upstream(max_concurrency=1, queue_timeout=1.0)
+
+    async def quick():
+        return httpx.Response(200)
+
+    async def run():
+        gate = asyncio.Event()
+
+        async def held():
+            await gate.wait()
+            return httpx.Response(200)
+
+        holder = asyncio.create_task(upstream.call(held))
+        await asyncio.sleep(0.01)
+        waiting = [asyncio.create_task(upstream.call(quick)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        gate.set()
+        await holder  # hands the slot to the first waiter...
+        for task in waiting:
+            task.cancel()  # ...which is cancelled before it runs
+        await asyncio.gather(*waiting, return_exceptions=True)
+        return await upstream.call(quick)
+
+    assert asyncio.run(run()).status_code == 200
+    assert upstream._slots._value == 1
+
+
+def test_sync_client_retries_connection_errors(monkeypatch):
+    monkeypatch.setattr("app.resilience.time.sleep", lambda seconds: None)
+    responses = [requests.ConnectionError("reset")]
+    ok = requests.Response()
+    ok.status_code, ok._content = 200, b'{"Title": "Heat"}'
+
+    class Session:
+        def get(self, url, params=None, timeout=None):
+            if responses:
+                raise responses.pop()
+            return ok
+
+    omdb = OMDBClient(api_key="k", session=Session(), upstream=make_upstream())
+    assert omdb.get_details("tt0113277") == {"Title": "Heat"}
+
+
+def test_expired_results_are_served_while_upstream_is_down():
+    clock = Clock()
+    http, calls = flaky([])
+    upstream = make_upstream(retry=RetryPolicy(attempts=1))
+    cache = TTLCache(ttl=10, stale_ttl=100, clock=clock)
+    omdb = AsyncOMDBClient(http, api_key="k", base_url="https://omdb.test/", cache=cache, upstream=upstream)
+    assert asyncio.run(omdb.search("Heat")) == [{"Title": "Heat"}]
+
+    clock.now = 50
+    http.__init__(transport=httpx.MockTransport(lambda r: httpx.Response(503)))
+    assert asyncio.run(omdb.search("Heat")) == [{"Title": "Heat"}]
+    assert cache.stats().stale_hits == 1
+
+    clock.now = 200  # past the stale window
+    with pytest.raises(UpstreamUnavailable):
+        asyncio.run(omdb.search("Heat"))
+
+
+def test_search_endpoint_returns_503_when_upstream_unavailable(monkeypatch):
+    http = httpx.AsyncClient(transport=httpx.MockTransport(lambda r: httpx.Response(502)))
+    upstream = Upstream("tmdb", retry=RetryPolicy(attempts=1), breaker=CircuitBreaker(reset_timeout=30))
+    monkeypatch.setattr(main, "tmdb", AsyncTMDBClient(http, api_key="k", base_url="https://tmdb.test/3",
+                                                      upstream=upstream))
+    monkeypatch.setattr(main, "omdb", AsyncOMDBClient(http, api_key="k"))
+    response = TestClient(main.app).get("/tmdb/search", params={"query": "Alien"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "30"
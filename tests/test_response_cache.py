@@ -0,0 +1,86 @@
+"""Pytest tests for pre-encoded catalog responses and ETag revalidation."""
+
+import json
+import pytest
+import app.main as main
+from app.catalog import CatalogStore
+from app.models import Category, CategoryConfig
+from app.response_cache import ResponseCache, etag_matches
+
+
+@pytest.fixture
+def store(make_item):
+    return CatalogStore([make_item("a"), make_item("b", title="Amélie")])
+
+
+@pytest.fixture
+def categories():
+    return CategoryConfig(categories=[Category(name="Top Rated")])
+
+
+def test_etag_matches():
+    assert etag_matches('"x"', '"x"')
+    assert etag_matches('"y", W/"x"', '"x"')
+    assert etag_matches("*", '"x"')
+    assert not etag_matches('"y"', '"x"')
+    assert not etag_matches(None, '"x"')
+
+
+def test_encoded_bodies_match_models(store):
+    cache = ResponseCache(store, None)
+    assert json.loads(cache.all_items().body) == [item.model_dump(mode="json") for item in store]
+    assert json.loads(cache.item("b").body)["title"] == "Amélie"
+    assert cache.item("b") is cache.item("b")
+    assert cache.item("missing") is None
+
+
+def test_version_changes_with_content(make_item):
+    assert CatalogStore([make_item("a")]).version == CatalogStore([make_item("a")]).version
+    assert CatalogStore([make_item("a")]).version != CatalogStore([make_item("a", year=1999)]).version
+
+
+@pytest.mark.parametrize("path", ["/content", "/content/a", "/categories"])
+def test_etag_revalidation(client, path):
+    resp = client.get(path)
+    assert resp.status_code == 200
+    etag = resp.headers["ETag"]
+    revalidated = client.get(path, headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert client.get(path, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_etag_changes_on_catalog_swap(client, make_item, monkeypatch):
+    etag = client.get("/content").headers["ETag"]
+    monkeypatch.setattr(main, "catalog", CatalogStore([make_item("a", year=1990)]))
+    resp = client.get("/content", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.json()[0]["year"] == 1990
+
+
+def test_item_cache_is_bounded(store, monkeypatch):
+    monkeypatch.setattr("app.response_cache.ITEM_CACHE_LIMIT", 1)
+    cache = ResponseCache(store, None)
+    cache.item("a")
+    cache.item("b")
+    assert list(cache._items) == ["b"]
+
+
+def test_reload_carries_untouched_item_encodings(make_item):
+    store = CatalogStore([make_item(item_id) for item_id in "abcd"], compact=True)
+    cache = ResponseCache(store, None)
+    for item_id in "abcd":
+        cache.item(item_id)
+    new, _ = store.apply_changes([make_item("b", year=1990), make_item("e")], ["c"], "v2")
+    carried = ResponseCache(new, None, previous=cache)
+    assert sorted(carried._items) == ["a", "d"]
+    assert carried._items["a"] is cache._items["a"]
+    assert json.loads(carried.item("b").body)["year"] == 1990
+    assert ResponseCache(CatalogStore([make_item("a")]), None, previous=cache)._items == {}  # unrelated store
+
+
+def test_shared_catalog_streams_full_list(client, monkeypatch):
+    monkeypatch.setattr(main, "SHARED_CATALOG", True)
+    resp = client.get("/content")
+    assert [item["id"] for item in resp.json()] == ["a", "b"]
+    assert client.get("/content", headers={"If-None-Match": resp.headers["ETag"]}).status_code == 304
@@ -0,0 +1,90 @@
+"""Pytest tests for the full-text search index and the /search endpoint."""
+
+import pytest
+from app.catalog import CatalogStore
+from app.search import SearchIndex, edit_distance, tokenize
+
+
+@pytest.fixture
+def store(make_item):
+    return CatalogStore([
+        make_item("tt1", title="Inception", description="A thief steals secrets through dreams.",
+                  cast=["Leonardo DiCaprio"], director="Christopher Nolan", genres=["Sci-Fi"]),
+        make_item("tt2", title="The Dark Knight", description="Batman faces the Joker in Gotham.",
+                  director="Christopher Nolan", genres=["Action"]),
+        make_item("tt3", title="Amélie", description="A shy waitress changes lives in Paris.", genres=["Romance"]),
+        make_item("tt4", title="Dreamgirls", description="A Motown girl group rises.", genres=["Music"]),
+        make_item("tt5", title="Paris, Texas", description="A drifter walks out of the desert.", genres=["Drama"]),
+    ])
+
+
+def titles(store, hits):
+    return [store.materialize([ordinal])[0].title for ordinal, _ in hits.ranked]
+
+
+def test_tokenize_folds_case_and_accents():
+    assert tokenize("Amélie, THE Dark-Knight") == ["amelie", "the", "dark", "knight"]
+
+
+def test_edit_distance_is_bounded():
+    assert edit_distance("nolan", "nolan", 1) == 0
+    assert edit_distance("nolna", "nolan", 1) == 1  # transposition
+    assert edit_distance("knight", "night", 1) == 1
+    assert edit_distance("batman", "superman", 2) == 3
+
+
+def test_ranks_title_matches_above_description_matches(store):
+    assert titles(store, store.search_index.search("paris ")) == ["Paris, Texas", "Amélie"]
+
+
+def test_multi_word_queries_favour_items_matching_more_words(store):
+    hits = store.search_index.search("nolan dark ")
+    assert titles(store, hits)[0] == "The Dark Knight"
+    assert hits.total == 2
+
+
+def test_last_word_matches_as_prefix(store):
+    assert titles(store, store.search_index.search("incep")) == ["Inception"]
+    assert titles(store, store.search_index.search("dream")) == ["Dreamgirls", "Inception"]
+    assert store.search_index.search("incep ").total == 0
+
+
+def test_typos_match_close_terms(store):
+    assert titles(store, store.search_index.search("incpetion ")) == ["Inception"]
+    assert set(titles(store, store.search_index.search("christpher nolan"))) == {"The Dark Knight", "Inception"}
+    assert store.search_index.search("amel ").total == 0  # too far from "amelie"
+
+
+def test_index_is_patched_on_apply_changes(store, make_item):
+    store.search_index
+    new, _ = store.apply_changes(
+        [make_item("tt2", title="The Dark Knight Rises", director="Christopher Nolan"),
+         make_item("tt6", title="Interstellar", description="Explorers travel through a wormhole.")],
+        ["tt1"],
+        "v2",
+    )
+    assert "search_index" in new.__dict__
+    assert titles(new, new.search_index.search("interstellar")) == ["Interstellar"]
+    assert titles(new, new.search_index.search("rises")) == ["The Dark Knight Rises", "Dreamgirls"]
+    assert new.search_index.search("inception ").total == 0
+    assert new.search_index.search("batman ").total == 0  # the replaced description is gone
+    rebuilt = SearchIndex.build((ordinal, new._fields(ordinal)) for ordinal in range(len(new._items))
+                                if new._items[ordinal] is not None)
+    for query in ("nolan", "dark knight", "paris", "wormhole"):  # scores differ only by the frozen average length
+        assert titles(new, new.search_index.search(query)) == titles(new, rebuilt.search(query))
+    assert titles(store, store.search_index.search("inception")) == ["Inception"]  # old index untouched
+
+
+def test_compact_store_indexes_from_columns(make_item):
+    items = [make_item(f"id{i}", title=f"Film {i}") for i in range(3)]
+    compact = CatalogStore(items, compact=True)
+    assert compact.search_index.search("film").total == 3
+    assert compact._items._memo.get(0) is None  # no ContentItem was materialized to index it
+
+
+def test_search_endpoint(client):
+    body = client.get("/search", params={"q": "nolan", "limit": 1}).json()
+    assert body["total"] == 2 and len(body["items"]) == 1
+    second = client.get("/search", params={"q": "nolan", "limit": 1, "offset": 1}).json()
+    assert {body["items"][0]["id"], second["items"][0]["id"]} == {"tt1", "tt2"}
+    assert client.get("/search", params={"q": ""}).status_code == 422
@@ -0,0 +1,76 @@
+"""Pytest tests for "More Like This" similarity and the /content/{id}/similar endpoint."""
+
+import pytest
+import app.main as main
+from app.catalog import CatalogStore
+from app.similar import SimilarIndex
+from benchmarks.synthetic import synthetic_records
+
+
+@pytest.fixture
+def store(make_item):
+    return CatalogStore([
+        make_item("tt1", title="Batman Begins", year=2005, genres=["Action", "Crime"],
+                  cast=["Christian Bale", "Michael Caine"], director="Christopher Nolan"),
+        make_item("tt2", title="The Dark Knight", year=2008, genres=["Action", "Crime"],
+                  cast=["Christian Bale", "Heath Ledger"], director="Christopher Nolan"),
+        make_item("tt3", title="The Prestige", year=2006, genres=["Drama", "Mystery"],
+                  cast=["Christian Bale", "Hugh Jackman"], director="Christopher Nolan"),
+        make_item("tt4", title="Amelie", year=2001, genres=["Comedy", "Romance"], language="French",
+                  cast=["Audrey Tautou"], director="Jean-Pierre Jeunet"),
+        make_item("tt5", title="Heat", year=1995, genres=["Action", "Crime"], cast=["Al Pacino"], director="Michael Mann"),
+    ])
+
+
+def ids(items):
+    return [item.id for item in items]
+
+
+def test_shared_director_and_cast_rank_first(store):
+    similar = ids(store.similar("tt2", 3))
+    assert similar[:2] == ["tt1", "tt3"]
+    assert "tt2" not in ids(store.similar("tt2", 10))
+    assert store.similar("missing", 3) is None
+
+
+def test_changed_and_new_items_are_scored_on_demand(store, make_item):
+    store.similar_index
+    knight = make_item("tt2", title="The Dark Knight", year=1996, genres=["Action", "Crime"],
+                       cast=["Al Pacino"], director="Michael Mann")
+    new = make_item("tt6", title="Insomnia", year=2002, genres=["Drama", "Mystery"],
+                    cast=["Al Pacino", "Hugh Jackman"], director="Christopher Nolan")
+    edited, _ = store.apply_changes([knight], [], version="v2")
+    assert edited.similar_index.neighbors(1) is None
+    updated, _ = edited.apply_changes([new], ["tt1"], version="v3")
+    assert "similar_index" not in updated.__dict__  # served patched until the rebuild
+    assert ids(updated.similar("tt2", 1)) == ["tt5"]
+    assert ids(updated.similar("tt6", 1)) == ["tt3"]
+    assert "tt1" not in ids(updated.similar("tt3", 10))
+
+
+def test_added_items_become_neighbours_once_rebuilt(store, make_item, monkeypatch):
+    store.similar_index
+    twin = make_item("tt6", title="Batman Begins Again", year=2005, genres=["Action", "Crime"],
+                     cast=["Christian Bale", "Michael Caine"], director="Christopher Nolan")
+    updated, _ = store.apply_changes([twin], [], version="v2")
+    assert "tt6" not in ids(updated.similar("tt1", 10))
+    monkeypatch.setattr(main, "WARM_INDEXES", False)  # still rebuilt when warm-up is off
+    main.warm_indexes(updated).join()
+    assert ids(updated.similar("tt1", 1)) == ["tt6"]
+    assert updated._similar_interim is None
+
+
+def test_query_matches_precomputed_neighbors():
+    records = list(synthetic_records(2000))
+    index = SimilarIndex.build(enumerate(records), k=10, batch_size=300)
+    for ordinal in range(0, 2000, 97):
+        queried, precomputed = index.query(records[ordinal], exclude=ordinal, k=10), index.neighbors(ordinal)
+        assert [o for o, _ in queried] == [o for o, _ in precomputed]
+        assert [s for _, s in queried] == pytest.approx([s for _, s in precomputed], rel=1e-5)
+
+
+def test_similar_endpoint(client):
+    body = client.get("/content/tt1/similar", params={"limit": 2}).json()
+    assert [item["id"] for item in body] == ["tt2", "tt3"]
+    assert client.get("/content/nope/similar").status_code == 404
+    assert client.get("/content/tt1/similar", params={"limit": 500}).status_code == 422
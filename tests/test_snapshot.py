@@ -0,0 +1,125 @@
+"""Pytest tests for compiled catalog snapshots."""
+
+import json
+import pytest
+import yaml
+from app.catalog import CatalogStore
+from app.config_loader import load_catalog, reload_catalog
+from app.models import ContentItem
+from app.snapshot import (
+    SharedIdMap, SnapshotError, SnapshotItems, SortedIdView, load_snapshot, read_snapshot_version, write_snapshot,
+)
+
+
+@pytest.fixture
+def store(make_item):
+    return CatalogStore(
+        [make_item("a", genres=["Drama", "Crime"]), make_item("b", type="tv", year=2011), make_item("c", rating=9.0)],
+        version="v1",
+    )
+
+
+def test_snapshot_roundtrip_is_lazy(store, tmp_path, monkeypatch):
+    path = tmp_path / "content.snapshot"
+    write_snapshot(store, path)
+    assert read_snapshot_version(path) == "v1"
+    loaded = load_snapshot(path)
+    assert isinstance(loaded._items, SnapshotItems)
+    assert len(loaded._items._memo) == 0
+    assert loaded.version == "v1" and len(loaded) == 3
+    assert loaded.item_json("b") == store.item_json("b")
+    assert len(loaded._items._memo) == 0
+    assert [i.id for i in loaded.lookup("genre", "Drama")] == ["a", "b", "c"]
+    monkeypatch.setattr(ContentItem, "model_validate_json", lambda *a: pytest.fail("item validated again"))
+    assert loaded.get("b") == store.get("b")
+    assert loaded.get("b") is loaded.get("b")
+
+
+def test_snapshot_of_store_with_tombstones(store, tmp_path, make_item):
+    reloaded, _ = store.apply_changes([make_item("d")], ["a"], "v2")
+    path = tmp_path / "content.snapshot"
+    write_snapshot(reloaded, path)
+    loaded = load_snapshot(path)
+    assert [i.id for i in loaded] == ["b", "c", "d"]
+    assert [i.id for i in loaded.lookup("genre", "Drama")] == ["b", "c", "d"]
+
+
+def test_snapshot_backed_store_applies_changes(store, tmp_path, make_item):
+    path = tmp_path / "content.snapshot"
+    write_snapshot(store, path)
+    loaded = load_snapshot(path)
+    new, _ = loaded.apply_changes([make_item("b", title="Edited"), make_item("d")], ["c"], "v2")
+    assert new.get("b").title == "Edited"
+    assert json.loads(new.item_json("b"))["title"] == "Edited"
+    assert [i.id for i in new] == ["a", "b", "d"]
+    assert loaded.get("b").title == "Title b"
+
+
+def test_bad_snapshot_rejected(tmp_path):
+    path = tmp_path / "content.snapshot"
+    path.write_bytes(b"not a snapshot" * 10)
+    with pytest.raises(SnapshotError):
+        load_snapshot(path)
+    path.write_bytes(b"short")
+    with pytest.raises(SnapshotError):
+        read_snapshot_version(path)
+
+
+def test_load_catalog_prefers_fresh_snapshot(tmp_path, monkeypatch, make_item):
+    monkeypatch.setattr("app.config_loader.CONFIG_DIR", tmp_path)
+    record = make_item("a").model_dump(mode="json")
+    (tmp_path / "content.yaml").write_text(yaml.safe_dump({"movies": [record]}))
+    write_snapshot(load_catalog(use_snapshot=False), tmp_path / "content.snapshot")
+    assert isinstance(load_catalog()._items, SnapshotItems)
+
+    record["title"] = "Edited"
+    (tmp_path / "content.yaml").write_text(yaml.safe_dump({"movies": [record]}))
+    stale = load_catalog()
+    assert not isinstance(stale._items, SnapshotItems)
+    assert stale.get("a").title == "Edited"
+
+
+def test_reload_after_snapshot_start(tmp_path, monkeypatch, make_item):
+    monkeypatch.setattr("app.config_loader.CONFIG_DIR", tmp_path)
+    records = [make_item(i).model_dump(mode="json") for i in "abc"]
+    (tmp_path / "content.yaml").write_text(yaml.safe_dump({"movies": records}))
+    write_snapshot(load_catalog(use_snapshot=False), tmp_path / "content.snapshot")
+    store = load_catalog()
+    records[1]["year"] = 1980
+    (tmp_path / "content.yaml").write_text(yaml.safe_dump({"movies": records}))
+    new, diff = reload_catalog(store)
+    assert (diff.added, diff.updated, diff.removed) == (0, 1, 0)
+    assert [i.id for i in new.lookup("year", 1980)] == ["b"]
+
+
+def test_shared_id_map_overlay(store, tmp_path, make_item):
+    path = tmp_path / "content.snapshot"
+    write_snapshot(store, path)
+    loaded = load_snapshot(path)
+    assert isinstance(loaded._by_id, SharedIdMap)
+    assert isinstance(loaded.sorted_ids, SortedIdView)
+    assert list(loaded.sorted_ids) == ["a", "b", "c"] and loaded.sorted_ids[1:] == ["b", "c"]
+    assert loaded.page_after("a", 1)[0][0].id == "b"
+    new, _ = loaded.apply_changes([make_item("0")], ["b"], "v2")
+    assert sorted(new._by_id) == ["0", "a", "c"] and "b" not in new._by_id
+    assert new.sorted_ids == ["0", "a", "c"]
+    assert "b" in loaded._by_id and "b" in loaded.fingerprints and "b" not in new.fingerprints
+
+
+def test_shared_catalog_builds_snapshot_once(tmp_path, monkeypatch, make_item):
+    monkeypatch.setattr("app.config_loader.CONFIG_DIR", tmp_path)
+    records = [make_item(i).model_dump(mode="json") for i in "ab"]
+    (tmp_path / "content.yaml").write_text(yaml.safe_dump({"movies": records}))
+    first = load_catalog(shared=True)
+    mtime = (tmp_path / "content.snapshot").stat().st_mtime_ns
+    second = load_catalog(shared=True)
+    assert isinstance(second._items, SnapshotItems)
+    assert (tmp_path / "content.snapshot").stat().st_mtime_ns == mtime
+    assert second.version == first.version
+
+    records[0]["title"] = "Edited"
+    (tmp_path / "content.yaml").write_text(yaml.safe_dump({"movies": records}))
+    new, diff = reload_catalog(second, shared=True)
+    assert diff.swapped and isinstance(new._items, SnapshotItems)
+    assert new.get("a").title == "Edited"
+    assert reload_catalog(new, shared=True) == (new, (0, 0, 0, False))
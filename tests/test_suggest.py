@@ -0,0 +1,62 @@
+"""Pytest tests for the autocomplete index and the /suggest endpoint."""
+
+import pytest
+from app.catalog import CatalogStore
+from app.suggest import SuggestIndex
+
+
+@pytest.fixture
+def store(make_item):
+    return CatalogStore([
+        make_item("tt1", title="The Dark Knight", rating=9.0, cast=["Christian Bale"], director="Christopher Nolan"),
+        make_item("tt2", title="Star Wars", rating=8.6, cast=["Mark Hamill", "Harrison Ford"]),
+        make_item("tt3", title="Stardust", rating=7.6, cast=["Claire Danes"]),
+        make_item("tt4", title="Knight and Day", rating=None, cast=["Tom Cruise"]),
+        make_item("tt5", title="Dark City", rating=7.6, director="Alex Proyas"),
+    ])
+
+
+def texts(suggestions):
+    return [s.text for s in suggestions]
+
+
+def test_completes_any_word_start_best_rated_first(store):
+    index = store.suggest_index
+    assert texts(index.complete("knig")) == ["The Dark Knight", "Knight and Day"]
+    assert texts(index.complete("dark")) == ["The Dark Knight", "Dark City"]
+    assert texts(index.complete("STAR")) == ["Star Wars", "Stardust"]
+
+
+def test_trailing_space_completes_whole_words(store):
+    assert texts(store.suggest_index.complete("star ")) == ["Star Wars"]
+    assert texts(store.suggest_index.complete("the dark k")) == ["The Dark Knight"]
+    assert store.suggest_index.complete("   ") == []
+
+
+def test_people_rank_by_their_best_title(store):
+    suggestions = store.suggest_index.complete("chris")
+    assert [(s.text, s.kind, s.id) for s in suggestions] == [
+        ("Christian Bale", "person", None), ("Christopher Nolan", "person", None),
+    ]
+    assert store.suggest_index.complete("dark")[0].id == "tt1"
+
+
+def test_precomputed_buckets_match_range_queries(store):
+    index = store.suggest_index
+    for prefix, entries in index._buckets.items():
+        assert list(entries) == index._top(*index._range(prefix), 20), prefix
+
+
+def test_limit_and_deduplication():
+    index = SuggestIndex.build(
+        {"id": f"id{i}", "title": f"Night Night {i}", "rating": i / 10, "cast": None, "director": None}
+        for i in range(50)
+    )
+    assert texts(index.complete("night", limit=3)) == ["Night Night 49", "Night Night 48", "Night Night 47"]
+    assert len(index.complete("n", limit=20)) == 20
+
+
+def test_suggest_endpoint(client):
+    body = client.get("/suggest", params={"prefix": "star", "limit": 1}).json()
+    assert body == [{"text": "Star Wars", "kind": "title", "id": "tt2"}]
+    assert client.get("/suggest", params={"prefix": "x", "limit": 50}).status_code == 422
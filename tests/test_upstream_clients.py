@@ -0,0 +1,73 @@
+"""Pytest tests for the pooled async TMDB and OMDB clients."""
+
+import asyncio
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+import app.main as main
+from app.omdb_client import AsyncOMDBClient, OMDBClient
+from app.tmdb_client import AsyncTMDBClient, TMDBClient
+
+
+def upstream(request):
+    if request.url.host == "tmdb.test":
+        if request.url.params["query"] == "fail":
+            return httpx.Response(401, json={"status_message": "Invalid API key"})
+        return httpx.Response(200, json={"results": [{"title": request.url.params["query"]}]})
+    if request.url.params.get("s") == "none":
+        return httpx.Response(200, json={"Response": "False", "Error": "Movie not found!"})
+    return httpx.Response(200, json={"Search": [{"Title": request.url.params["s"]}]})
+
+
+@pytest.fixture
+def clients():
+    http = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+    return (
+        AsyncTMDBClient(http, api_key="k", base_url="https://tmdb.test/3"),
+        AsyncOMDBClient(http, api_key="k", base_url="https://omdb.test/"),
+    )
+
+
+def test_async_clients(clients):
+    tmdb, omdb = clients
+    assert asyncio.run(tmdb.search("Inception")) == [{"title": "Inception"}]
+    assert asyncio.run(omdb.search("Heat")) == [{"Title": "Heat"}]
+    assert asyncio.run(omdb.search("none")) == []
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(tmdb.search("fail"))
+
+
+def test_sync_and_async_clients_build_the_same_requests(clients):
+    tmdb, omdb = clients
+    sync_tmdb = TMDBClient(api_key="k", base_url="https://tmdb.test/3")
+    sync_omdb = OMDBClient(api_key="k", base_url="https://omdb.test/")
+    assert sync_tmdb._search_request("Heat", "tv") == tmdb._search_request("Heat", "tv")
+    assert sync_tmdb._details_request(949, "movie") == tmdb._details_request(949, "movie")
+    assert sync_tmdb._find_request("tt0113277") == tmdb._find_request("tt0113277")
+    assert sync_omdb._search_request("Heat") == omdb._search_request("Heat")
+    assert sync_omdb._details_request("tt0113277") == omdb._details_request("tt0113277")
+    assert sync_tmdb._details_request(949, "movie").params == {"api_key": "k", "append_to_response": "videos,images"}
+
+
+def test_search_endpoints_use_shared_clients(clients, monkeypatch):
+    monkeypatch.setattr(main, "tmdb", clients[0])
+    monkeypatch.setattr(main, "omdb", clients[1])
+    client = TestClient(main.app)
+    assert client.get("/tmdb/search", params={"query": "Alien"}).json() == {"results": [{"title": "Alien"}]}
+    assert client.get("/omdb/search", params={"title": "Heat"}).json() == {"results": [{"Title": "Heat"}]}
+    assert client.get("/tmdb/search", params={"query": "fail"}).status_code == 500
+
+
+def test_searches_are_cached_per_normalized_query(clients):
+    tmdb, _ = clients
+    hits = []
+    tmdb.http = httpx.AsyncClient(transport=httpx.MockTransport(lambda r: hits.append(r) or upstream(r)))
+
+    async def run():
+        await asyncio.gather(*(tmdb.search("Inception") for _ in range(10)))
+        await tmdb.search("  inception ")
+        await tmdb.search("Inception", media_type="tv")
+
+    asyncio.run(run())
+    assert len(hits) == 2
+    assert tmdb.cache.stats().coalesced == 9